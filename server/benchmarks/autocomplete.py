@@ -0,0 +1,86 @@
+"""
+🏁 TITLE AUTOCOMPLETE MICRO-BENCHMARK
+O5 Elite Level Suggestion Latency
+
+This script measures the in-process title index behind [[ completion:
+- Build time for a workspace of synthetic titles
+- Query latency for 1-4 character prefixes and misspelled words
+- Latency right after a write, when cached results are invalidated
+- p50/p99 per query kind
+
+Usage (from server/):
+    python -m benchmarks.autocomplete --titles 100000 --queries 5000
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List, Callable
+
+from core.autocomplete import TitleIndex
+from core.latency import LatencyHistogram
+
+WORDS = [
+    "meeting", "notes", "project", "roadmap", "design", "review", "weekly", "sync", "research",
+    "ideas", "draft", "plan", "retro", "journal", "reading", "list", "budget", "hiring", "launch",
+    "architecture", "database", "migration", "customer", "feedback", "quarterly", "goals", "api",
+    "onboarding", "incident", "postmortem", "experiment", "metrics", "dashboard", "travel", "recipes"
+]
+
+def make_titles(count: int, rng: random.Random) -> List[str]:
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))) + f" {index}"
+        for index in range(count)
+    ]
+
+def timed(queries: List[str], search: Callable[[str], object]) -> Dict[str, float]:
+    histogram = LatencyHistogram()
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        histogram.record(time.perf_counter() - start)
+    p50, p99 = histogram.quantiles((0.5, 0.99))
+    return {"p50_ms": round(p50 * 1000, 3), "p99_ms": round(p99 * 1000, 3)}
+
+def main(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    titles = make_titles(args.titles, rng)
+    now = time.time()
+
+    start = time.perf_counter()
+    index = TitleIndex()
+    index.load([
+        (f"note-{number}", title, now - rng.uniform(0, 365 * 86400), rng.randint(0, 30))
+        for number, title in enumerate(titles)
+    ])
+    print(f"build: {args.titles} titles in {time.perf_counter() - start:.2f}s")
+
+    for length in (1, 2, 3, 4):
+        queries = [rng.choice(WORDS)[:length] for _ in range(args.queries)]
+        print(f"prefix[{length}] cached:", timed(queries, lambda query: index.search(query, args.limit)))
+
+        def after_write(query: str):
+            index.upsert(f"note-{rng.randrange(args.titles)}", rng.choice(titles), time.time())
+            index.search(query, args.limit)
+
+        print(f"prefix[{length}] after write:", timed(queries, after_write))
+
+    typos = []
+    for _ in range(args.queries):
+        word = rng.choice([word for word in WORDS if len(word) > 5])
+        position = rng.randrange(1, len(word) - 1)
+        typos.append(word[:position] + word[position + 1:])
+
+    def fuzzy_after_write(query: str):
+        index.upsert(f"note-{rng.randrange(args.titles)}", rng.choice(titles), time.time())
+        index.search(query, args.limit)
+
+    print("fuzzy after write:", timed(typos, fuzzy_after_write))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the title autocomplete index")
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,125 @@
+"""
+🏁 L1 CACHE POLICY HIT-RATIO BENCHMARK
+O5 Elite Level Eviction Policy Selection
+
+This script replays an access trace against one L1 cache segment per policy:
+- Traces from access logs: JSON lines with a "key" (and optional
+  "size_bytes"), such as cache hit/miss events, or "key [size]" text lines
+- A synthetic trace otherwise: Zipf-popular notes with periodic one-hit scans
+- Hit ratio and byte hit ratio for every policy at several byte budgets
+- Replay throughput, so admission overhead is visible next to its benefit
+
+Usage (from server/):
+    python -m benchmarks.cache_policies --trace cache_events.jsonl --budgets-mb 1,8,32
+    python -m benchmarks.cache_policies --requests 500000 --keys 50000
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import random
+import time
+from typing import Dict, List, Iterator, Tuple
+
+from core.cache import CacheSegment, EvictionPolicy
+
+POLICIES = [
+    EvictionPolicy.LRU,
+    EvictionPolicy.FIFO,
+    EvictionPolicy.LFU,
+    EvictionPolicy.ARC,
+    EvictionPolicy.W_TINYLFU
+]
+
+# Cache events that are reads; sets, deletes and invalidations are skipped
+READ_EVENTS = {"hit", "miss"}
+
+def read_trace(path: str, default_size: int) -> Iterator[Tuple[str, int]]:
+    with open(path) as trace:
+        for line in trace:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith("{"):
+                record = json.loads(line)
+                if "key" not in record or record.get("event_type", "hit") not in READ_EVENTS:
+                    continue
+                yield record["key"], int(record.get("size_bytes") or default_size)
+            else:
+                fields = line.split()
+                yield fields[0], int(fields[1]) if len(fields) > 1 else default_size
+
+def synthetic_trace(args: argparse.Namespace) -> List[Tuple[str, int]]:
+    """Zipf-distributed note reads, interrupted by scans of never-repeated keys"""
+
+    rng = random.Random(args.seed)
+    weights = [1 / (rank ** args.zipf) for rank in range(1, args.keys + 1)]
+    cumulative = list(itertools.accumulate(weights))
+    sizes = [int(rng.lognormvariate(7.5, 1.0)) + 64 for _ in range(args.keys)]
+
+    trace = []
+    scan = 0
+    while len(trace) < args.requests:
+        for _ in range(args.scan_every):
+            rank = bisect.bisect_left(cumulative, rng.random() * cumulative[-1])
+            trace.append((f"note:{rank}", sizes[rank]))
+
+        # An export or search crawl touching keys nobody reads again
+        for offset in range(args.scan_length):
+            trace.append((f"export:{scan}:{offset}", int(rng.lognormvariate(7.5, 1.0)) + 64))
+        scan += 1
+
+    return trace[:args.requests]
+
+def replay(trace: List[Tuple[str, int]], policy: EvictionPolicy, max_bytes: int) -> Dict[str, float]:
+    segment = CacheSegment(max_bytes=max_bytes, policy=policy)
+    hits = hit_bytes = total_bytes = 0
+
+    start = time.perf_counter()
+    for key, size_bytes in trace:
+        total_bytes += size_bytes
+        if segment.get(key) is not None:
+            hits += 1
+            hit_bytes += size_bytes
+        else:
+            segment.set(key, True, size_bytes)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "hit_ratio": round(hits / len(trace), 4),
+        "byte_hit_ratio": round(hit_bytes / max(1, total_bytes), 4),
+        "kops_per_sec": round(len(trace) / elapsed / 1000, 1)
+    }
+
+def main(args: argparse.Namespace):
+    if args.trace:
+        trace = list(read_trace(args.trace, args.default_size))
+        print(f"trace: {len(trace)} reads from {args.trace}")
+    else:
+        trace = synthetic_trace(args)
+        print(f"synthetic trace: {len(trace)} reads over {args.keys} notes, "
+              f"{args.scan_length}-key scan every {args.scan_every} reads")
+
+    distinct_bytes = sum(dict(trace).values())
+    print(f"distinct keys: {len(set(key for key, _ in trace))}, footprint {distinct_bytes / 1e6:.1f}MB")
+
+    for budget_mb in (float(value) for value in args.budgets_mb.split(",")):
+        max_bytes = int(budget_mb * 1024 * 1024)
+        print(f"\nbudget {budget_mb:g}MB")
+        for policy in POLICIES:
+            print(f"  {policy.value:<10}", replay(trace, policy, max_bytes))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare L1 cache policy hit ratios on an access trace")
+    parser.add_argument("--trace", help="access log: JSON lines with key[/size_bytes], or 'key [size]' lines")
+    parser.add_argument("--default-size", type=int, default=2048, help="entry size when the trace has none")
+    parser.add_argument("--budgets-mb", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=300000)
+    parser.add_argument("--keys", type=int, default=20000)
+    parser.add_argument("--zipf", type=float, default=0.9)
+    parser.add_argument("--scan-every", type=int, default=20000)
+    parser.add_argument("--scan-length", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
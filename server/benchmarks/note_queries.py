@@ -0,0 +1,194 @@
+"""
+🏁 NOTE QUERY MICRO-BENCHMARK
+O5 Elite Level Data Access Comparison
+
+This script compares the two data access backends on the hottest note queries:
+- SQLAlchemy text() sessions (the default backend)
+- asyncpg prepared statements (core.pg_fast_path)
+- Get by id, list page, insert and update, timed per operation
+- Throughput plus p50/p99 latency for each backend
+
+Usage (from server/):
+    python -m benchmarks.note_queries --iterations 2000
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, Callable, Awaitable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from config.enterprise_config import EnterpriseConfig
+from core.latency import LatencyHistogram
+from core.pg_fast_path import PreparedNoteQueries, asyncpg_dsn, NOTE_COLUMNS
+
+BENCH_USER = "bench-user-note-queries"
+
+async def timed(iterations: int, operation: Callable[[int], Awaitable[Any]]) -> Dict[str, float]:
+    """Run an operation sequentially and describe its latency"""
+
+    histogram = LatencyHistogram()
+    start = time.perf_counter()
+    for i in range(iterations):
+        op_start = time.perf_counter()
+        await operation(i)
+        histogram.record(time.perf_counter() - op_start)
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = histogram.quantiles((0.5, 0.99))
+    return {"ops_per_sec": iterations / elapsed, "p50_ms": p50 * 1000, "p99_ms": p99 * 1000}
+
+async def bench_sqlalchemy(session_factory: async_sessionmaker, note_ids: list, iterations: int) -> Dict[str, Dict[str, float]]:
+    """Benchmark the SQLAlchemy text() path"""
+
+    results = {}
+
+    async def get_note(i):
+        async with session_factory() as session:
+            result = await session.execute(
+                text(f"SELECT {NOTE_COLUMNS} FROM notes WHERE id = :note_id AND user_id = :user_id AND status != 'deleted'"),
+                {"note_id": note_ids[i % len(note_ids)], "user_id": BENCH_USER}
+            )
+            result.fetchone()
+
+    async def list_page(i):
+        async with session_factory() as session:
+            result = await session.execute(
+                text(f"SELECT {NOTE_COLUMNS} FROM notes WHERE user_id = :user_id AND status = 'active' "
+                     "ORDER BY updated_at DESC LIMIT :limit OFFSET :offset"),
+                {"user_id": BENCH_USER, "limit": 50, "offset": 0}
+            )
+            result.fetchall()
+
+    async def insert_note(i):
+        now = datetime.utcnow()
+        async with session_factory() as session:
+            await session.execute(
+                text("""
+                INSERT INTO notes (id, title, body, tags, links, color, user_id, workspace_id,
+                                   status, created_at, updated_at, version, encrypted)
+                VALUES (:id, :title, :body, :tags, :links, :color, :user_id, :workspace_id,
+                        :status, :created_at, :updated_at, :version, :encrypted)
+                """),
+                {
+                    "id": str(uuid.uuid4()), "title": f"bench {i}", "body": "body " * 40,
+                    "tags": ["bench"], "links": [], "color": "#ffffff", "user_id": BENCH_USER,
+                    "workspace_id": None, "status": "active", "created_at": now, "updated_at": now,
+                    "version": 1, "encrypted": False
+                }
+            )
+            await session.commit()
+
+    async def update_note(i):
+        async with session_factory() as session:
+            await session.execute(
+                text("""
+                UPDATE notes SET title = :title, body = :body, tags = :tags, links = :links,
+                       color = :color, updated_at = :updated_at, version = :version, status = :status
+                WHERE id = :id
+                """),
+                {
+                    "id": note_ids[i % len(note_ids)], "title": f"bench {i}", "body": "updated " * 40,
+                    "tags": ["bench"], "links": [], "color": "#ffffff", "updated_at": datetime.utcnow(),
+                    "version": i + 2, "status": "active"
+                }
+            )
+            await session.commit()
+
+    for name, operation in (("get", get_note), ("list", list_page), ("insert", insert_note), ("update", update_note)):
+        results[name] = await timed(iterations, operation)
+    return results
+
+async def bench_asyncpg(queries: PreparedNoteQueries, note_ids: list, iterations: int) -> Dict[str, Dict[str, float]]:
+    """Benchmark the asyncpg prepared statement path"""
+
+    results = {}
+
+    async def get_note(i):
+        await queries.fetch_note(note_ids[i % len(note_ids)], BENCH_USER)
+
+    async def list_page(i):
+        await queries.fetch_notes_page(BENCH_USER, 50, 0)
+
+    async def insert_note(i):
+        now = datetime.utcnow()
+        await queries.insert_note((
+            str(uuid.uuid4()), f"bench {i}", "body " * 40, ["bench"], [], "#ffffff",
+            BENCH_USER, None, "active", now, now, 1, False, None
+        ))
+
+    async def update_note(i):
+        await queries.update_note((
+            note_ids[i % len(note_ids)], f"bench {i}", "updated " * 40, ["bench"], [],
+            "#ffffff", datetime.utcnow(), i + 2, "active", None
+        ))
+
+    for name, operation in (("get", get_note), ("list", list_page), ("insert", insert_note), ("update", update_note)):
+        results[name] = await timed(iterations, operation)
+    return results
+
+async def main(dsn: str, iterations: int, seed_notes: int):
+    engine = create_async_engine(dsn, pool_size=5)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    queries = PreparedNoteQueries(asyncpg_dsn(dsn), min_size=5, max_size=5)
+    await queries.initialize()
+
+    try:
+        async with session_factory() as session:
+            await session.execute(
+                text("""
+                INSERT INTO users (id, email, username, password_hash, salt)
+                VALUES (:id, :email, :username, 'x', 'x')
+                ON CONFLICT (id) DO NOTHING
+                """),
+                {"id": BENCH_USER, "email": f"{BENCH_USER}@example.invalid", "username": BENCH_USER}
+            )
+            await session.commit()
+
+        note_ids = []
+        now = datetime.utcnow()
+        for i in range(seed_notes):
+            note_id = str(uuid.uuid4())
+            await queries.insert_note((
+                note_id, f"seed {i}", "seed " * 40, ["bench"], [], "#ffffff",
+                BENCH_USER, None, "active", now, now, 1, False, None
+            ))
+            note_ids.append(note_id)
+
+        # Warm both pools before timing
+        await bench_sqlalchemy(session_factory, note_ids, 20)
+        await bench_asyncpg(queries, note_ids, 20)
+
+        reports = {
+            "sqlalchemy": await bench_sqlalchemy(session_factory, note_ids, iterations),
+            "asyncpg": await bench_asyncpg(queries, note_ids, iterations)
+        }
+
+        print(f"{'operation':<10}{'backend':<12}{'ops/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+        for operation in ("get", "list", "insert", "update"):
+            for backend, report in reports.items():
+                row = report[operation]
+                print(f"{operation:<10}{backend:<12}{row['ops_per_sec']:>12.0f}{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}")
+            speedup = reports["asyncpg"][operation]["ops_per_sec"] / reports["sqlalchemy"][operation]["ops_per_sec"]
+            print(f"{'':<10}{'speedup':<12}{speedup:>11.2f}x")
+
+    finally:
+        async with session_factory() as session:
+            await session.execute(text("DELETE FROM notes WHERE user_id = :user_id"), {"user_id": BENCH_USER})
+            await session.execute(text("DELETE FROM users WHERE id = :user_id"), {"user_id": BENCH_USER})
+            await session.commit()
+        await queries.close()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare SQLAlchemy and asyncpg note query paths")
+    parser.add_argument("--dsn", default=EnterpriseConfig.get_database_url())
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed-notes", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.dsn, args.iterations, args.seed_notes))
@@ -45,6 +45,27 @@ class DatabaseConfig:
     POSTGRES_MIN_CONNECTIONS: int = int(os.getenv("POSTGRES_MIN_CONNECTIONS", "5"))
     POSTGRES_MAX_CONNECTIONS: int = int(os.getenv("POSTGRES_MAX_CONNECTIONS", "100"))
     POSTGRES_CONNECTION_TIMEOUT: int = int(os.getenv("POSTGRES_CONNECTION_TIMEOUT", "30"))
+    POOL_SATURATION_ALERT: float = float(os.getenv("POOL_SATURATION_ALERT", "0.9"))  # Checked-out / capacity
+    POOL_WAIT_ALERT_MS: float = float(os.getenv("POOL_WAIT_ALERT_MS", "100"))  # p99 checkout wait
+    
+    # Data access backend for hot note queries: "sqlalchemy" or "asyncpg"
+    DATA_ACCESS_BACKEND: str = os.getenv("DATA_ACCESS_BACKEND", "sqlalchemy")
+    
+    # Read Replicas (comma-separated SQLAlchemy DSNs, empty to disable)
+    POSTGRES_REPLICA_DSNS: List[str] = field(default_factory=lambda: [
+        dsn.strip() for dsn in os.getenv("POSTGRES_REPLICA_DSNS", "").split(",") if dsn.strip()
+    ])
+    POSTGRES_REPLICA_MAX_CONNECTIONS: int = int(os.getenv("POSTGRES_REPLICA_MAX_CONNECTIONS", "50"))
+    READ_YOUR_WRITES_WINDOW_MS: int = int(os.getenv("READ_YOUR_WRITES_WINDOW_MS", "5000"))
+    # Replicas are probed this often and leave rotation when lagging more than the limit
+    REPLICA_PROBE_INTERVAL_SECONDS: float = float(os.getenv("REPLICA_PROBE_INTERVAL_SECONDS", "5"))
+    REPLICA_MAX_LAG_MS: int = int(os.getenv("REPLICA_MAX_LAG_MS", "10000"))
+    
+    # Note shards beyond the primary (comma-separated SQLAlchemy DSNs, empty to disable)
+    POSTGRES_SHARD_DSNS: List[str] = field(default_factory=lambda: [
+        dsn.strip() for dsn in os.getenv("POSTGRES_SHARD_DSNS", "").split(",") if dsn.strip()
+    ])
+    SHARD_DIRECTORY_TTL_MS: int = int(os.getenv("SHARD_DIRECTORY_TTL_MS", "5000"))
     
     # Redis Cache & Session Store
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
@@ -133,6 +154,20 @@ class PerformanceConfig:
     # Caching Strategy
     ENABLE_RESPONSE_CACHE: bool = os.getenv("ENABLE_RESPONSE_CACHE", "true").lower() == "true"
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))  # 1 hour
+    # L1 (in-process) byte budgets: keys matching no strategy, and per
+    # strategy overrides of the defaults in core.cache ("notes=128,analytics=8")
+    L1_CACHE_DEFAULT_MB: int = int(os.getenv("L1_CACHE_DEFAULT_MB", "16"))
+    L1_CACHE_BUDGETS_MB: Dict[str, int] = field(default_factory=lambda: {
+        name.strip(): int(size) for name, _, size in (
+            item.partition("=") for item in os.getenv("L1_CACHE_BUDGETS_MB", "").split(",") if "=" in item
+        )
+    })
+    # Per strategy eviction policy overrides ("notes=arc,search_results=w_tinylfu")
+    L1_CACHE_POLICIES: Dict[str, str] = field(default_factory=lambda: {
+        name.strip(): policy.strip() for name, _, policy in (
+            item.partition("=") for item in os.getenv("L1_CACHE_POLICIES", "").split(",") if "=" in item
+        )
+    })
     ENABLE_EDGE_CACHING: bool = os.getenv("ENABLE_EDGE_CACHING", "false").lower() == "true"
     
     # Load Balancing
@@ -220,7 +255,15 @@ class EnterpriseConfig:
     # Advanced Analytics
     ENABLE_ADVANCED_ANALYTICS: bool = os.getenv("ENABLE_ADVANCED_ANALYTICS", "true").lower() == "true"
     ANALYTICS_RETENTION_DAYS: int = int(os.getenv("ANALYTICS_RETENTION_DAYS", "90"))
+    ANALYTICS_PARTITION_INTERVAL: str = os.getenv("ANALYTICS_PARTITION_INTERVAL", "day")
+    METRICS_PARTITION_INTERVAL: str = os.getenv("METRICS_PARTITION_INTERVAL", "week")
+    PARTITION_PREMAKE: int = int(os.getenv("PARTITION_PREMAKE", "7"))
     ENABLE_PREDICTIVE_ANALYTICS: bool = os.getenv("ENABLE_PREDICTIVE_ANALYTICS", "true").lower() == "true"
+    ANALYTICS_FLUSH_ROWS: int = int(os.getenv("ANALYTICS_FLUSH_ROWS", "500"))
+    ANALYTICS_FLUSH_INTERVAL_MS: int = int(os.getenv("ANALYTICS_FLUSH_INTERVAL_MS", "1000"))
+    ANALYTICS_BUFFER_MAX_ROWS: int = int(os.getenv("ANALYTICS_BUFFER_MAX_ROWS", "50000"))
+    ANALYTICS_OVERFLOW_POLICY: str = os.getenv("ANALYTICS_OVERFLOW_POLICY", "spill")  # spill | drop
+    ANALYTICS_SPILL_DIR: str = os.getenv("ANALYTICS_SPILL_DIR", "./data/spill")
     
     # Plugin System
     ENABLE_PLUGIN_SYSTEM: bool = os.getenv("ENABLE_PLUGIN_SYSTEM", "true").lower() == "true"
@@ -236,6 +279,39 @@ class EnterpriseConfig:
     ENABLE_DATA_ENCRYPTION: bool = os.getenv("ENABLE_DATA_ENCRYPTION", "true").lower() == "true"
     ENABLE_BACKUP_SYSTEM: bool = os.getenv("ENABLE_BACKUP_SYSTEM", "true").lower() == "true"
     BACKUP_INTERVAL_HOURS: int = int(os.getenv("BACKUP_INTERVAL_HOURS", "6"))
+    BACKUP_DIR: str = os.getenv("BACKUP_DIR", "./data/backups")
+    BACKUP_PARALLELISM: int = int(os.getenv("BACKUP_PARALLELISM", "4"))
+    BACKUP_MAX_MB_PER_SEC: int = int(os.getenv("BACKUP_MAX_MB_PER_SEC", "50"))  # 0 = unthrottled
+    BACKUP_FULL_EVERY: int = int(os.getenv("BACKUP_FULL_EVERY", "28"))  # Chain length before a new full backup
+    BACKUP_KEEP_FULL: int = int(os.getenv("BACKUP_KEEP_FULL", "2"))
+    BACKUP_WATERMARK_OVERLAP_SECONDS: int = int(os.getenv("BACKUP_WATERMARK_OVERLAP_SECONDS", "300"))
+    VERSION_SNAPSHOT_INTERVAL: int = int(os.getenv("VERSION_SNAPSHOT_INTERVAL", "20"))
+    COLD_STORAGE_BACKEND: str = os.getenv("COLD_STORAGE_BACKEND", "local")
+    COLD_STORAGE_PATH: str = os.getenv("COLD_STORAGE_PATH", "./data/cold")
+    COLD_DATA_THRESHOLD_DAYS: int = int(os.getenv("COLD_DATA_THRESHOLD_DAYS", "90"))
+    DELETED_RETENTION_DAYS: int = int(os.getenv("DELETED_RETENTION_DAYS", "30"))  # Soft-deleted notes kept this long
+    PURGE_BATCH_SIZE: int = int(os.getenv("PURGE_BATCH_SIZE", "500"))
+    PURGE_BATCH_DELAY_MS: int = int(os.getenv("PURGE_BATCH_DELAY_MS", "200"))  # Pause between purge transactions
+    PURGE_MAX_DELAY_MS: int = int(os.getenv("PURGE_MAX_DELAY_MS", "30000"))  # Backoff ceiling
+    PURGE_LOCK_TIMEOUT_MS: int = int(os.getenv("PURGE_LOCK_TIMEOUT_MS", "2000"))
+    BODY_COMPRESSION_ENABLED: bool = os.getenv("BODY_COMPRESSION_ENABLED", "true").lower() == "true"
+    BODY_COMPRESSION_THRESHOLD: int = int(os.getenv("BODY_COMPRESSION_THRESHOLD", "512"))  # Bytes; smaller bodies stay text
+    BODY_COMPRESSION_LEVEL: int = int(os.getenv("BODY_COMPRESSION_LEVEL", "3"))
+    BODY_DICTIONARY_MAX_BYTES: int = int(os.getenv("BODY_DICTIONARY_MAX_BYTES", "16384"))  # Bodies up to this use the dictionary
+    BODY_DICTIONARY_SIZE: int = int(os.getenv("BODY_DICTIONARY_SIZE", "65536"))
+    AUTOCOMPLETE_MAX_TENANTS: int = int(os.getenv("AUTOCOMPLETE_MAX_TENANTS", "64"))  # Title indexes kept in memory
+    AUTOCOMPLETE_MAX_AGE_SECONDS: int = int(os.getenv("AUTOCOMPLETE_MAX_AGE_SECONDS", "600"))  # Rebuild interval
+    SINGLE_FLIGHT_TIMEOUT_MS: int = int(os.getenv("SINGLE_FLIGHT_TIMEOUT_MS", "5000"))
+    SINGLE_FLIGHT_DISTRIBUTED: bool = os.getenv("SINGLE_FLIGHT_DISTRIBUTED", "false").lower() == "true"
+    SINGLE_FLIGHT_LOCK_TTL_MS: int = int(os.getenv("SINGLE_FLIGHT_LOCK_TTL_MS", "5000"))
+    OUTBOX_WORKERS: int = int(os.getenv("OUTBOX_WORKERS", "4"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    OUTBOX_POLL_INTERVAL_MS: int = int(os.getenv("OUTBOX_POLL_INTERVAL_MS", "500"))
+    OUTBOX_LEASE_SECONDS: int = int(os.getenv("OUTBOX_LEASE_SECONDS", "30"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "postgres")  # postgres | embedded
+    EMBEDDED_DB_PATH: str = os.getenv("EMBEDDED_DB_PATH", "./data/notes.db")
+    EMBEDDED_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDED_CACHE_MAX_ENTRIES", "10000"))
     
     # ==================== O5 ELITE FEATURES ====================
     
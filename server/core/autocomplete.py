@@ -0,0 +1,518 @@
+"""
+⌨️ TITLE AUTOCOMPLETE
+O5 Elite Level Link Insertion Suggestions
+
+This module implements per-workspace title suggestions for [[ completion:
+- A sorted array of word-start title suffixes for prefix lookups by bisection
+- Maintained top-k lists for prefixes of up to four characters
+- Trigram postings for fuzzy matches when prefixes run short
+- Ranking by match quality, recency and backlink count
+- In-process indexes kept current from a per-workspace Redis change stream
+"""
+
+import asyncio
+import bisect
+import heapq
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from itertools import islice
+from typing import Dict, List, Any, Optional, Set, Tuple, Callable, Awaitable
+from dataclasses import dataclass
+import structlog
+
+from core.latency import WindowedHistogram
+
+logger = structlog.get_logger(__name__)
+
+WORD = re.compile(r"\w+")
+
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm-style trigrams: each word padded with two spaces before, one after"""
+
+    grams = set()
+    for word in WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def title_key(title: str) -> str:
+    """Normalized title, the same as wikilinks.title_key
+
+    Defined here so the embedded backend does not import the SQL stack.
+    """
+
+    return title.strip(" ").lower()
+
+@dataclass
+class TitleEntry:
+    """One note in a title index"""
+    note_id: str
+    title: str
+    key: str
+    updated_at: float
+    link_count: int = 0
+    rank: float = 0.0
+
+# Source of a tenant's titles: (note id, title, updated_at, backlink count) rows
+TitleLoader = Callable[[str], Awaitable[List[Tuple[str, str, float, int]]]]
+
+class TitleIndex:
+    """Prefix and trigram index over one tenant's note titles
+
+    Every word start of a normalized title is a suffix in one sorted
+    array, so "meet" finds both "Meeting notes" and "Weekly meeting".
+    Each entry's rank (recency and backlink count) is computed when it is
+    written. Every note matching a prefix is ranked, never just the first
+    run of suffixes in sort order; prefixes of up to short_prefix_length
+    characters match too many suffixes to scan per query, so their top
+    short_prefix_top notes are kept in lists built on first use and
+    updated on writes. Results are memoized for result_ttl seconds and a write only
+    drops the queries it can change: prefixes of its word starts, plus any
+    result that used fuzzy matching. Changes carry the note's updated_at
+    and older ones are ignored, so events applied out of order converge.
+    """
+
+    def __init__(
+        self,
+        max_words: int = 8,
+        short_prefix_length: int = 4,
+        short_prefix_top: int = 50,
+        fuzzy_threshold: float = 0.3,
+        fuzzy_budget: int = 5000,
+        fuzzy_candidates: int = 100,
+        result_ttl: float = 60.0,
+        max_memo_length: int = 64
+    ):
+        self.max_words = max_words
+        self.short_prefix_length = short_prefix_length
+        self.short_prefix_top = short_prefix_top
+        self.fuzzy_threshold = fuzzy_threshold
+        self.fuzzy_budget = fuzzy_budget
+        self.fuzzy_candidates = fuzzy_candidates
+        self.result_ttl = result_ttl
+        self.max_memo_length = max_memo_length
+
+        self.entries: Dict[str, TitleEntry] = {}
+        self.suffixes: List[Tuple[str, str]] = []  # (suffix, note id), sorted
+        self.postings: Dict[str, Set[str]] = {}
+        self.removed: Dict[str, float] = {}  # Deleted note id -> deleted at
+        self._results: Dict[str, Tuple[int, float, List[Dict[str, Any]]]] = {}
+        self._fuzzy_results: Set[str] = set()
+        self._top: Dict[str, List[Tuple[float, str]]] = {}  # short prefix -> (score, note id), best first
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def load(self, rows: List[Tuple[str, str, float, int]]):
+        """Bulk-load an empty index: one sort instead of an insertion per suffix"""
+
+        now = time.time()
+        for note_id, title, updated_at, link_count in rows:
+            entry = TitleEntry(note_id, title, title_key(title), updated_at, link_count)
+            entry.rank = self._rank(entry, now)
+            self.entries[note_id] = entry
+            self.suffixes.extend((suffix, note_id) for suffix in self._word_suffixes(entry.key))
+            for gram in trigrams(entry.key):
+                self.postings.setdefault(gram, set()).add(note_id)
+
+        self.suffixes.sort()
+        self._results.clear()
+        self._top.clear()
+
+    def upsert(self, note_id: str, title: str, updated_at: float, link_count: Optional[int] = None):
+        """Add or update a note; link_count None keeps the known count"""
+
+        if self.removed.get(note_id, -1.0) >= updated_at:
+            return
+
+        existing = self.entries.get(note_id)
+        if existing:
+            if existing.updated_at > updated_at:
+                return
+            if link_count is None:
+                link_count = existing.link_count
+
+        key = title_key(title)
+        old_key = existing.key if existing else None
+        if existing and existing.key == key:
+            entry = existing
+            entry.title = title
+            entry.updated_at = updated_at
+            entry.link_count = link_count
+        else:
+            if existing:
+                self._unindex(existing)
+                self._invalidate(existing.key)
+            entry = TitleEntry(note_id, title, key, updated_at, link_count or 0)
+            self.entries[note_id] = entry
+            self._index(entry)
+
+        entry.rank = self._rank(entry, time.time())
+        self._update_top(note_id, old_key, entry)
+        self._invalidate(key)
+
+    def remove(self, note_id: str, deleted_at: float):
+        """Drop a note and ignore its changes up to deleted_at"""
+
+        self.removed[note_id] = max(deleted_at, self.removed.get(note_id, -1.0))
+        entry = self.entries.get(note_id)
+        if entry and entry.updated_at <= deleted_at:
+            self._unindex(entry)
+            self._update_top(note_id, entry.key, None)
+            self._invalidate(entry.key)
+            del self.entries[note_id]
+
+    def search(self, query: str, limit: int = 10, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Top titles for what follows [[, best first
+
+        Titles starting with the query rank above word-start matches, which
+        rank above fuzzy (trigram) matches; within a tier, recently edited
+        and often linked notes come first.
+        """
+
+        key = title_key(query)
+        if not key:
+            return []
+
+        now = time.time() if now is None else now
+        cached = self._results.get(key)
+        if cached and cached[0] >= limit and cached[1] > now:
+            return cached[2][:limit]
+
+        entries = self.entries
+        matches: Dict[str, Tuple[float, float]] = {}  # note id -> (tier, score)
+
+        if len(key) <= self.short_prefix_length and limit <= self.short_prefix_top:
+            prefixed = self._top_for(key)
+        else:
+            prefixed = [(score, note_id) for note_id, score in self._scan(key).items()]
+        for score, note_id in prefixed:
+            matches[note_id] = (2.0 if score >= 2.0 else 1.0, score)
+
+        fuzzy = len(matches) < limit and len(key) >= 3
+        if fuzzy:
+            for note_id, similarity in self._fuzzy(key):
+                if note_id not in matches:
+                    matches[note_id] = (0.0, 0.9 * similarity + entries[note_id].rank)
+
+        ranked = heapq.nlargest(limit, matches.items(), key=lambda item: item[1][1])
+        results = [
+            {
+                "id": note_id,
+                "title": entries[note_id].title,
+                "updated_at": entries[note_id].updated_at,
+                "link_count": entries[note_id].link_count,
+                "match": "prefix" if tier == 2.0 else "word" if tier == 1.0 else "fuzzy"
+            }
+            for note_id, (tier, _) in ranked
+        ]
+
+        if len(key) <= self.max_memo_length:
+            self._results[key] = (limit, now + self.result_ttl, results)
+            if fuzzy:
+                self._fuzzy_results.add(key)
+        return results
+
+    # ==================== PRIVATE METHODS ====================
+
+    @staticmethod
+    def _rank(entry: TitleEntry, now: float) -> float:
+        """Recency and popularity, each in [0, 1)"""
+
+        age_days = max(0.0, now - entry.updated_at) / 86400
+        recency = 1.0 / (1.0 + age_days / 7)
+        popularity = 1.0 - 1.0 / (1.0 + math.log1p(entry.link_count))
+        return 0.5 * recency + 0.5 * popularity
+
+    def _scan(self, key: str) -> Dict[str, float]:
+        """Score every note with a word start matching key
+
+        Prefix matches are one contiguous run of the sorted suffix array.
+        Titles starting with key score 2 + rank, other word starts 1 + rank.
+        """
+
+        entries = self.entries
+        suffixes = self.suffixes
+        start = bisect.bisect_left(suffixes, (key, ""))
+        end = bisect.bisect_left(suffixes, (key + "\uffff", ""), start)
+
+        scores: Dict[str, float] = {}
+        for _, note_id in suffixes[start:end]:
+            if note_id not in scores:
+                entry = entries[note_id]
+                scores[note_id] = (2.0 if entry.key.startswith(key) else 1.0) + entry.rank
+        return scores
+
+    def _top_for(self, prefix: str) -> List[Tuple[float, str]]:
+        """The best short_prefix_top notes for a short prefix, built on first use"""
+
+        top = self._top.get(prefix)
+        if top is None:
+            scores = self._scan(prefix)
+            top = heapq.nlargest(self.short_prefix_top, ((score, note_id) for note_id, score in scores.items()))
+            self._top[prefix] = top
+        return top
+
+    def _short_prefixes(self, key: str) -> Set[str]:
+        return {
+            suffix[:length]
+            for suffix in self._word_suffixes(key)
+            for length in range(1, min(len(suffix), self.short_prefix_length) + 1)
+        }
+
+    def _update_top(self, note_id: str, old_key: Optional[str], entry: Optional[TitleEntry]):
+        """Keep built short-prefix lists exact after a note changed
+
+        A list not yet full holds every match, so a new match always joins
+        it. A list that loses a member, or whose member's score drops, may
+        now miss a better note outside it and is dropped for a rebuild.
+        """
+
+        new_prefixes = self._short_prefixes(entry.key) if entry else set()
+        old_prefixes = self._short_prefixes(old_key) if old_key else set()
+
+        for prefix in old_prefixes | new_prefixes:
+            top = self._top.get(prefix)
+            if top is None:
+                continue
+
+            score = None
+            if prefix in new_prefixes:
+                score = (2.0 if entry.key.startswith(prefix) else 1.0) + entry.rank
+
+            position = next((i for i, (_, member) in enumerate(top) if member == note_id), None)
+            if position is not None:
+                if score is None or score < top[position][0]:
+                    del self._top[prefix]
+                    continue
+                del top[position]
+            elif score is None or (len(top) >= self.short_prefix_top and score <= top[-1][0]):
+                continue
+
+            top.append((score, note_id))
+            top.sort(reverse=True)
+            del top[self.short_prefix_top:]
+
+    def _word_suffixes(self, key: str) -> List[str]:
+        starts = [0] + [i + 1 for i, char in enumerate(key) if char == " " and i + 1 < len(key)]
+        return list({key[start:] for start in starts[:self.max_words] if key[start] != " "})
+
+    def _index(self, entry: TitleEntry):
+        for suffix in self._word_suffixes(entry.key):
+            bisect.insort(self.suffixes, (suffix, entry.note_id))
+        for gram in trigrams(entry.key):
+            self.postings.setdefault(gram, set()).add(entry.note_id)
+
+    def _unindex(self, entry: TitleEntry):
+        for suffix in self._word_suffixes(entry.key):
+            position = bisect.bisect_left(self.suffixes, (suffix, entry.note_id))
+            if position < len(self.suffixes) and self.suffixes[position] == (suffix, entry.note_id):
+                del self.suffixes[position]
+        for gram in trigrams(entry.key):
+            posting = self.postings.get(gram)
+            if posting:
+                posting.discard(entry.note_id)
+                if not posting:
+                    del self.postings[gram]
+
+    def _invalidate(self, key: str):
+        """Drop memoized results a title can appear in"""
+
+        for suffix in self._word_suffixes(key):
+            for length in range(1, min(len(suffix), self.max_memo_length) + 1):
+                self._results.pop(suffix[:length], None)
+
+        for fuzzy_key in self._fuzzy_results:
+            self._results.pop(fuzzy_key, None)
+        self._fuzzy_results.clear()
+
+    def _fuzzy(self, key: str) -> List[Tuple[str, float]]:
+        """Notes whose title trigram similarity to key passes the threshold
+
+        Candidates are counted from the query's rarest trigrams, up to
+        fuzzy_budget postings, then similarity is computed exactly.
+        """
+
+        grams = trigrams(key)
+        posted = sorted((posting for posting in map(self.postings.get, grams) if posting), key=len)
+
+        counts = Counter()
+        budget = self.fuzzy_budget
+        for posting in posted:
+            if budget <= 0:
+                break
+            counts.update(islice(posting, budget))
+            budget -= len(posting)
+
+        matches = []
+        for note_id, _ in counts.most_common(self.fuzzy_candidates):
+            title_grams = trigrams(self.entries[note_id].key)
+            shared = len(grams & title_grams)
+            similarity = shared / (len(grams) + len(title_grams) - shared)
+            if similarity >= self.fuzzy_threshold:
+                matches.append((note_id, similarity))
+        return matches
+
+@dataclass
+class TenantTitles:
+    """A tenant's index and its position in the tenant's change stream"""
+    index: TitleIndex
+    stream_id: str
+    built_at: float
+    synced_at: float = 0.0
+
+class TitleAutocomplete:
+    """Per-process title indexes for recently queried tenants
+
+    An index is built from the loader on first use and then kept current
+    from the tenant's Redis stream of title changes, which any worker
+    appends to through publish(). Without Redis (the embedded backend),
+    publish() applies changes to the local index directly. Indexes are
+    rebuilt in the background after max_age, which also refreshes
+    backlink counts that changes do not carry.
+    """
+
+    def __init__(
+        self,
+        loader: TitleLoader,
+        redis_client: Optional[Any] = None,
+        max_tenants: int = 64,
+        max_age: float = 600.0,
+        sync_interval: float = 0.05,
+        stream_maxlen: int = 10000
+    ):
+        self.loader = loader
+        self.redis_client = redis_client
+        self.max_tenants = max_tenants
+        self.max_age = max_age
+        self.sync_interval = sync_interval
+        self.stream_maxlen = stream_maxlen
+
+        self.indexes: "OrderedDict[str, TenantTitles]" = OrderedDict()
+        self._building: Dict[str, asyncio.Task] = {}
+        self.latency = WindowedHistogram(window_seconds=300, slices=5)
+        self.stats = {
+            "searches": 0,
+            "builds": 0,
+            "changes_applied": 0,
+            "evictions": 0
+        }
+
+    async def suggest(self, tenant: str, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Top-k titles in a tenant for a [[ query"""
+
+        start_time = time.perf_counter()
+
+        state = self.indexes.get(tenant)
+        if state is None:
+            # One build per tenant: concurrent cold-start queries share it
+            build = self._building.get(tenant)
+            if build is None:
+                build = self._building[tenant] = asyncio.create_task(self._build(tenant))
+            state = await asyncio.shield(build)
+        else:
+            self.indexes.move_to_end(tenant)
+            if time.monotonic() - state.built_at > self.max_age and tenant not in self._building:
+                self._building[tenant] = asyncio.create_task(self._build(tenant))
+            await self._sync(tenant, state)
+
+        results = state.index.search(query, limit)
+
+        self.stats["searches"] += 1
+        self.latency.record(time.perf_counter() - start_time)
+        return results
+
+    async def publish(self, tenant: str, note_id: str, title: Optional[str], updated_at: float):
+        """Record a title change (title None for a deletion) for every worker"""
+
+        if self.redis_client is None:
+            state = self.indexes.get(tenant)
+            if state:
+                self._apply(state.index, {"id": note_id, "title": title, "updated_at": updated_at})
+            return
+
+        fields = {"id": note_id, "updated_at": repr(updated_at)}
+        if title is not None:
+            fields["title"] = title
+        await self.redis_client.xadd(
+            self._stream_key(tenant), fields, maxlen=self.stream_maxlen, approximate=True
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get autocomplete statistics"""
+
+        return {
+            **self.stats,
+            "tenants": len(self.indexes),
+            "titles": sum(len(state.index) for state in self.indexes.values()),
+            "latency": self.latency.snapshot().describe()
+        }
+
+    # ==================== PRIVATE METHODS ====================
+
+    @staticmethod
+    def _stream_key(tenant: str) -> str:
+        return f"title_changes:{tenant}"
+
+    async def _build(self, tenant: str) -> TenantTitles:
+        """Load a tenant's titles, then replay changes made since the stream position"""
+
+        try:
+            # Read the position first: changes racing the load are replayed
+            # and ignored if the loaded row is already as new
+            last_id = "0-0"
+            if self.redis_client is not None:
+                latest = await self.redis_client.xrevrange(self._stream_key(tenant), count=1)
+                if latest:
+                    last_id = latest[0][0]
+
+            index = TitleIndex()
+            index.load(await self.loader(tenant))
+
+            state = TenantTitles(index, last_id, time.monotonic())
+            await self._sync(tenant, state)
+
+            self.indexes[tenant] = state
+            self.indexes.move_to_end(tenant)
+            while len(self.indexes) > self.max_tenants:
+                self.indexes.popitem(last=False)
+                self.stats["evictions"] += 1
+
+            self.stats["builds"] += 1
+            logger.debug("Title index built", tenant=tenant, titles=len(index))
+            return state
+
+        except Exception as e:
+            logger.error("Failed to build title index", tenant=tenant, error=str(e))
+            raise
+        finally:
+            self._building.pop(tenant, None)
+
+    async def _sync(self, tenant: str, state: TenantTitles):
+        """Apply stream entries newer than the index's position"""
+
+        now = time.monotonic()
+        if self.redis_client is None or now - state.synced_at < self.sync_interval:
+            return
+        state.synced_at = now
+
+        while True:
+            entries = await self.redis_client.xrange(
+                self._stream_key(tenant), min=f"({state.stream_id}", count=500
+            )
+            for entry_id, fields in entries:
+                self._apply(state.index, fields)
+                state.stream_id = entry_id
+            self.stats["changes_applied"] += len(entries)
+            if len(entries) < 500:
+                break
+
+    @staticmethod
+    def _apply(index: TitleIndex, change: Dict[str, Any]):
+        updated_at = float(change["updated_at"])
+        if change.get("title") is None:
+            index.remove(change["id"], updated_at)
+        else:
+            index.upsert(change["id"], change["title"], updated_at)
@@ -0,0 +1,661 @@
+"""
+💾 INCREMENTAL BACKUP ENGINE
+O5 Elite Level Disaster Recovery
+
+This module implements snapshot backups of the note databases:
+- Parallel binary COPY of every table from one consistent snapshot
+- Incremental exports of rows changed since the previous watermark
+- Streaming gzip compression with SHA-256 checksums and a manifest
+- Archived note bodies copied from the cold object store alongside
+- Token-bucket I/O throttling so backups do not starve live traffic
+- Checksum-verified, timed restore of a full + incremental chain
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+import zlib
+from typing import Dict, List, Any, Optional, AsyncIterator, Tuple, Set
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+import structlog
+
+import asyncpg
+
+from config.enterprise_config import EnterpriseConfig
+from core.object_store import ObjectStore, create_object_store
+from core.pg_fast_path import asyncpg_dsn
+
+logger = structlog.get_logger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+OBJECTS_DIR = "objects"
+CHUNK_SIZE = 1024 * 1024
+GZIP_WBITS = 31  # zlib container flag for gzip-compatible files
+
+@dataclass
+class BackupTable:
+    """A table included in backups
+
+    ``watermark_column`` selects rows changed since the previous backup;
+    tables without one are small and copied in full every time.
+    """
+    name: str
+    watermark_column: Optional[str] = None
+
+# Restore order respects foreign keys (parents before children)
+BACKUP_TABLES = [
+    BackupTable("users", "updated_at"),
+    BackupTable("workspaces", "updated_at"),
+    BackupTable("workspace_members"),
+    BackupTable("shard_directory", "updated_at"),
+    BackupTable("body_dictionaries", "created_at"),
+    BackupTable("notes", "updated_at"),
+    BackupTable("note_versions", "created_at"),
+    BackupTable("note_links"),
+]
+
+def _quoted(columns: List[str]) -> str:
+    """Comma-separated quoted identifiers"""
+
+    return ", ".join(f'"{column}"' for column in columns)
+
+class IOThrottle:
+    """Token bucket limiting bytes per second across concurrent copies"""
+
+    def __init__(self, bytes_per_second: int):
+        self.rate = bytes_per_second
+        self.tokens = float(bytes_per_second)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = asyncio.Lock()
+
+    async def consume(self, size: int):
+        """Wait until size bytes may be transferred (no-op when unlimited)"""
+
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= size
+            if self.tokens < 0:
+                delay = -self.tokens / self.rate
+                self.waited += delay
+                # Sleeping under the lock queues the other copies behind us
+                await asyncio.sleep(delay)
+
+class _CompressedWriter:
+    """Buffers COPY output, gzips it and writes it to a temporary file"""
+
+    def __init__(self, path: Path, throttle: IOThrottle):
+        self.path = path
+        self.tmp_path = path.with_suffix(path.suffix + ".tmp")
+        self.throttle = throttle
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, GZIP_WBITS)
+        self.digest = hashlib.sha256()
+        self.buffer: List[bytes] = []
+        self.buffered = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.file = None
+
+    async def open(self):
+        self.file = await asyncio.to_thread(open, self.tmp_path, "wb")
+
+    async def write(self, data: bytes):
+        self.buffer.append(data)
+        self.buffered += len(data)
+        self.raw_bytes += len(data)
+        if self.buffered >= CHUNK_SIZE:
+            await self._flush(final=False)
+
+    async def close(self):
+        await self._flush(final=True)
+        await asyncio.to_thread(self._finish)
+
+    async def _flush(self, final: bool):
+        raw = b"".join(self.buffer)
+        self.buffer = []
+        self.buffered = 0
+
+        # Throttle on bytes read from the database, the load live traffic feels
+        await self.throttle.consume(len(raw))
+
+        compressed = self.compressor.compress(raw)
+        if final:
+            compressed += self.compressor.flush()
+
+        self.digest.update(compressed)
+        self.compressed_bytes += len(compressed)
+        await asyncio.to_thread(self.file.write, compressed)
+
+    def _finish(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+class BackupEngine:
+    """Writes full and incremental backups to a local snapshot directory
+
+    Each run creates ``{root}/{backup_id}/db{n}/{table}.copy.gz`` for every
+    database (the primary, then each note shard) and writes
+    ``manifest.json`` last, so a directory without a manifest is an
+    interrupted run and is ignored. All tables of a database are exported
+    from one exported snapshot, so a backup is transactionally consistent
+    per database even though tables are copied in parallel.
+
+    Incremental runs export rows whose watermark column is after the
+    previous backup's watermark minus ``overlap``. The overlap covers
+    transactions that were in flight when the previous snapshot was taken
+    (timestamps are set before commit); restore upserts, so rows exported
+    twice are harmless. Hard deletes are not captured: a restore keeps
+    rows that were purged after the full backup.
+
+    Archived notes keep only an ``archive_key`` stub in the database, so
+    every blob referenced from a snapshot is also copied to
+    ``{backup_id}/objects/{key}`` unless an earlier backup of the chain
+    already holds it (keys are content-addressed and never rewritten).
+    """
+
+    def __init__(
+        self,
+        dsns: List[str],
+        root: str,
+        tables: Optional[List[BackupTable]] = None,
+        parallelism: int = 4,
+        bytes_per_second: int = 0,
+        full_every: int = 28,
+        keep_full: int = 2,
+        overlap: timedelta = timedelta(minutes=5),
+        object_store: Optional[ObjectStore] = None
+    ):
+        self.dsns = dsns
+        self.root = Path(root)
+        self.tables = tables or BACKUP_TABLES
+        self.parallelism = max(1, parallelism)
+        self.throttle = IOThrottle(bytes_per_second)
+        self.full_every = max(1, full_every)
+        self.keep_full = max(1, keep_full)
+        self.overlap = overlap
+        self.object_store = object_store
+
+        self.stats = {
+            "backups": 0,
+            "last_backup": None,
+            "last_duration": 0.0,
+            "last_compressed_bytes": 0,
+            "last_objects": 0,
+            "missing_objects": 0,
+            "throttle_wait_seconds": 0.0
+        }
+
+    # ==================== BACKUP ====================
+
+    async def run(self, force_full: bool = False) -> Dict[str, Any]:
+        """Take a backup (incremental when a recent chain exists) and prune old ones"""
+
+        start_time = time.monotonic()
+        chain = self.latest_chain()
+        parent = chain[-1] if chain else None
+        full = force_full or parent is None or len(chain) >= self.full_every
+
+        backup_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+        backup_dir = self.root / backup_id
+        await asyncio.to_thread(backup_dir.mkdir, parents=True, exist_ok=False)
+
+        since = None
+        if not full:
+            since = datetime.fromisoformat(parent["watermark"]) - self.overlap
+
+        try:
+            databases = []
+            archive_keys = set()
+            for index, dsn in enumerate(self.dsns):
+                database, keys = await self._backup_database(index, dsn, backup_dir, since)
+                databases.append(database)
+                archive_keys.update(keys)
+
+            backed_up = set() if full else {key for manifest in chain for key in manifest.get("objects", [])}
+            objects, missing = await self._backup_objects(backup_dir, archive_keys - backed_up)
+
+            manifest = {
+                "id": backup_id,
+                "kind": "full" if full else "incremental",
+                "parent": None if full else parent["id"],
+                "since": since.isoformat() if since else None,
+                # Restore chains resume from the oldest database snapshot
+                "watermark": min(database["snapshot_time"] for database in databases),
+                "databases": databases,
+                "objects": objects,
+                "missing_objects": missing,
+                "duration": time.monotonic() - start_time
+            }
+            await asyncio.to_thread(self._write_manifest, backup_dir, manifest)
+
+        except Exception:
+            await asyncio.to_thread(shutil.rmtree, backup_dir, True)
+            raise
+
+        compressed = sum(
+            table["compressed_bytes"]
+            for database in manifest["databases"]
+            for table in database["tables"].values()
+        )
+        self.stats["backups"] += 1
+        self.stats["last_backup"] = backup_id
+        self.stats["last_duration"] = manifest["duration"]
+        self.stats["last_compressed_bytes"] = compressed
+        self.stats["last_objects"] = len(objects)
+        self.stats["missing_objects"] = missing
+        self.stats["throttle_wait_seconds"] = self.throttle.waited
+
+        logger.info("Backup completed", backup_id=backup_id, kind=manifest["kind"],
+                    duration=manifest["duration"], compressed_bytes=compressed)
+
+        await asyncio.to_thread(self._prune)
+        return manifest
+
+    async def _backup_database(
+        self,
+        index: int,
+        dsn: str,
+        backup_dir: Path,
+        since: Optional[datetime]
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """Copy every table of one database in parallel from a shared snapshot
+
+        Also returns the archive keys the snapshot's notes refer to.
+        """
+
+        db_dir = backup_dir / f"db{index}"
+        await asyncio.to_thread(db_dir.mkdir)
+
+        coordinator = await asyncpg.connect(dsn)
+        pool = await asyncpg.create_pool(dsn, min_size=1, max_size=self.parallelism)
+        try:
+            # Hold the exporting transaction open until every copy is done
+            snapshot_tx = coordinator.transaction(isolation="repeatable_read", readonly=True)
+            await snapshot_tx.start()
+            snapshot_id = await coordinator.fetchval("SELECT pg_export_snapshot()")
+            snapshot_time = await coordinator.fetchval("SELECT LOCALTIMESTAMP")
+
+            present = {
+                row[0] for row in await coordinator.fetch(
+                    "SELECT tablename FROM pg_tables WHERE schemaname = 'public'"
+                )
+            }
+            tables = [table for table in self.tables if table.name in present]
+            archive_keys = await self._archive_keys(coordinator) if "notes" in present else []
+
+            semaphore = asyncio.Semaphore(self.parallelism)
+
+            async def copy(table: BackupTable) -> Dict[str, Any]:
+                async with semaphore:
+                    async with pool.acquire() as conn:
+                        return await self._copy_table(conn, snapshot_id, table, db_dir, since)
+
+            results = await asyncio.gather(*(copy(table) for table in tables))
+            await snapshot_tx.commit()
+
+        finally:
+            await pool.close()
+            await coordinator.close()
+
+        return {
+            "index": index,
+            "snapshot_time": snapshot_time.isoformat(),
+            "tables": {table.name: result for table, result in zip(tables, results)}
+        }, archive_keys
+
+    async def _backup_objects(self, backup_dir: Path, keys: Set[str]) -> Tuple[List[str], int]:
+        """Copy archived blobs into the backup, returning the copied keys and the missing count"""
+
+        if not keys:
+            return [], 0
+        if self.object_store is None:
+            logger.warning("Archived bodies not backed up: no object store configured", objects=len(keys))
+            return [], len(keys)
+
+        copied = []
+        missing = 0
+        for key in sorted(keys):
+            data = await self.object_store.get(key)
+            if data is None:
+                missing += 1
+                logger.error("Archived object missing during backup", archive_key=key)
+                continue
+
+            await self.throttle.consume(len(data))
+            await asyncio.to_thread(self._write_object, backup_dir / OBJECTS_DIR / key, data)
+            copied.append(key)
+
+        return copied, missing
+
+    async def _copy_table(
+        self,
+        conn: asyncpg.Connection,
+        snapshot_id: str,
+        table: BackupTable,
+        db_dir: Path,
+        since: Optional[datetime]
+    ) -> Dict[str, Any]:
+        """COPY one table (or its changed rows) into a compressed file"""
+
+        start_time = time.monotonic()
+        path = db_dir / f"{table.name}.copy.gz"
+        writer = _CompressedWriter(path, self.throttle)
+
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            await conn.execute(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'")
+
+            columns = await self._columns(conn, table.name)
+            query = f'SELECT {_quoted(columns)} FROM "{table.name}"'
+            args: List[Any] = []
+            if since is not None and table.watermark_column:
+                query += f' WHERE "{table.watermark_column}" > $1'
+                args.append(since)
+
+            await writer.open()
+            try:
+                status = await conn.copy_from_query(query, *args, output=writer.write, format="binary")
+                await writer.close()
+            except Exception:
+                await asyncio.to_thread(writer.tmp_path.unlink, True)
+                raise
+
+        return {
+            "file": path.name,
+            "columns": columns,
+            "rows": int(status.split()[-1]) if status else 0,
+            "incremental": since is not None and table.watermark_column is not None,
+            "raw_bytes": writer.raw_bytes,
+            "compressed_bytes": writer.compressed_bytes,
+            "sha256": writer.digest.hexdigest(),
+            "duration": time.monotonic() - start_time
+        }
+
+    # ==================== RESTORE ====================
+
+    async def restore(self, backup_id: Optional[str] = None, dsns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Restore a backup chain (full + incrementals) into the target databases
+
+        Targets must already have the schema. Every file is verified
+        against its checksum before any row is written. Archived blobs are
+        put back into the object store, then every restored archive_key is
+        checked against it. Returns per-table and total timings.
+        """
+
+        start_time = time.monotonic()
+        chain = self.chain_for(backup_id) if backup_id else self.latest_chain()
+        if not chain:
+            raise ValueError("No complete backup found")
+
+        dsns = dsns or self.dsns
+        await asyncio.to_thread(self._verify_chain, chain)
+        verified = time.monotonic()
+
+        objects = await self._restore_objects(chain)
+
+        timings: Dict[str, float] = {}
+        rows = 0
+        missing: Optional[int] = 0 if self.object_store else None
+        for manifest in chain:
+            for database in manifest["databases"]:
+                conn = await asyncpg.connect(dsns[database["index"]])
+                try:
+                    for table in self.tables:
+                        entry = database["tables"].get(table.name)
+                        if entry is None:
+                            continue
+
+                        table_start = time.monotonic()
+                        path = self.root / manifest["id"] / f"db{database['index']}" / entry["file"]
+                        await self._restore_table(conn, table.name, entry["columns"], path)
+
+                        key = f"db{database['index']}.{table.name}"
+                        timings[key] = timings.get(key, 0.0) + time.monotonic() - table_start
+                        rows += entry["rows"]
+
+                    if manifest is chain[-1] and missing is not None:
+                        missing += await self._count_missing_objects(conn)
+                finally:
+                    await conn.close()
+
+        result = {
+            "backup_id": chain[-1]["id"],
+            "chain": [manifest["id"] for manifest in chain],
+            "rows": rows,
+            "objects": objects,
+            "missing_objects": missing,
+            "verify_seconds": verified - start_time,
+            "restore_seconds": time.monotonic() - verified,
+            "tables": timings
+        }
+        logger.info("Backup restored", backup_id=result["backup_id"], rows=rows,
+                    restore_seconds=result["restore_seconds"])
+        if missing is None:
+            logger.warning("Archived bodies not checked: no object store configured")
+        elif missing:
+            logger.error("Restored notes refer to missing archived bodies", missing_objects=missing)
+        return result
+
+    async def _restore_objects(self, chain: List[Dict[str, Any]]) -> int:
+        """Put every archived blob of a chain back into the object store"""
+
+        if self.object_store is None:
+            return 0
+
+        restored = 0
+        for manifest in chain:
+            for key in manifest.get("objects", []):
+                path = self.root / manifest["id"] / OBJECTS_DIR / key
+                data = await asyncio.to_thread(path.read_bytes)
+                await self.object_store.put(key, data)
+                restored += 1
+        return restored
+
+    async def _count_missing_objects(self, conn: asyncpg.Connection) -> int:
+        """Count restored archive keys the object store cannot serve"""
+
+        missing = 0
+        for key in await self._archive_keys(conn):
+            if not await self.object_store.exists(key):
+                missing += 1
+                logger.error("Archived object missing after restore", archive_key=key)
+        return missing
+
+    async def _restore_table(self, conn: asyncpg.Connection, table: str, columns: List[str], path: Path):
+        """Load one backup file through a staging table and upsert it"""
+
+        staging = f"_restore_{table}"
+        column_list = _quoted(columns)
+
+        async with conn.transaction():
+            await conn.execute(
+                f'CREATE TEMP TABLE "{staging}" (LIKE "{table}" INCLUDING DEFAULTS) ON COMMIT DROP'
+            )
+            await conn.copy_to_table(staging, source=self._decompressed(path), columns=columns, format="binary")
+
+            keys = await self._primary_key(conn, table)
+            updates = [column for column in columns if column not in keys]
+            if keys and updates:
+                assignments = ", ".join(f'"{column}" = EXCLUDED."{column}"' for column in updates)
+                conflict = f"ON CONFLICT ({_quoted(keys)}) DO UPDATE SET {assignments}"
+            else:
+                conflict = "ON CONFLICT DO NOTHING"
+
+            await conn.execute(
+                f'INSERT INTO "{table}" ({column_list}) SELECT {column_list} FROM "{staging}" {conflict}'
+            )
+
+    async def _decompressed(self, path: Path) -> AsyncIterator[bytes]:
+        """Stream a backup file's decompressed COPY data"""
+
+        decompressor = zlib.decompressobj(GZIP_WBITS)
+        with open(path, "rb") as file:
+            while True:
+                chunk = await asyncio.to_thread(file.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+    # ==================== CATALOG ====================
+
+    def manifests(self) -> List[Dict[str, Any]]:
+        """Complete backups, oldest first"""
+
+        if not self.root.exists():
+            return []
+
+        manifests = []
+        for backup_dir in sorted(self.root.iterdir()):
+            manifest_path = backup_dir / MANIFEST_NAME
+            if manifest_path.is_file():
+                manifests.append(json.loads(manifest_path.read_text()))
+        return manifests
+
+    def latest_chain(self) -> List[Dict[str, Any]]:
+        """The most recent full backup and the incrementals built on it"""
+
+        manifests = self.manifests()
+        return self.chain_for(manifests[-1]["id"], manifests) if manifests else []
+
+    def last_backup_time(self) -> Optional[datetime]:
+        """Start time (UTC) of the most recent complete backup"""
+
+        manifests = self.manifests()
+        if not manifests:
+            return None
+        return datetime.strptime(manifests[-1]["id"], "%Y%m%dT%H%M%S%fZ")
+
+    def chain_for(self, backup_id: str, manifests: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Follow parent links from a backup back to its full backup"""
+
+        by_id = {manifest["id"]: manifest for manifest in (manifests or self.manifests())}
+        chain = []
+        current = by_id.get(backup_id)
+        while current is not None:
+            chain.append(current)
+            if current["kind"] == "full":
+                return list(reversed(chain))
+            current = by_id.get(current["parent"])
+
+        raise ValueError(f"Backup chain for {backup_id} is incomplete")
+
+    # ==================== PRIVATE METHODS ====================
+
+    def _verify_chain(self, chain: List[Dict[str, Any]]):
+        """Check every file of a chain against its manifest checksum"""
+
+        for manifest in chain:
+            for database in manifest["databases"]:
+                for name, entry in database["tables"].items():
+                    path = self.root / manifest["id"] / f"db{database['index']}" / entry["file"]
+                    digest = hashlib.sha256()
+                    with open(path, "rb") as file:
+                        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+                            digest.update(chunk)
+                    if digest.hexdigest() != entry["sha256"]:
+                        raise ValueError(f"Checksum mismatch for {manifest['id']}/{name}")
+
+            # Object keys end in the SHA-256 of their content
+            for key in manifest.get("objects", []):
+                data = (self.root / manifest["id"] / OBJECTS_DIR / key).read_bytes()
+                if hashlib.sha256(data).hexdigest() != Path(key).stem:
+                    raise ValueError(f"Checksum mismatch for {manifest['id']}/{OBJECTS_DIR}/{key}")
+
+    def _write_manifest(self, backup_dir: Path, manifest: Dict[str, Any]):
+        tmp_path = backup_dir / (MANIFEST_NAME + ".tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(manifest, file, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, backup_dir / MANIFEST_NAME)
+
+    @staticmethod
+    def _write_object(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _prune(self):
+        """Keep the newest ``keep_full`` chains; drop older and incomplete backups"""
+
+        manifests = self.manifests()
+        fulls = [manifest["id"] for manifest in manifests if manifest["kind"] == "full"]
+        if len(fulls) <= self.keep_full:
+            return
+
+        cutoff = fulls[-self.keep_full]
+        for backup_dir in sorted(self.root.iterdir()):
+            if backup_dir.name >= cutoff:
+                break
+            shutil.rmtree(backup_dir, ignore_errors=True)
+            logger.info("Old backup pruned", backup_id=backup_dir.name)
+
+    @staticmethod
+    async def _columns(conn: asyncpg.Connection, table: str) -> List[str]:
+        rows = await conn.fetch(
+            """
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = $1
+            ORDER BY ordinal_position
+            """,
+            table
+        )
+        return [row[0] for row in rows]
+
+    @staticmethod
+    async def _archive_keys(conn: asyncpg.Connection) -> List[str]:
+        has_column = await conn.fetchval(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'notes' AND column_name = 'archive_key'
+            """
+        )
+        if not has_column:
+            return []
+        rows = await conn.fetch("SELECT DISTINCT archive_key FROM notes WHERE archive_key IS NOT NULL")
+        return [row[0] for row in rows]
+
+    @staticmethod
+    async def _primary_key(conn: asyncpg.Connection, table: str) -> List[str]:
+        rows = await conn.fetch(
+            """
+            SELECT a.attname FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = $1::regclass AND i.indisprimary
+            """,
+            table
+        )
+        return [row[0] for row in rows]
+
+def create_backup_engine(config: EnterpriseConfig) -> BackupEngine:
+    """Create a backup engine for the primary and every note shard"""
+
+    dsns = [config.get_database_url()] + list(config.DATABASE.POSTGRES_SHARD_DSNS)
+    return BackupEngine(
+        [asyncpg_dsn(dsn) for dsn in dsns],
+        config.BACKUP_DIR,
+        parallelism=config.BACKUP_PARALLELISM,
+        bytes_per_second=config.BACKUP_MAX_MB_PER_SEC * 1024 * 1024,
+        full_every=config.BACKUP_FULL_EVERY,
+        keep_full=config.BACKUP_KEEP_FULL,
+        overlap=timedelta(seconds=config.BACKUP_WATERMARK_OVERLAP_SECONDS),
+        object_store=create_object_store(config)
+    )
@@ -0,0 +1,215 @@
+"""
+🗜️ NOTE BODY COMPRESSION
+O5 Elite Level Storage Footprint Reduction
+
+This module implements transparent zstd compression of note bodies:
+- Bodies above a size threshold stored as zstd frames instead of text
+- A shared dictionary, trained on sampled bodies, for small notes
+- Dictionaries found by the id each frame records, so old rows stay readable
+- Compressed Redis payloads recognised by the zstd frame magic number
+- Compression ratio and CPU time per body size bucket for threshold tuning
+"""
+
+import time
+from typing import Dict, List, Any, Optional, Set, Iterable
+import structlog
+
+import zstandard
+
+logger = structlog.get_logger(__name__)
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Upper bounds (bytes) of the size buckets compression is reported by
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144)
+
+class UnknownDictionaryError(KeyError):
+    """A frame was written with a dictionary this process has not loaded"""
+
+def is_frame(data: Optional[bytes]) -> bool:
+    """True for a zstd frame; canonical note JSON never starts with the magic"""
+
+    return bool(data) and data[:4] == ZSTD_MAGIC
+
+def _bucket(size: int) -> str:
+    for bound in SIZE_BUCKETS:
+        if size < bound:
+            return f"<{bound // 1024}KiB"
+    return f">={SIZE_BUCKETS[-1] // 1024}KiB"
+
+class BodyCodec:
+    """Compress and decompress note bodies and cached payloads
+
+    Bodies under ``threshold`` bytes stay plain text: the frame header and
+    CPU time outweigh the saving. Bodies up to ``dictionary_max_bytes`` are
+    compressed with the active trained dictionary, when there is one, since
+    short texts share too little with themselves for zstd to find. A frame
+    is kept only if it saves at least ``min_saving`` of the input.
+    Decompression needs the dictionary a frame was written with, so every
+    dictionary ever trained stays loadable by id.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        threshold: int = 512,
+        level: int = 3,
+        dictionary_max_bytes: int = 16384,
+        min_saving: float = 0.1
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.level = level
+        self.dictionary_max_bytes = dictionary_max_bytes
+        self.min_saving = min_saving
+
+        self.dictionaries: Dict[int, zstandard.ZstdCompressionDict] = {}
+        self.active_dictionary_id: Optional[int] = None
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._dictionary_compressor: Optional[zstandard.ZstdCompressor] = None
+        self._decompressors: Dict[int, zstandard.ZstdDecompressor] = {0: zstandard.ZstdDecompressor()}
+
+        self.stats = {
+            "compressed": 0,
+            "with_dictionary": 0,
+            "below_threshold": 0,
+            "incompressible": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "compress_seconds": 0.0,
+            "decompressed": 0,
+            "decompressed_bytes": 0,
+            "decompress_seconds": 0.0
+        }
+        self.buckets: Dict[str, Dict[str, float]] = {}
+
+    def add_dictionary(self, data: bytes, activate: bool = True) -> int:
+        """Load a trained dictionary, making it the one new frames use"""
+
+        dictionary = zstandard.ZstdCompressionDict(data)
+        dict_id = dictionary.dict_id()
+        self.dictionaries[dict_id] = dictionary
+        self._decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+        if activate:
+            self.active_dictionary_id = dict_id
+            self._dictionary_compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dictionary)
+
+        return dict_id
+
+    @staticmethod
+    def train(samples: List[bytes], size: int) -> bytes:
+        """Train a dictionary of at most ``size`` bytes from sample bodies"""
+
+        return zstandard.train_dictionary(size, samples).as_bytes()
+
+    @staticmethod
+    def dictionary_id(data: bytes) -> int:
+        """The id frames written with this dictionary record"""
+
+        return zstandard.ZstdCompressionDict(data).dict_id()
+
+    def compress(self, raw: bytes) -> Optional[bytes]:
+        """A zstd frame for raw, or None when it should be stored as is"""
+
+        if not self.enabled:
+            return None
+        if len(raw) < self.threshold:
+            self.stats["below_threshold"] += 1
+            return None
+
+        start_time = time.perf_counter()
+        use_dictionary = self._dictionary_compressor is not None and len(raw) <= self.dictionary_max_bytes
+        compressor = self._dictionary_compressor if use_dictionary else self._compressor
+        frame = compressor.compress(raw)
+        elapsed = time.perf_counter() - start_time
+
+        bucket = self.buckets.setdefault(
+            _bucket(len(raw)), {"bodies": 0, "bytes_in": 0, "bytes_out": 0, "compress_seconds": 0.0}
+        )
+        bucket["bodies"] += 1
+        bucket["bytes_in"] += len(raw)
+        bucket["bytes_out"] += min(len(frame), len(raw))
+        bucket["compress_seconds"] += elapsed
+        self.stats["compress_seconds"] += elapsed
+
+        if len(frame) > len(raw) * (1 - self.min_saving):
+            self.stats["incompressible"] += 1
+            return None
+
+        self.stats["compressed"] += 1
+        self.stats["with_dictionary"] += use_dictionary
+        self.stats["bytes_in"] += len(raw)
+        self.stats["bytes_out"] += len(frame)
+        return frame
+
+    def decompress(self, frame: bytes) -> bytes:
+        """Inverse of compress"""
+
+        start_time = time.perf_counter()
+        dict_id = zstandard.get_frame_parameters(frame).dict_id
+        decompressor = self._decompressors.get(dict_id)
+        if decompressor is None:
+            raise UnknownDictionaryError(dict_id)
+        raw = decompressor.decompress(frame)
+
+        self.stats["decompressed"] += 1
+        self.stats["decompressed_bytes"] += len(raw)
+        self.stats["decompress_seconds"] += time.perf_counter() - start_time
+        return raw
+
+    def encode_text(self, text: Optional[str]) -> Optional[bytes]:
+        """Frame for a body, or None to store the text itself"""
+
+        return self.compress(text.encode()) if text else None
+
+    def decode_text(self, text: Optional[str], frame: Optional[bytes]) -> Optional[str]:
+        """A stored body from its (text, frame) columns"""
+
+        return self.decompress(frame).decode() if frame is not None else text
+
+    def pack(self, payload: bytes) -> bytes:
+        """A payload as it should be cached: compressed if worthwhile"""
+
+        return self.compress(payload) or payload
+
+    def unpack(self, data: bytes) -> bytes:
+        """A cached payload, decompressed if it was packed"""
+
+        return self.decompress(data) if is_frame(data) else data
+
+    def missing_dictionaries(self, frames: Iterable[Optional[bytes]]) -> Set[int]:
+        """Dictionary ids that these frames need and are not loaded"""
+
+        return {
+            dict_id for dict_id in (
+                zstandard.get_frame_parameters(frame).dict_id for frame in frames if is_frame(frame)
+            )
+            if dict_id not in self._decompressors
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ratio and CPU cost overall and per body size bucket"""
+
+        stats = self.stats
+        return {
+            **stats,
+            "threshold": self.threshold,
+            "dictionary_id": self.active_dictionary_id,
+            "dictionaries": len(self.dictionaries),
+            "ratio": stats["bytes_in"] / stats["bytes_out"] if stats["bytes_out"] else None,
+            "compress_mb_per_sec": (
+                stats["bytes_in"] / stats["compress_seconds"] / 1e6 if stats["compress_seconds"] else None
+            ),
+            "decompress_mb_per_sec": (
+                stats["decompressed_bytes"] / stats["decompress_seconds"] / 1e6 if stats["decompress_seconds"] else None
+            ),
+            "buckets": {
+                name: {
+                    **bucket,
+                    "ratio": bucket["bytes_in"] / bucket["bytes_out"] if bucket["bytes_out"] else None,
+                    "us_per_kib": bucket["compress_seconds"] * 1e6 / (bucket["bytes_in"] / 1024)
+                }
+                for name, bucket in self.buckets.items()
+            }
+        }
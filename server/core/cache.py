@@ -4,6 +4,9 @@ O5 Elite Level Caching Architecture
 
 This module implements enterprise-grade distributed caching with:
 - Multi-tier caching strategy (L1: Memory, L2: Redis, L3: Database)
+- Byte-budgeted L1 segments per strategy namespace
+- Pluggable L1 policies (LRU, FIFO, LFU, ARC, W-TinyLFU) per strategy
+- TTLs enforced on read, with expiry scheduled on a hierarchical timing wheel
 - Intelligent cache warming and prefetching
 - Cache coherency and invalidation strategies
 - Performance optimization and monitoring
@@ -18,7 +21,7 @@ import json
 import time
 import zlib
 import pickle
-from typing import Dict, List, Any, Optional, Union, Callable, Set
+from typing import Dict, List, Any, Optional, Union, Callable, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime, timedelta
@@ -34,9 +37,15 @@ from redis.asyncio import Redis
 
 # Core system imports
 from config.enterprise_config import EnterpriseConfig
+from core.pool_telemetry import pool_telemetry
+from core.cache_policy import CachePolicy, LRUPolicy, FIFOPolicy, LFUPolicy, ARCPolicy, WTinyLFUPolicy
+from core.timing_wheel import TimingWheel
 
 logger = structlog.get_logger(__name__)
 
+# L1 namespace for keys that match no cache strategy
+DEFAULT_NAMESPACE = "default"
+
 class CacheLevel(Enum):
     """Cache hierarchy levels"""
     L1_MEMORY = "l1_memory"
@@ -51,6 +60,20 @@ class EvictionPolicy(Enum):
     TTL = "ttl"          # Time To Live
     FIFO = "fifo"        # First In First Out
     ADAPTIVE = "adaptive" # Adaptive based on access patterns
+    ARC = "arc"          # Adaptive Replacement Cache
+    W_TINYLFU = "w_tinylfu" # Windowed LRU with TinyLFU admission
+
+# Eviction order behind each policy; TTL namespaces share one TTL per
+# strategy, so the earliest written entry is also the next to expire
+POLICY_CLASSES = {
+    EvictionPolicy.LRU: LRUPolicy,
+    EvictionPolicy.LFU: LFUPolicy,
+    EvictionPolicy.TTL: FIFOPolicy,
+    EvictionPolicy.FIFO: FIFOPolicy,
+    EvictionPolicy.ADAPTIVE: ARCPolicy,
+    EvictionPolicy.ARC: ARCPolicy,
+    EvictionPolicy.W_TINYLFU: WTinyLFUPolicy
+}
 
 class CacheEvent(Enum):
     """Cache event types"""
@@ -70,7 +93,8 @@ class CacheEntry:
     accessed_at: datetime
     access_count: int = 0
     size_bytes: int = 0
-    ttl: Optional[int] = None
+    ttl: Optional[float] = None
+    expires_at: Optional[float] = None  # time.monotonic() deadline
     compressed: bool = False
     encrypted: bool = False
     tags: Set[str] = field(default_factory=set)
@@ -81,17 +105,34 @@ class CacheMetrics:
     hits: int = 0
     misses: int = 0
     evictions: int = 0
+    rejected: int = 0
+    expirations: int = 0
     memory_usage: int = 0
     avg_access_time: float = 0.0
     hit_ratio: float = 0.0
     last_updated: datetime = field(default_factory=datetime.now)
 
-class LRUCache:
-    """Thread-safe LRU cache implementation"""
+class CacheSegment:
+    """Thread-safe cache bounded by the bytes its entries take
+    
+    Sizes are supplied by the caller, normally the length of the payload
+    serialized for Redis, so values are never stringified to be measured.
+    An entry larger than max_entry_bytes is not admitted: it would flush
+    most of the cache to make room for one value. Which entries are
+    evicted, and whether a new one is kept at all, is up to the policy.
+    """
     
-    def __init__(self, max_size: int = 1000):
-        self.max_size = max_size
-        self.cache: OrderedDict[str, CacheEntry] = OrderedDict()
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        policy: EvictionPolicy = EvictionPolicy.LRU,
+        max_entry_bytes: Optional[int] = None
+    ):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes or max(1, max_bytes // 8), max_bytes)
+        self.policy_name = policy
+        self.policy: CachePolicy = POLICY_CLASSES[policy](max_bytes)
+        self.cache: Dict[str, CacheEntry] = {}
         self._lock = threading.RLock()
         self.metrics = CacheMetrics()
     
@@ -99,15 +140,20 @@ class LRUCache:
         """Get value from cache"""
         
         with self._lock:
-            if key in self.cache:
-                entry = self.cache[key]
-                
+            self.policy.record_access(key)
+            
+            entry = self.cache.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.metrics.expirations += 1
+                entry = None
+            
+            if entry is not None:
                 # Update access info
                 entry.accessed_at = datetime.now()
                 entry.access_count += 1
                 
-                # Move to end (most recently used)
-                self.cache.move_to_end(key)
+                self.policy.on_hit(key)
                 
                 self.metrics.hits += 1
                 self._update_hit_ratio()
@@ -118,65 +164,106 @@ class LRUCache:
             self._update_hit_ratio()
             return None
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Set[str] = None):
-        """Set value in cache"""
+    def set(
+        self,
+        key: str,
+        value: Any,
+        size_bytes: int,
+        ttl: Optional[float] = None,
+        tags: Set[str] = None
+    ) -> List[str]:
+        """Set value in cache, returning the keys evicted to make room
+        
+        The key itself is among them when the policy declined to admit it.
+        """
         
         with self._lock:
-            now = datetime.now()
+            # Remove existing entry if present; a rejected update must not
+            # leave the stale value behind
+            old_entry = self.cache.pop(key, None)
+            if old_entry is not None:
+                self.metrics.memory_usage -= old_entry.size_bytes
+                self.policy.on_remove(key)
             
-            # Calculate size (rough estimate)
-            size_bytes = len(str(value).encode('utf-8'))
+            if size_bytes > self.max_entry_bytes:
+                self.metrics.rejected += 1
+                return []
             
-            entry = CacheEntry(
+            now = datetime.now()
+            self.cache[key] = CacheEntry(
                 key=key,
                 value=value,
                 created_at=now,
                 accessed_at=now,
                 size_bytes=size_bytes,
                 ttl=ttl,
+                expires_at=time.monotonic() + ttl if ttl else None,
                 tags=tags or set()
             )
-            
-            # Remove existing entry if present
-            if key in self.cache:
-                old_entry = self.cache[key]
-                self.metrics.memory_usage -= old_entry.size_bytes
-            
-            # Add new entry
-            self.cache[key] = entry
             self.metrics.memory_usage += size_bytes
+            self.policy.on_insert(key, size_bytes)
             
-            # Move to end
-            self.cache.move_to_end(key)
-            
-            # Evict if over capacity
-            while len(self.cache) > self.max_size:
-                self._evict_lru()
+            return self._evict_to_budget()
+    
+    def resize(self, max_bytes: int, max_entry_bytes: Optional[int] = None) -> List[str]:
+        """Change the byte budget, returning the keys evicted to fit it"""
+        
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.max_entry_bytes = min(max_entry_bytes or max(1, max_bytes // 8), max_bytes)
+            self.policy.resize(max_bytes)
+            return self._evict_to_budget()
     
     def delete(self, key: str) -> bool:
         """Delete key from cache"""
         
         with self._lock:
             if key in self.cache:
-                entry = self.cache.pop(key)
-                self.metrics.memory_usage -= entry.size_bytes
+                self._remove(key)
                 return True
             return False
     
+    def expire(self, keys: List[str], now: float) -> List[str]:
+        """Remove those of keys whose TTL has passed, returning them"""
+        
+        with self._lock:
+            expired = []
+            for key in keys:
+                entry = self.cache.get(key)
+                if entry is not None and entry.expires_at is not None and entry.expires_at <= now:
+                    self._remove(key)
+                    expired.append(key)
+            
+            self.metrics.expirations += len(expired)
+            return expired
+    
     def clear(self):
         """Clear all cache entries"""
         
         with self._lock:
             self.cache.clear()
+            self.policy = POLICY_CLASSES[self.policy_name](self.max_bytes)
             self.metrics.memory_usage = 0
     
-    def _evict_lru(self):
-        """Evict least recently used entry"""
-        
-        if self.cache:
-            key, entry = self.cache.popitem(last=False)
+    def _evict_to_budget(self) -> List[str]:
+        """Evict the policy's choices until under the byte budget"""
+        
+        evicted = []
+        while self.cache and self.metrics.memory_usage > self.max_bytes:
+            key = self.policy.evict()
+            if key is None:
+                break
+            
+            entry = self.cache.pop(key)
             self.metrics.memory_usage -= entry.size_bytes
             self.metrics.evictions += 1
+            evicted.append(key)
+        return evicted
+    
+    def _remove(self, key: str):
+        entry = self.cache.pop(key)
+        self.metrics.memory_usage -= entry.size_bytes
+        self.policy.on_remove(key)
     
     def _update_hit_ratio(self):
         """Update hit ratio metric"""
@@ -185,6 +272,189 @@ class LRUCache:
         if total > 0:
             self.metrics.hit_ratio = self.metrics.hits / total
 
+class L1Cache:
+    """In-memory tier split into byte-budgeted segments, one per strategy namespace
+    
+    Each namespace evicts within its own budget, so a burst of search
+    results cannot push hot notes out. A key index routes reads to the
+    segment holding the key; namespaces without a configured budget get
+    default_max_bytes. Entries with a TTL are scheduled on one timing
+    wheel, so expire() touches only entries that are due.
+    """
+    
+    def __init__(self, default_max_bytes: int = 32 * 1024 * 1024):
+        self.default_max_bytes = default_max_bytes
+        self.segments: Dict[str, CacheSegment] = {}
+        self.namespaces: Dict[str, str] = {}
+        self.wheel = TimingWheel(time.monotonic())
+        self._lock = threading.RLock()
+        self.metrics = CacheMetrics()
+    
+    def __len__(self) -> int:
+        return len(self.namespaces)
+    
+    @property
+    def memory_usage(self) -> int:
+        return sum(segment.metrics.memory_usage for segment in self.segments.values())
+    
+    @property
+    def max_bytes(self) -> int:
+        return sum(segment.max_bytes for segment in self.segments.values())
+    
+    def configure(
+        self,
+        namespace: str,
+        max_bytes: int,
+        policy: EvictionPolicy = EvictionPolicy.LRU
+    ) -> List[str]:
+        """Set a namespace's byte budget and policy, returning the keys evicted"""
+        
+        with self._lock:
+            segment = self.segments.get(namespace)
+            if segment is None or segment.policy_name != policy:
+                evicted = list(segment.cache) if segment is not None else []
+                self.segments[namespace] = CacheSegment(max_bytes=max_bytes, policy=policy)
+                self._forget(evicted)
+                return evicted
+            
+            evicted = segment.resize(max_bytes)
+            self._forget(evicted)
+            return evicted
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get value from whichever segment holds the key"""
+        
+        with self._lock:
+            namespace = self.namespaces.get(key)
+            value = self.segments[namespace].get(key) if namespace is not None else None
+            
+            if value is not None:
+                self.metrics.hits += 1
+            else:
+                self.metrics.misses += 1
+                if namespace is not None and key not in self.segments[namespace].cache:
+                    # Expired on read
+                    self._forget([key])
+            return value
+    
+    def set(
+        self,
+        key: str,
+        value: Any,
+        size_bytes: int,
+        namespace: str,
+        ttl: Optional[float] = None,
+        tags: Set[str] = None
+    ) -> List[str]:
+        """Set value in the namespace's segment, returning the keys evicted"""
+        
+        with self._lock:
+            previous = self.namespaces.get(key)
+            if previous is not None and previous != namespace:
+                self.segments[previous].delete(key)
+            
+            segment = self.segments.get(namespace)
+            if segment is None:
+                segment = self.segments[namespace] = CacheSegment(max_bytes=self.default_max_bytes)
+            
+            evicted = segment.set(key, value, size_bytes, ttl=ttl, tags=tags)
+            self._forget(evicted)
+            
+            entry = segment.cache.get(key)
+            if entry is None:
+                self._forget([key])
+            else:
+                self.namespaces[key] = namespace
+                if entry.expires_at is not None:
+                    self.wheel.schedule(key, entry.expires_at)
+                else:
+                    self.wheel.cancel(key)
+            
+            self.metrics.evictions += len(evicted)
+            return evicted
+    
+    def delete(self, key: str) -> bool:
+        """Delete key from its segment"""
+        
+        with self._lock:
+            namespace = self.namespaces.pop(key, None)
+            self.wheel.cancel(key)
+            return namespace is not None and self.segments[namespace].delete(key)
+    
+    def clear(self):
+        """Clear all segments, keeping their budgets"""
+        
+        with self._lock:
+            for segment in self.segments.values():
+                segment.clear()
+            self.namespaces.clear()
+            self.wheel = TimingWheel(time.monotonic())
+    
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """Remove entries whose TTL has passed, returning their keys
+        
+        Only keys the timing wheel reports due are looked at, under one
+        acquisition of the lock.
+        """
+        
+        with self._lock:
+            now = time.monotonic() if now is None else now
+            due: Dict[str, List[str]] = defaultdict(list)
+            for key in self.wheel.advance(now):
+                namespace = self.namespaces.get(key)
+                if namespace is not None:
+                    due[namespace].append(key)
+            
+            expired = []
+            for namespace, keys in due.items():
+                expired.extend(self.segments[namespace].expire(keys, now))
+            for key in expired:
+                self.namespaces.pop(key, None)
+            return expired
+    
+    def entries(self) -> List[Any]:
+        """Snapshot of (key, entry) pairs across all segments"""
+        
+        with self._lock:
+            return [
+                item for segment in self.segments.values() for item in segment.cache.items()
+            ]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Size, bytes and hit ratio overall and per namespace"""
+        
+        with self._lock:
+            total = self.metrics.hits + self.metrics.misses
+            return {
+                "size": len(self.namespaces),
+                "max_bytes": self.max_bytes,
+                "memory_usage": self.memory_usage,
+                "hit_ratio": self.metrics.hits / total if total else 0.0,
+                "evictions": self.metrics.evictions,
+                "rejected": sum(segment.metrics.rejected for segment in self.segments.values()),
+                "expirations": sum(segment.metrics.expirations for segment in self.segments.values()),
+                "scheduled_expiries": len(self.wheel),
+                "namespaces": {
+                    namespace: {
+                        "size": len(segment.cache),
+                        "policy": segment.policy_name.value,
+                        "max_bytes": segment.max_bytes,
+                        "memory_usage": segment.metrics.memory_usage,
+                        "hit_ratio": segment.metrics.hit_ratio,
+                        "evictions": segment.metrics.evictions,
+                        "rejected": segment.metrics.rejected,
+                        "expirations": segment.metrics.expirations,
+                        **segment.policy.get_stats()
+                    }
+                    for namespace, segment in self.segments.items()
+                }
+            }
+    
+    def _forget(self, keys: List[str]):
+        for key in keys:
+            self.namespaces.pop(key, None)
+            self.wheel.cancel(key)
+
 class DistributedCacheManager:
     """
     ⚡ DISTRIBUTED CACHE MANAGEMENT SYSTEM
@@ -197,7 +467,9 @@ class DistributedCacheManager:
         self.config = config
         
         # Cache layers
-        self.l1_cache = LRUCache(max_size=10000)  # In-memory cache
+        self.l1_cache = L1Cache(  # In-memory cache, byte-budgeted per strategy
+            default_max_bytes=config.PERFORMANCE.L1_CACHE_DEFAULT_MB * 1024 * 1024
+        )
         self.redis_client: Optional[Redis] = None
         
         # Cache strategies
@@ -251,7 +523,8 @@ class DistributedCacheManager:
         
         redis_url = self.config.get_redis_url()
         
-        self.redis_client = redis.from_url(
+        self.redis_client = pool_telemetry.redis_client(
+            "cache_redis",
             redis_url,
             decode_responses=False,  # We'll handle encoding ourselves
             max_connections=20,
@@ -274,37 +547,55 @@ class DistributedCacheManager:
                 "compress": True,
                 "encrypt": False,
                 "prefetch": True,
-                "eviction_policy": EvictionPolicy.LRU
+                "eviction_policy": EvictionPolicy.W_TINYLFU,
+                "l1_max_mb": 48
             },
             "user_sessions": {
                 "ttl": 1800,  # 30 minutes
                 "compress": False,
                 "encrypt": True,
                 "prefetch": False,
-                "eviction_policy": EvictionPolicy.TTL
+                "eviction_policy": EvictionPolicy.TTL,
+                "l1_max_mb": 4
             },
             "ai_responses": {
                 "ttl": 7200,  # 2 hours
                 "compress": True,
                 "encrypt": False,
                 "prefetch": False,
-                "eviction_policy": EvictionPolicy.LFU
+                "eviction_policy": EvictionPolicy.LFU,
+                "l1_max_mb": 24
             },
             "analytics": {
                 "ttl": 300,  # 5 minutes
                 "compress": True,
                 "encrypt": False,
                 "prefetch": True,
-                "eviction_policy": EvictionPolicy.TTL
+                "eviction_policy": EvictionPolicy.TTL,
+                "l1_max_mb": 4
             },
             "search_results": {
                 "ttl": 1800,  # 30 minutes
                 "compress": True,
                 "encrypt": False,
                 "prefetch": False,
-                "eviction_policy": EvictionPolicy.LRU
+                "eviction_policy": EvictionPolicy.LRU,
+                "l1_max_mb": 12
             }
         }
+        
+        # Per-namespace L1 budgets and policies, overridable through
+        # L1_CACHE_BUDGETS_MB and L1_CACHE_POLICIES
+        budgets = self.config.PERFORMANCE.L1_CACHE_BUDGETS_MB
+        policies = self.config.PERFORMANCE.L1_CACHE_POLICIES
+        for name, cache_strategy in self.cache_strategies.items():
+            cache_strategy["l1_max_mb"] = budgets.get(name, cache_strategy["l1_max_mb"])
+            if name in policies:
+                cache_strategy["eviction_policy"] = EvictionPolicy(policies[name])
+            self.l1_cache.configure(
+                name, cache_strategy["l1_max_mb"] * 1024 * 1024, cache_strategy["eviction_policy"]
+            )
+        self.l1_cache.configure(DEFAULT_NAMESPACE, self.l1_cache.default_max_bytes)
     
     # ==================== MAIN CACHE API ====================
     
@@ -321,10 +612,12 @@ class DistributedCacheManager:
                 return value
             
             # Try L2 cache (Redis)
-            value = await self._get_from_redis(key)
+            value, size_bytes, ttl = await self._get_from_redis(key)
             if value is not None:
-                # Promote to L1 cache
-                self.l1_cache.set(key, value)
+                # Promote to L1 cache, charged the size of the Redis payload
+                # and expiring when the Redis key does
+                namespace, _ = self._resolve_strategy(key, None)
+                self._record_evictions(self.l1_cache.set(key, value, size_bytes, namespace, ttl=ttl))
                 self._record_cache_event(CacheEvent.HIT, key, CacheLevel.L2_REDIS)
                 return value
             
@@ -355,19 +648,22 @@ class DistributedCacheManager:
         
         try:
             # Get cache strategy
-            cache_strategy = self._get_cache_strategy(key, strategy)
+            namespace, cache_strategy = self._resolve_strategy(key, strategy)
             
-            # Process value (compression, encryption)
-            processed_value = await self._process_value_for_storage(value, cache_strategy)
+            # Serialize once (compression, encryption); the payload's length
+            # is what the L1 entry is charged
+            payload = await self._process_value_for_storage(value, cache_strategy)
             
             # Set TTL
             ttl = expire or cache_strategy.get("ttl", 3600)
             
             # Set in L1 cache
-            self.l1_cache.set(key, value, ttl=ttl, tags=tags)
+            self._record_evictions(
+                self.l1_cache.set(key, value, len(payload), namespace, ttl=ttl, tags=tags)
+            )
             
             # Set in L2 cache (Redis)
-            await self._set_in_redis(key, processed_value, ttl)
+            await self._set_in_redis(key, payload, ttl)
             
             # Schedule prefetching if enabled
             if cache_strategy.get("prefetch", False):
@@ -401,7 +697,7 @@ class DistributedCacheManager:
             keys_to_invalidate = set()
             
             # Check L1 cache
-            for key, entry in self.l1_cache.cache.items():
+            for key, entry in self.l1_cache.entries():
                 if tags.intersection(entry.tags):
                     keys_to_invalidate.add(key)
             
@@ -436,64 +732,66 @@ class DistributedCacheManager:
     
     # ==================== REDIS OPERATIONS ====================
     
-    async def _get_from_redis(self, key: str) -> Any:
-        """Get value from Redis with decompression/decryption"""
+    async def _get_from_redis(self, key: str) -> Tuple[Any, int, Optional[float]]:
+        """Get value, payload size and remaining TTL from Redis with decompression/decryption"""
         
         try:
-            raw_data = await self.redis_client.get(key)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.pttl(key)
+                raw_data, ttl_ms = await pipe.execute()
             if raw_data is None:
-                return None
+                return None, 0, None
             
             # Deserialize
             data = pickle.loads(raw_data)
             
-            # Decompress if needed
+            # Decompress if needed; entries written before values were
+            # pickled up front hold the value itself
+            value = data["value"]
             if data.get("compressed", False):
-                value = zlib.decompress(data["value"])
+                value = zlib.decompress(value)
+            if data.get("compressed", False) or data.get("pickled", False):
                 value = pickle.loads(value)
-            else:
-                value = data["value"]
             
             # Decrypt if needed
             if data.get("encrypted", False):
                 # Would decrypt here in production
                 pass
             
-            return value
+            return value, len(raw_data), ttl_ms / 1000 if ttl_ms > 0 else None
             
         except Exception as e:
             logger.warning("Redis get error", key=key, error=str(e))
-            return None
+            return None, 0, None
     
-    async def _set_in_redis(self, key: str, value: Dict[str, Any], ttl: int):
-        """Set value in Redis with compression/encryption"""
+    async def _set_in_redis(self, key: str, payload: bytes, ttl: int):
+        """Set a serialized payload in Redis"""
         
         try:
-            # Serialize
-            serialized_data = pickle.dumps(value)
-            
             # Set with expiration
-            await self.redis_client.setex(key, ttl, serialized_data)
+            await self.redis_client.setex(key, ttl, payload)
             
         except Exception as e:
             logger.warning("Redis set error", key=key, error=str(e))
     
     # ==================== VALUE PROCESSING ====================
     
-    async def _process_value_for_storage(self, value: Any, strategy: Dict[str, Any]) -> Dict[str, Any]:
-        """Process value for storage (compression, encryption)"""
+    async def _process_value_for_storage(self, value: Any, strategy: Dict[str, Any]) -> bytes:
+        """Serialize value for storage (compression, encryption) into the Redis payload"""
         
+        serialized = pickle.dumps(value)
         processed = {
-            "value": value,
+            "value": serialized,
+            "pickled": True,
             "compressed": False,
             "encrypted": False,
             "created_at": datetime.now().isoformat()
         }
         
         # Compress if enabled and value is large enough
-        if strategy.get("compress", False) and self._should_compress(value):
+        if strategy.get("compress", False) and len(serialized) > self.compression_threshold:
             try:
-                serialized = pickle.dumps(value)
                 compressed = zlib.compress(serialized)
                 
                 # Only use compression if it actually reduces size
@@ -512,30 +810,21 @@ class DistributedCacheManager:
             except Exception as e:
                 logger.warning("Encryption failed", error=str(e))
         
-        return processed
+        return pickle.dumps(processed)
     
-    def _should_compress(self, value: Any) -> bool:
-        """Determine if value should be compressed"""
-        
-        try:
-            size = len(str(value).encode('utf-8'))
-            return size > self.compression_threshold
-        except:
-            return False
-    
-    def _get_cache_strategy(self, key: str, strategy_name: Optional[str]) -> Dict[str, Any]:
-        """Get cache strategy for key"""
+    def _resolve_strategy(self, key: str, strategy_name: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+        """Get cache strategy for key and the L1 namespace it is budgeted under"""
         
         if strategy_name and strategy_name in self.cache_strategies:
-            return self.cache_strategies[strategy_name]
+            return strategy_name, self.cache_strategies[strategy_name]
         
         # Determine strategy from key pattern
         for pattern, strategy in self.cache_strategies.items():
             if pattern in key:
-                return strategy
+                return pattern, strategy
         
         # Default strategy
-        return {
+        return DEFAULT_NAMESPACE, {
             "ttl": 3600,
             "compress": True,
             "encrypt": False,
@@ -543,6 +832,11 @@ class DistributedCacheManager:
             "eviction_policy": EvictionPolicy.LRU
         }
     
+    def _record_evictions(self, keys: List[str]):
+        """Count L1 evictions made to stay within a namespace's budget"""
+        
+        self.global_metrics.evictions += len(keys)
+    
     # ==================== PREFETCHING ====================
     
     async def _schedule_prefetch(self, key: str, tags: Set[str]):
@@ -682,12 +976,7 @@ class DistributedCacheManager:
         global_hit_ratio = self.global_metrics.hits / max(1, total_requests)
         
         # L1 cache stats
-        l1_stats = {
-            "size": len(self.l1_cache.cache),
-            "max_size": self.l1_cache.max_size,
-            "memory_usage": self.l1_cache.metrics.memory_usage,
-            "hit_ratio": self.l1_cache.metrics.hit_ratio
-        }
+        l1_stats = self.l1_cache.get_stats()
         
         # Redis stats
         redis_info = await self.redis_client.info() if self.redis_client else {}
@@ -703,6 +992,7 @@ class DistributedCacheManager:
                 "total_hits": self.global_metrics.hits,
                 "total_misses": self.global_metrics.misses,
                 "total_evictions": self.global_metrics.evictions,
+                "memory_usage": l1_stats["memory_usage"],
                 "avg_access_time": self.global_metrics.avg_access_time
             },
             "l1_cache": l1_stats,
@@ -742,9 +1032,6 @@ class DistributedCacheManager:
                 # Clean expired entries
                 await self._clean_expired_entries()
                 
-                # Optimize memory usage
-                await self._optimize_memory_usage()
-                
                 # Update cache statistics
                 await self._update_cache_statistics()
                 
@@ -755,36 +1042,18 @@ class DistributedCacheManager:
                 await asyncio.sleep(300)  # Wait 5 minutes before retrying
     
     async def _clean_expired_entries(self):
-        """Clean expired cache entries"""
+        """Clean expired cache entries
         
-        now = datetime.now()
-        expired_keys = []
+        Reads already refuse expired entries; this reclaims their memory.
+        The timing wheel yields only the keys that are due, so the sweep
+        costs the number of expirations, not the size of the cache.
+        """
         
-        # Check L1 cache for expired entries
-        for key, entry in self.l1_cache.cache.items():
-            if entry.ttl and (now - entry.created_at).seconds > entry.ttl:
-                expired_keys.append(key)
-        
-        # Remove expired keys
-        for key in expired_keys:
-            self.l1_cache.delete(key)
+        expired_keys = self.l1_cache.expire()
         
         if expired_keys:
             logger.debug("Cleaned expired cache entries", count=len(expired_keys))
     
-    async def _optimize_memory_usage(self):
-        """Optimize cache memory usage"""
-        
-        # Check L1 cache memory usage
-        if self.l1_cache.metrics.memory_usage > 100 * 1024 * 1024:  # 100MB
-            # Force eviction of 10% of entries
-            entries_to_evict = len(self.l1_cache.cache) // 10
-            
-            for _ in range(entries_to_evict):
-                self.l1_cache._evict_lru()
-            
-            logger.info("Optimized L1 cache memory usage", evicted=entries_to_evict)
-    
     async def _update_cache_statistics(self):
         """Update cache statistics"""
         
@@ -792,7 +1061,7 @@ class DistributedCacheManager:
         self.global_metrics.last_updated = datetime.now()
         
         # Calculate memory usage
-        self.global_metrics.memory_usage = self.l1_cache.metrics.memory_usage
+        self.global_metrics.memory_usage = self.l1_cache.memory_usage
         
         # Update hit ratio
         total_requests = self.global_metrics.hits + self.global_metrics.misses
@@ -836,7 +1105,7 @@ class DistributedCacheManager:
     async def health_check(self) -> Dict[str, Any]:
         """Cache system health check"""
         
-        l1_healthy = len(self.l1_cache.cache) >= 0
+        l1_healthy = self.l1_cache.memory_usage <= self.l1_cache.max_bytes
         l2_healthy = False
         
         try:
@@ -864,7 +1133,7 @@ class DistributedCacheManager:
         
         # Close Redis connection
         if self.redis_client:
-            await self.redis_client.close()
+            await pool_telemetry.close_redis(self.redis_client)
         
         # Clear L1 cache
         self.l1_cache.clear()
@@ -0,0 +1,390 @@
+"""
+🧠 CACHE ADMISSION AND EVICTION POLICIES
+O5 Elite Level Hit Ratio Engineering
+
+This module implements the policies behind each L1 cache segment:
+- A common interface: the segment owns entries and bytes, a policy owns order
+- LRU and FIFO for recency- and insertion-ordered namespaces
+- O(1) LFU with frequency buckets and LRU tie-breaking
+- ARC, balancing recency and frequency with byte-weighted ghost lists
+- W-TinyLFU: a windowed LRU in front of a segmented main cache, admitting
+  by count-min sketch frequency so one-hit wonders cannot flush hot keys
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+
+MASK64 = (1 << 64) - 1
+
+# Odd 64-bit multipliers, one per sketch row
+SKETCH_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+
+# Counter value -> counter value halved, for resetting the sketch with translate()
+HALVE = bytes(value >> 1 for value in range(256))
+
+class CachePolicy(ABC):
+    """Residency order and eviction choice for one byte-budgeted segment
+
+    The segment calls record_access() on every lookup, on_hit() when the
+    key is resident, on_insert() when a key is added and on_remove() when
+    one is deleted or replaced. While the segment is over budget it calls
+    evict() and drops the key returned, which may be the key just
+    inserted when the policy declines to admit it.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+
+    def record_access(self, key: str):
+        """Note a lookup of key, resident or not"""
+
+    @abstractmethod
+    def on_hit(self, key: str):
+        """A resident key was read"""
+
+    @abstractmethod
+    def on_insert(self, key: str, size_bytes: int):
+        """A key became resident"""
+
+    @abstractmethod
+    def on_remove(self, key: str):
+        """A resident key was deleted or is being replaced"""
+
+    @abstractmethod
+    def evict(self) -> Optional[str]:
+        """Choose and forget a resident key to drop, or None when empty"""
+
+    def resize(self, max_bytes: int):
+        """Change the budget the policy sizes its regions against"""
+
+        self.max_bytes = max_bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {}
+
+class LRUPolicy(CachePolicy):
+    """Evict the least recently used key"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes)
+        self.order: OrderedDict[str, None] = OrderedDict()
+
+    def on_hit(self, key: str):
+        self.order.move_to_end(key)
+
+    def on_insert(self, key: str, size_bytes: int):
+        self.order[key] = None
+
+    def on_remove(self, key: str):
+        self.order.pop(key, None)
+
+    def evict(self) -> Optional[str]:
+        return self.order.popitem(last=False)[0] if self.order else None
+
+class FIFOPolicy(LRUPolicy):
+    """Evict the earliest inserted key; reads do not reorder"""
+
+    def on_hit(self, key: str):
+        pass
+
+class LFUPolicy(CachePolicy):
+    """Evict the least frequently read key, least recently used among ties
+
+    Keys sit in one bucket per access count, so every operation is O(1)
+    except removing the last key of the lowest bucket out of turn.
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes)
+        self.frequencies: Dict[str, int] = {}
+        self.buckets: Dict[int, OrderedDict[str, None]] = {}
+        self.min_frequency = 0
+
+    def on_hit(self, key: str):
+        frequency = self.frequencies[key]
+        self._unlink(key, frequency)
+        if self.min_frequency == frequency and frequency not in self.buckets:
+            self.min_frequency = frequency + 1
+
+        self.frequencies[key] = frequency + 1
+        self.buckets.setdefault(frequency + 1, OrderedDict())[key] = None
+
+    def on_insert(self, key: str, size_bytes: int):
+        self.frequencies[key] = 1
+        self.buckets.setdefault(1, OrderedDict())[key] = None
+        self.min_frequency = 1
+
+    def on_remove(self, key: str):
+        frequency = self.frequencies.pop(key, None)
+        if frequency is not None:
+            self._unlink(key, frequency)
+            if self.min_frequency == frequency and frequency not in self.buckets:
+                self.min_frequency = min(self.buckets, default=0)
+
+    def evict(self) -> Optional[str]:
+        if not self.frequencies:
+            return None
+
+        key = next(iter(self.buckets[self.min_frequency]))
+        self.on_remove(key)
+        return key
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"min_frequency": self.min_frequency, "buckets": len(self.buckets)}
+
+    def _unlink(self, key: str, frequency: int):
+        bucket = self.buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[frequency]
+
+class ARCPolicy(CachePolicy):
+    """Adaptive Replacement Cache, weighted by entry size
+
+    T1 holds keys read once since they became resident, T2 keys read
+    again. B1 and B2 remember keys recently evicted from each. A miss on
+    a B1 key means T1 was too small, so its target share p grows; a miss
+    on a B2 key shrinks it. Shares and ghosts are measured in bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes)
+        self.t1: OrderedDict[str, int] = OrderedDict()
+        self.t2: OrderedDict[str, int] = OrderedDict()
+        self.b1: OrderedDict[str, int] = OrderedDict()
+        self.b2: OrderedDict[str, int] = OrderedDict()
+        self.t1_bytes = self.t2_bytes = self.b1_bytes = self.b2_bytes = 0
+        self.target_t1_bytes = 0.0
+
+    def on_hit(self, key: str):
+        if key in self.t1:
+            size_bytes = self.t1.pop(key)
+            self.t1_bytes -= size_bytes
+            self.t2[key] = size_bytes
+            self.t2_bytes += size_bytes
+        else:
+            self.t2.move_to_end(key)
+
+    def on_insert(self, key: str, size_bytes: int):
+        if key in self.b1:
+            self.target_t1_bytes = min(
+                self.max_bytes, self.target_t1_bytes + size_bytes * max(1.0, self.b2_bytes / self.b1_bytes)
+            )
+            self.b1_bytes -= self.b1.pop(key)
+            self.t2[key] = size_bytes
+            self.t2_bytes += size_bytes
+        elif key in self.b2:
+            self.target_t1_bytes = max(
+                0.0, self.target_t1_bytes - size_bytes * max(1.0, self.b1_bytes / self.b2_bytes)
+            )
+            self.b2_bytes -= self.b2.pop(key)
+            self.t2[key] = size_bytes
+            self.t2_bytes += size_bytes
+        else:
+            self.t1[key] = size_bytes
+            self.t1_bytes += size_bytes
+
+    def on_remove(self, key: str):
+        if key in self.t1:
+            self.t1_bytes -= self.t1.pop(key)
+        elif key in self.t2:
+            self.t2_bytes -= self.t2.pop(key)
+
+    def evict(self) -> Optional[str]:
+        if self.t1 and (self.t1_bytes > self.target_t1_bytes or not self.t2):
+            key, size_bytes = self.t1.popitem(last=False)
+            self.t1_bytes -= size_bytes
+            self.b1[key] = size_bytes
+            self.b1_bytes += size_bytes
+        elif self.t2:
+            key, size_bytes = self.t2.popitem(last=False)
+            self.t2_bytes -= size_bytes
+            self.b2[key] = size_bytes
+            self.b2_bytes += size_bytes
+        else:
+            return None
+
+        self._trim_ghosts()
+        return key
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "target_t1_bytes": int(self.target_t1_bytes),
+            "t1_bytes": self.t1_bytes,
+            "t2_bytes": self.t2_bytes,
+            "ghost_bytes": self.b1_bytes + self.b2_bytes
+        }
+
+    def _trim_ghosts(self):
+        """Keep T1 + B1 within the budget and everything within twice it"""
+
+        while self.b1 and self.t1_bytes + self.b1_bytes > self.max_bytes:
+            self.b1_bytes -= self.b1.popitem(last=False)[1]
+        while self.b2 and self.t1_bytes + self.t2_bytes + self.b1_bytes + self.b2_bytes > 2 * self.max_bytes:
+            self.b2_bytes -= self.b2.popitem(last=False)[1]
+
+class CountMinSketch:
+    """Approximate access counts in depth rows of saturating 4-bit counters
+
+    Increments are conservative: only the rows holding the current minimum
+    grow, which keeps estimates tighter. After sample_factor * width
+    increments every counter is halved, so popularity fades with age.
+    """
+
+    def __init__(self, width: int, depth: int = 4, sample_factor: int = 10):
+        self.bits = max(4, (width - 1).bit_length())
+        self.width = 1 << self.bits
+        self.depth = min(depth, len(SKETCH_SEEDS))
+        self.table = bytearray(self.width * self.depth)
+        self.shift = 64 - self.bits
+        self.rows = [(row * self.width, SKETCH_SEEDS[row]) for row in range(self.depth)]
+        self.sample_size = sample_factor * self.width
+        self.additions = 0
+        self.resets = 0
+
+    def increment(self, key: str):
+        indexes = self._indexes(key)
+        table = self.table
+        current = min([table[index] for index in indexes])
+        if current >= 15:
+            return
+
+        for index in indexes:
+            if table[index] == current:
+                table[index] = current + 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.table = table.translate(HALVE)
+            self.additions //= 2
+            self.resets += 1
+
+    def estimate(self, key: str) -> int:
+        table = self.table
+        return min([table[index] for index in self._indexes(key)])
+
+    def _indexes(self, key: str) -> List[int]:
+        hashed = hash(key) & MASK64
+        return [
+            offset + (((hashed * seed) & MASK64) >> self.shift)
+            for offset, seed in self.rows
+        ]
+
+class WTinyLFUPolicy(CachePolicy):
+    """Window TinyLFU: recency for new keys, frequency for admission
+
+    New keys enter a small LRU window (window_ratio of the budget). Keys
+    leaving the window become candidates for the main cache, a segmented
+    LRU of probation and protected (protected_ratio of main) regions.
+    When space is needed a candidate is kept only if the sketch says it
+    has been requested more often than the probation LRU key it would
+    displace, so a scan's one-hit keys drain out through the window.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        window_ratio: float = 0.01,
+        protected_ratio: float = 0.8,
+        sketch_width: Optional[int] = None,
+        expected_entry_bytes: int = 1024
+    ):
+        super().__init__(max_bytes)
+        self.window_ratio = window_ratio
+        self.protected_ratio = protected_ratio
+        self.sketch = CountMinSketch(
+            sketch_width or min(max(max_bytes // expected_entry_bytes, 1024), 1 << 20)
+        )
+
+        self.window: OrderedDict[str, int] = OrderedDict()
+        self.probation: OrderedDict[str, int] = OrderedDict()
+        self.protected: OrderedDict[str, int] = OrderedDict()
+        self.candidates: OrderedDict[str, None] = OrderedDict()
+        self.window_bytes = self.probation_bytes = self.protected_bytes = 0
+        self.resize(max_bytes)
+
+        self.stats = {"admitted": 0, "rejected": 0}
+
+    def resize(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.window_max_bytes = max(1, int(max_bytes * self.window_ratio))
+        self.protected_max_bytes = int((max_bytes - self.window_max_bytes) * self.protected_ratio)
+
+    def record_access(self, key: str):
+        self.sketch.increment(key)
+
+    def on_hit(self, key: str):
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.probation:
+            size_bytes = self.probation.pop(key)
+            self.probation_bytes -= size_bytes
+            self.candidates.pop(key, None)
+            self.protected[key] = size_bytes
+            self.protected_bytes += size_bytes
+
+            # Demote the protected LRU keys back to probation
+            while self.protected_bytes > self.protected_max_bytes and len(self.protected) > 1:
+                demoted, demoted_bytes = self.protected.popitem(last=False)
+                self.protected_bytes -= demoted_bytes
+                self.probation[demoted] = demoted_bytes
+                self.probation_bytes += demoted_bytes
+        else:
+            self.protected.move_to_end(key)
+
+    def on_insert(self, key: str, size_bytes: int):
+        self.window[key] = size_bytes
+        self.window_bytes += size_bytes
+
+        while self.window_bytes > self.window_max_bytes and self.window:
+            candidate, candidate_bytes = self.window.popitem(last=False)
+            self.window_bytes -= candidate_bytes
+            self.probation[candidate] = candidate_bytes
+            self.probation_bytes += candidate_bytes
+            self.candidates[candidate] = None
+
+    def on_remove(self, key: str):
+        if key in self.window:
+            self.window_bytes -= self.window.pop(key)
+        elif key in self.probation:
+            self.probation_bytes -= self.probation.pop(key)
+            self.candidates.pop(key, None)
+        elif key in self.protected:
+            self.protected_bytes -= self.protected.pop(key)
+
+    def evict(self) -> Optional[str]:
+        while self.candidates:
+            candidate = next(iter(self.candidates))
+            del self.candidates[candidate]
+
+            victim = next(iter(self.probation), None)
+            if victim == candidate:
+                victim = next(iter(self.protected), None)
+            if victim is None:
+                break
+
+            if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+                self.stats["admitted"] += 1
+                self.on_remove(victim)
+                return victim
+
+            self.stats["rejected"] += 1
+            self.on_remove(candidate)
+            return candidate
+
+        for region in (self.probation, self.protected, self.window):
+            if region:
+                key = next(iter(region))
+                self.on_remove(key)
+                return key
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "window_bytes": self.window_bytes,
+            "probation_bytes": self.probation_bytes,
+            "protected_bytes": self.protected_bytes,
+            "sketch_resets": self.sketch.resets
+        }
@@ -14,21 +14,25 @@ This module implements enterprise-grade data management with:
 """
 
 import asyncio
+import heapq
 import json
 import time
 import uuid
-from typing import Dict, List, Any, Optional, Union, Tuple
+import zlib
+from typing import Dict, List, Any, Optional, Union, Tuple, Iterable, Callable, Awaitable
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime, timedelta
 import logging
 import structlog
+import orjson
 
 # Database imports
 import asyncpg
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy import select, insert, update, delete, text, func
 from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
 import redis.asyncio as redis
 
 # Vector database
@@ -38,49 +42,51 @@ from sentence_transformers import SentenceTransformer
 # Core system imports
 from pydantic import BaseModel, Field
 from config.enterprise_config import EnterpriseConfig
+from core.latency import QueryLatencyRecorder
+from core.storage_backend import (
+    StorageBackend, StorageTier, DataStatus, QueryMetrics, Note, NoteEvent, NoteChange,
+    NoteEventHandler, note_to_dict, serialize_note, flatten_performance_data
+)
+from core.outbox import OutboxRelay, OUTBOX_INSERT, outbox_values
+from core.migrations import SchemaMigrator
+from core.wikilinks import NoteLinkIndex, ordered_targets
+from core.autocomplete import TitleAutocomplete
+from core.body_codec import BodyCodec, UnknownDictionaryError
+from core.pg_fast_path import PreparedNoteQueries, asyncpg_dsn
+from core.pool_telemetry import InstrumentedAsyncPool, pool_telemetry
+from core.single_flight import SingleFlight
+from core.sharding import ShardRouter, tenant_key
+from core.partitions import PartitionManager, PartitionSpec, PartitionInterval
+from core.object_store import create_object_store, pack_blob, unpack_blob
+from core.backup import create_backup_engine
+from core.write_buffer import WriteBehindBuffer, OverflowPolicy
+from core.versioning import (
+    VersionDelta, VersionKind, VersionRecord, DiffGranularity, diff_texts, row_to_version_record,
+    CURRENT_CHANGE_TYPE
+)
 
 logger = structlog.get_logger(__name__)
 
-class StorageTier(Enum):
-    """Data storage tiers"""
-    HOT = "hot"          # Frequently accessed data (Redis)
-    WARM = "warm"        # Regular access data (PostgreSQL)
-    COLD = "cold"        # Archived data (S3/Object Storage)
-    VECTOR = "vector"    # Vector embeddings (Pinecone/Weaviate)
+# SQLSTATE of lock_timeout expiry
+LOCK_NOT_AVAILABLE = "55P03"
 
-class DataStatus(Enum):
-    """Data record status"""
-    ACTIVE = "active"
-    ARCHIVED = "archived"
-    DELETED = "deleted"
-    PENDING = "pending"
-
-@dataclass
-class QueryMetrics:
-    """Query performance metrics"""
-    query_time: float = 0.0
-    rows_returned: int = 0
-    cache_hit: bool = False
-    storage_tier: StorageTier = StorageTier.WARM
-    timestamp: datetime = field(default_factory=datetime.now)
+def _is_connection_error(error: Exception) -> bool:
+    """True when a failed query lost or never got its connection"""
+    
+    if isinstance(error, (OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError)):
+        return True
+    if isinstance(error, DBAPIError):
+        return error.connection_invalidated or isinstance(error, (InterfaceError, OperationalError))
+    return False
 
-@dataclass
-class Note:
-    """Note data model"""
-    id: str
-    title: str
-    body: str
-    tags: List[str] = field(default_factory=list)
-    links: List[str] = field(default_factory=list)
-    color: str = "#6B7280"
-    user_id: str = ""
-    workspace_id: Optional[str] = None
-    status: DataStatus = DataStatus.ACTIVE
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
-    version: int = 1
-    encrypted: bool = False
-    embedding: Optional[List[float]] = None
+def _is_lock_timeout(error: DBAPIError) -> bool:
+    """True when a statement gave up waiting for a lock (SQLSTATE 55P03)"""
+    
+    orig = error.orig
+    for candidate in (orig, getattr(orig, "__cause__", None)):
+        if getattr(candidate, "sqlstate", None) == LOCK_NOT_AVAILABLE:
+            return True
+    return False
 
 class VectorStore:
     """Vector storage and similarity search"""
@@ -178,7 +184,7 @@ class VectorStore:
         self.vectors.pop(doc_id, None)
         self.metadata.pop(doc_id, None)
 
-class EnterpriseDataManager:
+class EnterpriseDataManager(StorageBackend):
     """
     🗄️ ENTERPRISE DATA MANAGEMENT SYSTEM
     
@@ -191,24 +197,139 @@ class EnterpriseDataManager:
         
         # Database connections
         self.postgres_engine = None
+        self.partition_manager: Optional[PartitionManager] = None
+        self.shard_router: Optional[ShardRouter] = None
         self.postgres_session = None
         self.redis_client = None
+        self.redis_raw_client = None
+        
+        # Read replicas with read-your-writes stickiness after a user writes
+        self.replica_engines: List[Any] = []
+        self.replica_sessions: List[async_sessionmaker] = []
+        self.replica_healthy: List[bool] = []
+        self.replica_lag_seconds: List[Optional[float]] = []
+        self._replica_cursor = 0
+        self.replica_probe_interval = config.DATABASE.REPLICA_PROBE_INTERVAL_SECONDS
+        self.replica_max_lag = config.DATABASE.REPLICA_MAX_LAG_MS / 1000
+        
+        # Optional asyncpg fast path for the hottest note queries
+        self.fast_queries: Optional[PreparedNoteQueries] = None
+        self.replica_fast_queries: List[PreparedNoteQueries] = []
+        self.read_your_writes_window = config.DATABASE.READ_YOUR_WRITES_WINDOW_MS / 1000
+        self._recent_writers: Dict[str, float] = {}
+        self.read_routing_stats = {
+            "replica": 0,
+            "primary": 0,
+            "sticky": 0,
+            "fallback": 0
+        }
         
         # Vector storage
         self.vector_store = VectorStore(config)
         
         # Performance tracking
-        self.query_metrics: List[QueryMetrics] = []
+        self.query_metrics = QueryLatencyRecorder(window_seconds=300, slices=5)
         self.cache_stats = {
             "hits": 0,
             "misses": 0,
             "evictions": 0
         }
         
+        # Write-behind buffer for analytics_events inserts
+        self.analytics_buffer = WriteBehindBuffer(
+            "analytics_events",
+            self._insert_analytics_events,
+            max_batch=config.ANALYTICS_FLUSH_ROWS,
+            flush_interval_ms=config.ANALYTICS_FLUSH_INTERVAL_MS,
+            max_buffered=config.ANALYTICS_BUFFER_MAX_ROWS,
+            overflow_policy=OverflowPolicy(config.ANALYTICS_OVERFLOW_POLICY),
+            spill_dir=config.ANALYTICS_SPILL_DIR
+        )
+        
         # Data lifecycle management
         self.hot_data_ttl = 3600  # 1 hour
         self.warm_data_retention = timedelta(days=365)  # 1 year
-        self.cold_data_threshold = timedelta(days=90)  # 90 days
+        self.cold_data_threshold = timedelta(days=config.COLD_DATA_THRESHOLD_DAYS)
+        
+        # Cold tier object storage
+        self.object_store = create_object_store(config)
+        self.archive_batch_size = 100
+        self.archive_stats = {
+            "archived": 0,
+            "rehydrated": 0,
+            "blobs_deleted": 0
+        }
+        
+        # Purge of soft-deleted notes past retention
+        self.deleted_retention = timedelta(days=config.DELETED_RETENTION_DAYS)
+        self.purge_batch_size = max(1, config.PURGE_BATCH_SIZE)
+        self.purge_base_delay = config.PURGE_BATCH_DELAY_MS / 1000
+        self.purge_max_delay = max(self.purge_base_delay, config.PURGE_MAX_DELAY_MS / 1000)
+        self.purge_lock_timeout_ms = config.PURGE_LOCK_TIMEOUT_MS
+        self.purge_slow_statement = 1.0  # Seconds; slower statements back off the pause
+        self.purge_max_retries = 5
+        self.purge_delay = self.purge_base_delay
+        self.purge_stats = {
+            "notes": 0,
+            "versions": 0,
+            "links": 0,
+            "backoffs": 0,
+            "last_run": None
+        }
+        
+        # [[Wikilink]] resolution and note_links maintenance
+        self.link_index = NoteLinkIndex()
+        
+        # In-process title indexes for [[ completion, fed by a Redis stream
+        self.autocomplete = TitleAutocomplete(
+            self._load_title_rows,
+            max_tenants=config.AUTOCOMPLETE_MAX_TENANTS,
+            max_age=config.AUTOCOMPLETE_MAX_AGE_SECONDS
+        )
+        self.workspace_access: Dict[Tuple[str, str], Tuple[bool, float]] = {}
+        self.workspace_access_ttl = 60.0
+        
+        # zstd compression of large bodies in PostgreSQL and Redis
+        self.body_codec = BodyCodec(
+            enabled=config.BODY_COMPRESSION_ENABLED,
+            threshold=config.BODY_COMPRESSION_THRESHOLD,
+            level=config.BODY_COMPRESSION_LEVEL,
+            dictionary_max_bytes=config.BODY_DICTIONARY_MAX_BYTES
+        )
+        self.body_dictionary_size = config.BODY_DICTIONARY_SIZE
+        self.body_dictionary_samples = 5000
+        self.body_dictionary_min_samples = 500
+        
+        # Versioned schema, applied by _create_database_schema
+        self.schema_migrator: Optional[SchemaMigrator] = None
+        
+        # Incremental snapshot backups
+        self.backup_engine = create_backup_engine(config)
+        
+        # Version history: full snapshot every N versions, deltas in between
+        self.version_snapshot_interval = max(1, config.VERSION_SNAPSHOT_INTERVAL)
+        self.version_diff_ttl = 86400  # 24 hours, diffs are immutable
+        self.note_location_ttl = 2592000  # 30 days, rebuilt by scatter on a miss
+        
+        # Coalesce concurrent cache misses for the same key
+        self.single_flight = SingleFlight(
+            timeout=self.config.SINGLE_FLIGHT_TIMEOUT_MS / 1000,
+            lock_ttl_ms=self.config.SINGLE_FLIGHT_LOCK_TTL_MS
+        )
+        
+        # Note side effects are applied from the transactional outbox
+        self.outbox = OutboxRelay(
+            self._note_sessions,
+            workers=config.OUTBOX_WORKERS,
+            batch_size=config.OUTBOX_BATCH_SIZE,
+            poll_interval=config.OUTBOX_POLL_INTERVAL_MS / 1000,
+            lease_seconds=config.OUTBOX_LEASE_SECONDS,
+            max_attempts=config.OUTBOX_MAX_ATTEMPTS
+        )
+        self.outbox.register("cache", self._invalidate_note_caches)
+        self.outbox.register("vector", self._index_note_vector)
+        self.outbox.register("links", self._sync_note_links)
+        self.outbox.register("autocomplete", self._publish_note_title)
         
         self.initialized = False
     
@@ -230,10 +351,29 @@ class EnterpriseDataManager:
             # Create database schema
             await self._create_database_schema()
             
+            # Open note shards and the asyncpg fast path once the schema exists
+            await self._initialize_shards()
+            await self._initialize_fast_path()
+            
+            # Compressed bodies need every dictionary before the first read
+            await self._load_body_dictionaries(force=True)
+            asyncio.create_task(self.train_body_dictionary())
+            
+            # Start batched analytics writes
+            self.analytics_buffer.start()
+            
+            # Start delivering note side effects
+            self.outbox.start()
+            
+            # Compact legacy full-copy version history in the background
+            asyncio.create_task(self._run_exclusive("compact_version_history", self.compact_version_history))
+            
             # Start background tasks
             asyncio.create_task(self._data_lifecycle_manager())
             asyncio.create_task(self._performance_monitor())
             asyncio.create_task(self._backup_scheduler())
+            if self.replica_engines:
+                asyncio.create_task(self._replica_monitor())
             
             self.initialized = True
             logger.info("✅ Enterprise data management system initialized")
@@ -249,144 +389,359 @@ class EnterpriseDataManager:
         
         self.postgres_engine = create_async_engine(
             database_url,
+            poolclass=InstrumentedAsyncPool,
             pool_size=self.config.DATABASE.POSTGRES_MIN_CONNECTIONS,
             max_overflow=self.config.DATABASE.POSTGRES_MAX_CONNECTIONS - self.config.DATABASE.POSTGRES_MIN_CONNECTIONS,
             echo=False  # Set to True for SQL debugging
         )
+        pool_telemetry.instrument_engine("postgres", self.postgres_engine)
         
         self.postgres_session = async_sessionmaker(
             self.postgres_engine,
             expire_on_commit=False
         )
         
-        logger.info("✅ PostgreSQL connection initialized")
+        # Time partitioning for the append-only tables
+        self.partition_manager = PartitionManager(self.postgres_engine, [
+            PartitionSpec(
+                "analytics_events",
+                PartitionInterval(self.config.ANALYTICS_PARTITION_INTERVAL),
+                self.config.ANALYTICS_RETENTION_DAYS,
+                self.config.PARTITION_PREMAKE
+            ),
+            PartitionSpec(
+                "performance_metrics",
+                PartitionInterval(self.config.METRICS_PARTITION_INTERVAL),
+                self.config.ANALYTICS_RETENTION_DAYS,
+                self.config.PARTITION_PREMAKE
+            )
+        ])
+        
+        # Optional read replicas, each with its own pool
+        replica_max = self.config.DATABASE.POSTGRES_REPLICA_MAX_CONNECTIONS
+        replica_min = min(self.config.DATABASE.POSTGRES_MIN_CONNECTIONS, replica_max)
+        for replica_url in self.config.DATABASE.POSTGRES_REPLICA_DSNS:
+            engine = create_async_engine(
+                replica_url,
+                poolclass=InstrumentedAsyncPool,
+                pool_size=replica_min,
+                max_overflow=replica_max - replica_min,
+                pool_pre_ping=True,
+                echo=False
+            )
+            pool_telemetry.instrument_engine(f"postgres_replica_{len(self.replica_engines)}", engine)
+            self.replica_engines.append(engine)
+            self.replica_sessions.append(async_sessionmaker(engine, expire_on_commit=False))
+            self.replica_healthy.append(True)
+            self.replica_lag_seconds.append(None)
+        
+        logger.info("✅ PostgreSQL connection initialized", replicas=len(self.replica_engines))
+    
+    async def _initialize_shards(self):
+        """Initialize additional note shards when configured"""
+        
+        shard_dsns = self.config.DATABASE.POSTGRES_SHARD_DSNS
+        if not shard_dsns:
+            return
+        
+        self.shard_router = ShardRouter(
+            self.postgres_engine,
+            self.postgres_session,
+            shard_dsns,
+            pool_size=self.config.DATABASE.POSTGRES_MIN_CONNECTIONS,
+            max_overflow=self.config.DATABASE.POSTGRES_MAX_CONNECTIONS - self.config.DATABASE.POSTGRES_MIN_CONNECTIONS,
+            directory_ttl=self.config.DATABASE.SHARD_DIRECTORY_TTL_MS / 1000
+        )
+        await self.shard_router.initialize()
+    
+    async def _initialize_fast_path(self):
+        """Initialize the asyncpg fast path when selected for this deployment"""
+        
+        if self.config.DATABASE.DATA_ACCESS_BACKEND != "asyncpg":
+            return
+        
+        if self.shard_router:
+            # Prepared statements are bound to the primary pool only
+            logger.warning("asyncpg fast path is not available with note sharding, using SQLAlchemy")
+            return
+        
+        pool_min = self.config.DATABASE.POSTGRES_MIN_CONNECTIONS
+        self.fast_queries = PreparedNoteQueries(
+            asyncpg_dsn(self.config.get_database_url()),
+            min_size=pool_min,
+            max_size=self.config.DATABASE.POSTGRES_MAX_CONNECTIONS
+        )
+        await self.fast_queries.initialize()
+        self._register_asyncpg_pool("postgres_asyncpg", self.fast_queries)
+        
+        replica_max = self.config.DATABASE.POSTGRES_REPLICA_MAX_CONNECTIONS
+        for replica_url in self.config.DATABASE.POSTGRES_REPLICA_DSNS:
+            replica_queries = PreparedNoteQueries(
+                asyncpg_dsn(replica_url),
+                min_size=min(pool_min, replica_max),
+                max_size=replica_max
+            )
+            await replica_queries.initialize()
+            self._register_asyncpg_pool(f"postgres_asyncpg_replica_{len(self.replica_fast_queries)}", replica_queries)
+            self.replica_fast_queries.append(replica_queries)
+    
+    @staticmethod
+    def _register_asyncpg_pool(name: str, queries: PreparedNoteQueries):
+        """Report an asyncpg pool's gauges alongside the instrumented pools"""
+        
+        pool = queries.pool
+        pool_telemetry.register_gauges(name, "postgres", lambda: {
+            "checked_out": pool.get_size() - pool.get_idle_size(),
+            "idle": pool.get_idle_size(),
+            "overflow": 0,
+            "capacity": pool.get_max_size()
+        })
     
     async def _initialize_redis(self):
         """Initialize Redis connection"""
         
         redis_url = self.config.get_redis_url()
         
-        self.redis_client = redis.from_url(
+        self.redis_client = pool_telemetry.redis_client(
+            "redis",
             redis_url,
             decode_responses=True,
             max_connections=20
         )
         
+        # Binary client for pre-serialized note payloads
+        self.redis_raw_client = pool_telemetry.redis_client(
+            "redis_raw",
+            redis_url,
+            decode_responses=False,
+            max_connections=20
+        )
+        
         # Test connection
         await self.redis_client.ping()
         
+        if self.config.SINGLE_FLIGHT_DISTRIBUTED:
+            self.single_flight.redis_client = self.redis_raw_client
+        
+        self.autocomplete.redis_client = self.redis_client
+        
         logger.info("✅ Redis connection initialized")
     
     async def _create_database_schema(self):
-        """Create database tables and indexes"""
-        
-        # This would contain SQL for creating tables
-        schema_sql = """
-        -- Users table
-        CREATE TABLE IF NOT EXISTS users (
-            id VARCHAR(255) PRIMARY KEY,
-            email VARCHAR(255) UNIQUE NOT NULL,
-            username VARCHAR(255) UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            salt VARCHAR(255) NOT NULL,
-            security_level VARCHAR(50) DEFAULT 'restricted',
-            permissions TEXT[],
-            mfa_enabled BOOLEAN DEFAULT FALSE,
-            mfa_secret VARCHAR(255),
-            biometric_enabled BOOLEAN DEFAULT FALSE,
-            failed_login_attempts INTEGER DEFAULT 0,
-            last_login TIMESTAMP,
-            account_locked BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Notes table
-        CREATE TABLE IF NOT EXISTS notes (
-            id VARCHAR(255) PRIMARY KEY,
-            title TEXT NOT NULL,
-            body TEXT NOT NULL,
-            tags TEXT[],
-            links TEXT[],
-            color VARCHAR(7) DEFAULT '#6B7280',
-            user_id VARCHAR(255) REFERENCES users(id),
-            workspace_id VARCHAR(255),
-            status VARCHAR(50) DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            version INTEGER DEFAULT 1,
-            encrypted BOOLEAN DEFAULT FALSE
-        );
-        
-        -- Note versions table
-        CREATE TABLE IF NOT EXISTS note_versions (
-            id VARCHAR(255) PRIMARY KEY,
-            note_id VARCHAR(255) REFERENCES notes(id),
-            version INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            body TEXT NOT NULL,
-            changed_by VARCHAR(255) REFERENCES users(id),
-            change_type VARCHAR(50),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Workspaces table
-        CREATE TABLE IF NOT EXISTS workspaces (
-            id VARCHAR(255) PRIMARY KEY,
-            name VARCHAR(255) NOT NULL,
-            description TEXT,
-            owner_id VARCHAR(255) REFERENCES users(id),
-            settings JSONB,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Workspace members table
-        CREATE TABLE IF NOT EXISTS workspace_members (
-            workspace_id VARCHAR(255) REFERENCES workspaces(id),
-            user_id VARCHAR(255) REFERENCES users(id),
-            role VARCHAR(50) DEFAULT 'member',
-            permissions TEXT[],
-            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (workspace_id, user_id)
-        );
-        
-        -- Analytics events table
-        CREATE TABLE IF NOT EXISTS analytics_events (
-            id VARCHAR(255) PRIMARY KEY,
-            event_type VARCHAR(100) NOT NULL,
-            user_id VARCHAR(255) REFERENCES users(id),
-            session_id VARCHAR(255),
-            data JSONB,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Performance metrics table
-        CREATE TABLE IF NOT EXISTS performance_metrics (
-            id VARCHAR(255) PRIMARY KEY,
-            metric_type VARCHAR(100) NOT NULL,
-            value DOUBLE PRECISION NOT NULL,
-            dimensions JSONB,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Create indexes for performance
-        CREATE INDEX IF NOT EXISTS idx_notes_user_id ON notes(user_id);
-        CREATE INDEX IF NOT EXISTS idx_notes_workspace_id ON notes(workspace_id);
-        CREATE INDEX IF NOT EXISTS idx_notes_tags ON notes USING GIN(tags);
-        CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes(created_at);
-        CREATE INDEX IF NOT EXISTS idx_notes_updated_at ON notes(updated_at);
-        CREATE INDEX IF NOT EXISTS idx_note_versions_note_id ON note_versions(note_id);
-        CREATE INDEX IF NOT EXISTS idx_analytics_events_user_id ON analytics_events(user_id);
-        CREATE INDEX IF NOT EXISTS idx_analytics_events_timestamp ON analytics_events(timestamp);
-        CREATE INDEX IF NOT EXISTS idx_performance_metrics_type ON performance_metrics(metric_type);
-        CREATE INDEX IF NOT EXISTS idx_performance_metrics_timestamp ON performance_metrics(timestamp);
+        """Apply pending schema migrations (see migrations/primary)"""
+        
+        self.schema_migrator = SchemaMigrator(
+            self.postgres_engine,
+            "primary",
+            # Move pre-partitioning heaps aside before the parents are created
+            hooks={1: self.partition_manager.detach_legacy_tables}
+        )
+        applied = await self.schema_migrator.migrate()
+        
+        # Later partitions are created by the lifecycle manager
+        if applied:
+            await self.partition_manager.ensure_partitions()
+            logger.info("✅ Database schema migrated", applied=applied, version=self.schema_migrator.latest_version)
+    
+    # ==================== READ ROUTING ====================
+    
+    async def _read_target(self, user_id: str) -> Optional[int]:
+        """Pick the replica index for a read-only query, or None for the primary
+        
+        Reads go to a healthy replica round-robin, except for users who wrote
+        within the read-your-writes window; those stay on the primary so they
+        always see their own changes despite replication lag.
+        """
+        
+        healthy = [index for index, ok in enumerate(self.replica_healthy) if ok]
+        if not healthy:
+            self.read_routing_stats["primary"] += 1
+            return None
+        
+        if await self._wrote_recently(user_id):
+            self.read_routing_stats["sticky"] += 1
+            return None
+        
+        self._replica_cursor = (self._replica_cursor + 1) % len(healthy)
+        self.read_routing_stats["replica"] += 1
+        return healthy[self._replica_cursor]
+    
+    async def _routed_read(self, user_id: str, read: Callable[[Any], Awaitable[Any]], fast: bool = False) -> Any:
+        """Run a read-only query on the routed target, falling back to the primary
+        
+        ``read`` receives a session factory, or the fast path pool when
+        ``fast`` is set. A failed replica read is retried on the primary; a
+        replica that dropped the connection leaves rotation until the
+        monitor sees it healthy again.
+        """
+        
+        primary = self.fast_queries if fast else self.postgres_session
+        replica = await self._read_target(user_id)
+        if replica is None:
+            return await read(primary)
+        
+        try:
+            return await read((self.replica_fast_queries if fast else self.replica_sessions)[replica])
+        except Exception as e:
+            if _is_connection_error(e):
+                self.replica_healthy[replica] = False
+            self.read_routing_stats["fallback"] += 1
+            logger.warning("Replica read failed, retrying on primary", replica=replica, error=str(e))
+            return await read(primary)
+    
+    async def _note_read(self, note_id: str, user_id: str, read: Callable[[async_sessionmaker], Awaitable[Any]]) -> Any:
+        """Run a read-only query for an existing note, or return None if no shard has it
+        
+        Unsharded, the read follows replica routing.
+        """
+        
+        if not self.shard_router:
+            return await self._routed_read(user_id, read)
+        
+        session_factory = await self._note_session(note_id, user_id)
+        if session_factory is None:
+            return None
+        return await read(session_factory)
+    
+    async def _replica_monitor(self):
+        """Probe replicas in the background so dead or lagging ones leave rotation"""
+        
+        while True:
+            try:
+                await self._probe_replicas()
+            except Exception as e:
+                logger.error("Replica monitor error", error=str(e))
+            await asyncio.sleep(self.replica_probe_interval)
+    
+    async def _probe_replicas(self):
+        """Check each replica's connection and replay lag against the primary
+        
+        Lag is zero once a replica has replayed the primary's current WAL
+        position, otherwise the age of its last replayed transaction.
+        """
+        
+        async with self.postgres_engine.connect() as conn:
+            primary_lsn = (await conn.execute(text("SELECT CAST(pg_current_wal_lsn() AS TEXT)"))).scalar()
+        
+        for index, engine in enumerate(self.replica_engines):
+            try:
+                async with engine.connect() as conn:
+                    result = await asyncio.wait_for(
+                        conn.execute(
+                            text("""
+                            SELECT CASE
+                                WHEN pg_last_wal_replay_lsn() >= CAST(:primary_lsn AS pg_lsn) THEN 0
+                                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                            END
+                            """),
+                            {"primary_lsn": primary_lsn}
+                        ),
+                        timeout=self.replica_probe_interval
+                    )
+                    lag = float(result.scalar() or 0)
+            except Exception as e:
+                if self.replica_healthy[index]:
+                    logger.error("PostgreSQL replica probe failed", replica=index, error=str(e))
+                self.replica_healthy[index] = False
+                self.replica_lag_seconds[index] = None
+                continue
+            
+            healthy = lag <= self.replica_max_lag
+            if healthy != self.replica_healthy[index]:
+                logger.warning(
+                    "PostgreSQL replica back in rotation" if healthy else "PostgreSQL replica lagging, out of rotation",
+                    replica=index, lag_seconds=lag
+                )
+            self.replica_healthy[index] = healthy
+            self.replica_lag_seconds[index] = lag
+    
+    async def _mark_write(self, user_id: str):
+        """Pin a user's reads to the primary for the read-your-writes window"""
+        
+        if not self.replica_sessions:
+            return
+        
+        self._recent_writers[user_id] = time.monotonic() + self.read_your_writes_window
+        
+        # Share the pin with other workers
+        await self.redis_client.set(
+            f"rw_pin:{user_id}", 1, px=int(self.read_your_writes_window * 1000)
+        )
+    
+    async def _wrote_recently(self, user_id: str) -> bool:
+        """Check the local then the shared read-your-writes pin"""
+        
+        now = time.monotonic()
+        pinned_until = self._recent_writers.get(user_id)
+        if pinned_until is not None:
+            if pinned_until > now:
+                return True
+            del self._recent_writers[user_id]
+        
+        # Prune expired local pins so the map stays small
+        if len(self._recent_writers) > 10000:
+            self._recent_writers = {
+                writer: until for writer, until in self._recent_writers.items() if until > now
+            }
+        
+        return bool(await self.redis_client.exists(f"rw_pin:{user_id}"))
+    
+    # ==================== SHARD ROUTING ====================
+    
+    async def _write_session(self, note: Note) -> async_sessionmaker:
+        """Session factory for writing a note (its tenant's shard when sharded)"""
+        
+        if not self.shard_router:
+            return self.postgres_session
+        
+        shard = await self.shard_router.shard_for(tenant_key(note.workspace_id, note.user_id), for_write=True)
+        return self.shard_router.session(shard)
+    
+    async def _note_session(self, note_id: str, user_id: str) -> Optional[async_sessionmaker]:
+        """Session factory for an existing note, or None if no shard has it
+        
+        Unsharded, this is the primary; replica reads go through _note_read.
+        """
+        
+        if not self.shard_router:
+            return self.postgres_session
+        
+        key = await self._locate_note(note_id, user_id)
+        if key is None:
+            return None
+        return self.shard_router.session(await self.shard_router.shard_for(key))
+    
+    async def _locate_note(self, note_id: str, user_id: str) -> Optional[str]:
+        """Tenant key of a note, remembered in Redis and found by scatter on a miss
+        
+        A note never changes tenant, so the mapping stays valid across
+        shard moves; only tenant → shard lives in the directory.
         """
         
-        async with self.postgres_engine.begin() as conn:
-            await conn.execute(text(schema_sql))
+        location_key = f"note_loc:{note_id}"
+        key = await self.redis_client.get(location_key)
+        if key:
+            return key
+        
+        async def probe(session_factory: async_sessionmaker):
+            async with session_factory() as session:
+                result = await session.execute(
+                    text("SELECT workspace_id FROM notes WHERE id = :note_id AND user_id = :user_id"),
+                    {"note_id": note_id, "user_id": user_id}
+                )
+                return result.fetchone()
+        
+        for row in await self.shard_router.scatter(probe):
+            if row:
+                key = tenant_key(row[0], user_id)
+                await self.redis_client.set(location_key, key, ex=self.note_location_ttl)
+                return key
+        return None
+    
+    def _note_sessions(self) -> List[async_sessionmaker]:
+        """Session factories for every database holding notes"""
         
-        logger.info("✅ Database schema created")
+        return self.shard_router.sessions if self.shard_router else [self.postgres_session]
     
     # ==================== NOTE OPERATIONS ====================
     
@@ -411,28 +766,21 @@ class EnterpriseDataManager:
                 workspace_id=note_data.get("workspace_id"),
                 encrypted=note_data.get("encrypted", False)
             )
+            await self._resolve_note_links(note)
             
-            # Store in PostgreSQL
-            await self._store_note_postgres(note)
-            
-            # Cache in Redis
-            await self._cache_note_redis(note)
+            # Store in PostgreSQL; indexing follows from the outbox
+            await self._store_note_postgres(note, NoteEvent.CREATED)
+            await self._mark_write(user_id)
+            await self._drop_written_note_caches(note_id, user_id)
             
-            # Add to vector store for semantic search
-            await self.vector_store.add_vector(
-                note_id,
-                f"{note.title} {note.body}",
-                {
-                    "user_id": user_id,
-                    "workspace_id": note.workspace_id,
-                    "tags": note.tags,
-                    "created_at": note.created_at.isoformat()
-                }
-            )
+            if self.shard_router:
+                await self.redis_client.set(
+                    f"note_loc:{note_id}", tenant_key(note.workspace_id, user_id), ex=self.note_location_ttl
+                )
             
             # Track performance
             query_time = time.time() - start_time
-            self.query_metrics.append(QueryMetrics(
+            self.query_metrics.record("create_note", QueryMetrics(
                 query_time=query_time,
                 rows_returned=1,
                 cache_hit=False,
@@ -441,7 +789,7 @@ class EnterpriseDataManager:
             
             logger.info("Note created", note_id=note_id, user_id=user_id, query_time=query_time)
             
-            return self._note_to_dict(note)
+            return note_to_dict(note)
             
         except Exception as e:
             logger.error("Failed to create note", user_id=user_id, error=str(e))
@@ -450,16 +798,22 @@ class EnterpriseDataManager:
     async def get_note(self, note_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get note with intelligent caching"""
         
+        payload = await self.get_note_payload(note_id, user_id)
+        return orjson.loads(payload) if payload else None
+    
+    async def get_note_payload(self, note_id: str, user_id: str) -> Optional[bytes]:
+        """Get a note as canonical JSON bytes, ready to send without re-serializing"""
+        
         start_time = time.time()
         
         try:
             # Try Redis cache first
-            cached_note = await self._get_note_from_cache(note_id)
+            cached_note = await self._get_owned_note_from_cache(note_id, user_id)
             if cached_note:
                 self.cache_stats["hits"] += 1
                 
                 query_time = time.time() - start_time
-                self.query_metrics.append(QueryMetrics(
+                self.query_metrics.record("get_note", QueryMetrics(
                     query_time=query_time,
                     rows_returned=1,
                     cache_hit=True,
@@ -468,38 +822,51 @@ class EnterpriseDataManager:
                 
                 return cached_note
             
-            # Cache miss - get from PostgreSQL
+            # Cache miss - load once for all concurrent callers
             self.cache_stats["misses"] += 1
-            note = await self._get_note_from_postgres(note_id, user_id)
+            payload = await self.single_flight.do(
+                f"note:{note_id}:{user_id}",
+                lambda: self._load_note_payload(note_id, user_id),
+                recheck=lambda: self._get_owned_note_from_cache(note_id, user_id)
+            )
             
-            if note:
-                # Cache for future requests
-                await self._cache_note_redis(note)
-                
+            if payload:
                 query_time = time.time() - start_time
-                self.query_metrics.append(QueryMetrics(
+                self.query_metrics.record("get_note", QueryMetrics(
                     query_time=query_time,
                     rows_returned=1,
                     cache_hit=False,
                     storage_tier=StorageTier.WARM
                 ))
-                
-                return self._note_to_dict(note)
             
-            return None
+            return payload
             
         except Exception as e:
             logger.error("Failed to get note", note_id=note_id, user_id=user_id, error=str(e))
             raise
     
+    async def _load_note_payload(self, note_id: str, user_id: str) -> Optional[bytes]:
+        """Load a note from PostgreSQL and cache its payload"""
+        
+        note = await self._get_note_from_postgres(note_id, user_id, rehydrate=True)
+        if not note:
+            return None
+        
+        # Record the access for cold tier archival. Reads that hit the
+        # cache need no record: the cache entry expires hourly, so any
+        # note read regularly is recorded at least that often.
+        await self.redis_client.zadd("note_access", {note_id: time.time()})
+        
+        return await self._cache_note_redis(note)
+    
     async def update_note(self, note_id: str, note_data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         """Update note with versioning and conflict resolution"""
         
         start_time = time.time()
         
         try:
-            # Get existing note
-            existing_note = await self._get_note_from_postgres(note_id, user_id)
+            # Get existing note; the write stores the body warm again
+            existing_note = await self._get_note_from_postgres(note_id, user_id, use_primary=True, rehydrate=True)
             if not existing_note:
                 raise Exception("Note not found")
             
@@ -514,28 +881,16 @@ class EnterpriseDataManager:
             existing_note.color = note_data.get("color", existing_note.color)
             existing_note.updated_at = datetime.now()
             existing_note.version += 1
+            await self._resolve_note_links(existing_note)
             
-            # Update in PostgreSQL
-            await self._update_note_postgres(existing_note)
-            
-            # Update cache
-            await self._cache_note_redis(existing_note)
-            
-            # Update vector store
-            await self.vector_store.update_vector(
-                note_id,
-                f"{existing_note.title} {existing_note.body}",
-                {
-                    "user_id": user_id,
-                    "workspace_id": existing_note.workspace_id,
-                    "tags": existing_note.tags,
-                    "updated_at": existing_note.updated_at.isoformat()
-                }
-            )
+            # Update in PostgreSQL; indexing follows from the outbox
+            await self._update_note_postgres(existing_note, NoteEvent.UPDATED)
+            await self._mark_write(user_id)
+            await self._drop_written_note_caches(note_id, user_id)
             
             # Track performance
             query_time = time.time() - start_time
-            self.query_metrics.append(QueryMetrics(
+            self.query_metrics.record("update_note", QueryMetrics(
                 query_time=query_time,
                 rows_returned=1,
                 cache_hit=False,
@@ -544,14 +899,18 @@ class EnterpriseDataManager:
             
             logger.info("Note updated", note_id=note_id, user_id=user_id, version=existing_note.version)
             
-            return self._note_to_dict(existing_note)
+            return note_to_dict(existing_note)
             
         except Exception as e:
             logger.error("Failed to update note", note_id=note_id, user_id=user_id, error=str(e))
             raise
     
     async def get_notes(self, user_id: str, limit: int = 50, offset: int = 0, workspace_id: str = None) -> List[Dict[str, Any]]:
-        """Get notes with pagination and filtering"""
+        """Get notes with pagination and filtering
+        
+        Page caches hold only the ordered note ids; bodies live once in the
+        per-note cache, so editing a note touches exactly one cache entry.
+        """
         
         start_time = time.time()
         
@@ -560,13 +919,12 @@ class EnterpriseDataManager:
             cache_key = f"notes:{user_id}:{limit}:{offset}:{workspace_id or 'all'}"
             
             # Try cache first
-            cached_notes = await self.redis_client.get(cache_key)
-            if cached_notes:
+            notes_data = await self._get_cached_notes_page(cache_key, user_id)
+            if notes_data is not None:
                 self.cache_stats["hits"] += 1
-                notes_data = json.loads(cached_notes)
                 
                 query_time = time.time() - start_time
-                self.query_metrics.append(QueryMetrics(
+                self.query_metrics.record("get_notes", QueryMetrics(
                     query_time=query_time,
                     rows_returned=len(notes_data),
                     cache_hit=True,
@@ -575,22 +933,20 @@ class EnterpriseDataManager:
                 
                 return notes_data
             
-            # Cache miss - get from PostgreSQL
+            # Cache miss - load once for all concurrent callers
             self.cache_stats["misses"] += 1
-            notes = await self._get_notes_from_postgres(user_id, limit, offset, workspace_id)
-            
-            # Convert to dict format
-            notes_data = [self._note_to_dict(note) for note in notes]
-            
-            # Cache results for 10 minutes
-            await self.redis_client.setex(
+            notes_data = await self.single_flight.do(
                 cache_key,
-                600,
-                json.dumps(notes_data)
+                lambda: self._load_notes_page(cache_key, user_id, limit, offset, workspace_id),
+                recheck=lambda: self._get_cached_notes_page(cache_key, user_id)
             )
             
+            # Callers may transform notes in place (e.g. decryption), so each
+            # gets its own copies of the shared result
+            notes_data = [dict(note_data) for note_data in notes_data]
+            
             query_time = time.time() - start_time
-            self.query_metrics.append(QueryMetrics(
+            self.query_metrics.record("get_notes", QueryMetrics(
                 query_time=query_time,
                 rows_returned=len(notes_data),
                 cache_hit=False,
@@ -603,6 +959,45 @@ class EnterpriseDataManager:
             logger.error("Failed to get notes", user_id=user_id, error=str(e))
             raise
     
+    async def _load_notes_page(
+        self,
+        cache_key: str,
+        user_id: str,
+        limit: int,
+        offset: int,
+        workspace_id: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Load a notes page from PostgreSQL and cache it as an id list"""
+        
+        notes = await self._get_notes_from_postgres(user_id, limit, offset, workspace_id)
+        
+        # Convert to dict format
+        notes_data = [note_to_dict(note) for note in notes]
+        
+        # Cache the id list for 10 minutes and refresh the per-note entries
+        page = {
+            "ids": [note.id for note in notes],
+            "next_offset": offset + len(notes) if len(notes) == limit else None
+        }
+        async with self.redis_raw_client.pipeline(transaction=False) as pipe:
+            pipe.setex(cache_key, 600, orjson.dumps(page))
+            # Track the user's page keys so invalidation needs no keyspace scan
+            pipe.sadd(f"notes_pages:{user_id}", cache_key)
+            pipe.expire(f"notes_pages:{user_id}", 600)
+            for note, note_data in zip(notes, notes_data):
+                pipe.setex(f"note:{note.id}", self.hot_data_ttl, self.body_codec.pack(orjson.dumps(note_data)))
+            await pipe.execute()
+        
+        return notes_data
+    
+    async def _get_cached_notes_page(self, cache_key: str, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Get a hydrated notes page if its id list is cached"""
+        
+        cached_page = await self.redis_raw_client.get(cache_key)
+        if not cached_page:
+            return None
+        return await self._hydrate_notes(orjson.loads(cached_page)["ids"], user_id)
+    
     async def vector_search(self, query: str, user_id: str, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
         """Perform semantic vector search"""
         
@@ -623,7 +1018,7 @@ class EnterpriseDataManager:
                         notes.append(note)
             
             query_time = time.time() - start_time
-            self.query_metrics.append(QueryMetrics(
+            self.query_metrics.record("vector_search", QueryMetrics(
                 query_time=query_time,
                 rows_returned=len(notes),
                 cache_hit=False,
@@ -643,7 +1038,7 @@ class EnterpriseDataManager:
         
         try:
             # Get note
-            note = await self._get_note_from_postgres(note_id, user_id)
+            note = await self._get_note_from_postgres(note_id, user_id, use_primary=True, rehydrate=True)
             if not note:
                 return False
             
@@ -653,13 +1048,9 @@ class EnterpriseDataManager:
             # Soft delete in PostgreSQL
             note.status = DataStatus.DELETED
             note.updated_at = datetime.now()
-            await self._update_note_postgres(note)
-            
-            # Remove from cache
-            await self.redis_client.delete(f"note:{note_id}")
-            
-            # Remove from vector store
-            await self.vector_store.delete_vector(note_id)
+            await self._update_note_postgres(note, NoteEvent.DELETED)
+            await self._mark_write(user_id)
+            await self._drop_written_note_caches(note_id, user_id)
             
             logger.info("Note deleted", note_id=note_id, user_id=user_id)
             return True
@@ -674,119 +1065,521 @@ class EnterpriseDataManager:
         """Create explicit version of note"""
         
         try:
-            note = await self._get_note_from_postgres(note_id, user_id)
+            note = await self._get_note_from_postgres(note_id, user_id, use_primary=True)
             if note:
-                return await self._create_note_version(note, user_id, "manual")
+                version_id = await self._create_note_version(note, user_id, "manual")
+                await self._mark_write(user_id)
+                return version_id
             return ""
             
         except Exception as e:
             logger.error("Failed to create version", note_id=note_id, error=str(e))
             raise
     
-    async def get_note_versions(self, note_id: str, user_id: str) -> List[Dict[str, Any]]:
-        """Get all versions of a note"""
+    async def get_note_versions(
+        self,
+        note_id: str,
+        user_id: str,
+        limit: int = 50,
+        before_version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """List version metadata newest-first with keyset pagination
+        
+        Bodies are not returned; fetch them with get_note_version(). Pass the
+        returned ``next_cursor`` as ``before_version`` to get the next page.
+        The note's live version is listed first with change_type "current"
+        until an update stores it.
+        """
         
         try:
-            # This would query note_versions table
-            # For now, return empty list
-            return []
+            query = f"""
+            SELECT version, title, changed_by, change_type, created_at FROM (
+                SELECT v.version, v.title, v.changed_by, v.change_type, v.created_at
+                FROM note_versions v
+                JOIN notes n ON n.id = v.note_id
+                WHERE v.note_id = :note_id AND n.user_id = :user_id
+                UNION ALL
+                SELECT n.version, n.title, n.user_id, '{CURRENT_CHANGE_TYPE}', n.updated_at
+                FROM notes n
+                WHERE n.id = :note_id AND n.user_id = :user_id
+                  AND NOT EXISTS (SELECT 1 FROM note_versions v WHERE v.note_id = n.id AND v.version = n.version)
+            ) versions
+            """
+            params = {"note_id": note_id, "user_id": user_id, "limit": limit + 1}
+            
+            if before_version is not None:
+                query += " WHERE version < :before_version"
+                params["before_version"] = before_version
+            
+            query += " ORDER BY version DESC LIMIT :limit"
+            
+            rows = await self._note_read(
+                note_id, user_id, lambda session_factory: self._fetch_rows(session_factory, query, params)
+            )
+            if rows is None:
+                return {"versions": [], "next_cursor": None}
+            
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            
+            versions = [
+                {
+                    "note_id": note_id,
+                    "version": row[0],
+                    "title": row[1],
+                    "changed_by": row[2],
+                    "change_type": row[3],
+                    "created_at": row[4].isoformat() if row[4] else None
+                }
+                for row in rows
+            ]
+            
+            return {
+                "versions": versions,
+                "next_cursor": versions[-1]["version"] if has_more else None
+            }
             
         except Exception as e:
             logger.error("Failed to get note versions", note_id=note_id, error=str(e))
             raise
     
-    # ==================== PERMISSIONS ====================
-    
-    async def can_edit_note(self, note_id: str, user_id: str) -> bool:
-        """Check if user can edit note"""
+    async def get_note_version(self, note_id: str, version: int, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single reconstructed version of a note
+        
+        The live version has no stored row yet and is served from the note.
+        """
         
         try:
-            note = await self._get_note_from_postgres(note_id, user_id)
-            return note is not None and note.user_id == user_id
+            async def load(session_factory: async_sessionmaker):
+                async with session_factory() as session:
+                    result = await session.execute(
+                        text("""
+                        SELECT v.version, v.title, v.changed_by, v.change_type, v.created_at
+                        FROM note_versions v
+                        JOIN notes n ON n.id = v.note_id
+                        WHERE v.note_id = :note_id AND v.version = :version AND n.user_id = :user_id
+                        ORDER BY v.created_at
+                        LIMIT 1
+                        """),
+                        {"note_id": note_id, "version": version, "user_id": user_id}
+                    )
+                    row = result.fetchone()
+                    if not row:
+                        return None
+                    return row, await self._get_version_body(session, note_id, version)
+            
+            found = await self._note_read(note_id, user_id, load)
+            if found is None:
+                note = await self._get_note_from_postgres(note_id, user_id)
+                if not note or note.version != version:
+                    return None
+                return {
+                    "note_id": note_id,
+                    "version": note.version,
+                    "title": note.title,
+                    "body": note.body,
+                    "changed_by": note.user_id,
+                    "change_type": CURRENT_CHANGE_TYPE,
+                    "created_at": note.updated_at.isoformat()
+                }
+            row, body = found
+            
+            return {
+                "note_id": note_id,
+                "version": row[0],
+                "title": row[1],
+                "body": body,
+                "changed_by": row[2],
+                "change_type": row[3],
+                "created_at": row[4].isoformat() if row[4] else None
+            }
             
         except Exception as e:
-            logger.error("Failed to check note permissions", note_id=note_id, user_id=user_id, error=str(e))
-            return False
-    
-    # ==================== ANALYTICS ====================
+            logger.error("Failed to get note version", note_id=note_id, version=version, error=str(e))
+            raise
     
-    async def save_model_performance(self, request_id: str, performance_data: Dict[str, Any]):
-        """Save AI model performance data"""
+    async def diff_note_versions(
+        self,
+        note_id: str,
+        from_version: int,
+        to_version: int,
+        user_id: str,
+        granularity: DiffGranularity = DiffGranularity.LINE
+    ) -> Optional[Dict[str, Any]]:
+        """Diff two versions of a note
+        
+        Stored versions never change, so computed diffs are cached in Redis
+        by (note_id, from_version, to_version, granularity). Diffs against
+        the live version are not cached: it changes until it is stored.
+        """
+        
+        cache_key = f"note_diff:{note_id}:{from_version}:{to_version}:{granularity.value}"
         
         try:
-            # Store in analytics_events table
-            async with self.postgres_session() as session:
-                await session.execute(
-                    text("""
-                    INSERT INTO analytics_events (id, event_type, data, timestamp)
-                    VALUES (:id, :event_type, :data, :timestamp)
-                    """),
-                    {
-                        "id": str(uuid.uuid4()),
-                        "event_type": "ai_model_performance",
-                        "data": json.dumps(performance_data),
-                        "timestamp": datetime.now()
-                    }
+            cached_diff = await self.redis_client.get(cache_key)
+            if cached_diff:
+                diff = json.loads(cached_diff)
+                if diff.pop("owner_id", None) == user_id:
+                    self.cache_stats["hits"] += 1
+                    return diff
+                return None
+            
+            self.cache_stats["misses"] += 1
+            old = await self.get_note_version(note_id, from_version, user_id)
+            new = await self.get_note_version(note_id, to_version, user_id)
+            if not old or not new:
+                return None
+            
+            diff = {
+                "note_id": note_id,
+                "from_version": from_version,
+                "to_version": to_version,
+                "granularity": granularity.value,
+                "title": diff_texts(old["title"], new["title"], DiffGranularity.WORD),
+                "body": diff_texts(old["body"] or "", new["body"] or "", granularity)
+            }
+            
+            if CURRENT_CHANGE_TYPE not in (old["change_type"], new["change_type"]):
+                await self.redis_client.setex(
+                    cache_key,
+                    self.version_diff_ttl,
+                    json.dumps({**diff, "owner_id": user_id})
                 )
-                await session.commit()
-                
+            
+            return diff
+            
         except Exception as e:
-            logger.error("Failed to save model performance", request_id=request_id, error=str(e))
+            logger.error(
+                "Failed to diff note versions",
+                note_id=note_id, from_version=from_version, to_version=to_version, error=str(e)
+            )
+            raise
     
-    async def get_model_performance_history(self) -> Dict[str, Any]:
-        """Get historical model performance data"""
+    # ==================== NOTE EVENTS ====================
+    
+    def register_note_handler(
+        self,
+        name: str,
+        handler: NoteEventHandler,
+        event_types: Optional[Iterable[NoteEvent]] = None
+    ):
+        """Deliver committed note changes to handler through the outbox"""
+        
+        self.outbox.register(name, handler, event_types)
+    
+    async def _invalidate_note_caches(self, change: NoteChange):
+        """Drop the caches of the changed note"""
+        
+        await self._drop_note_caches(change.note_id, change.user_id)
+    
+    async def _drop_written_note_caches(self, note_id: str, user_id: str):
+        """Drop a just-committed note's caches so the writer reads its own write
+        
+        The outbox "cache" handler drops them again once relayed, which
+        covers a failure here and writes racing a concurrent cache fill.
+        """
         
         try:
-            # This would query analytics_events table
-            # For now, return empty dict
-            return {}
-            
+            await self._drop_note_caches(note_id, user_id)
         except Exception as e:
-            logger.error("Failed to get performance history", error=str(e))
-            return {}
+            logger.warning("Note cache drop deferred to outbox", note_id=note_id, error=str(e))
+    
+    async def _drop_note_caches(self, note_id: str, user_id: str):
+        """Drop a note's cache entry and its owner's cached list pages"""
+        
+        pages_key = f"notes_pages:{user_id}"
+        page_keys = await self.redis_client.smembers(pages_key)
+        await self.redis_client.delete(f"note:{note_id}", pages_key, *page_keys)
+    
+    async def _index_note_vector(self, change: NoteChange):
+        """Index the note's current state, so redelivered or reordered events converge"""
+        
+        note = await self._get_note_from_postgres(change.note_id, change.user_id, use_primary=True)
+        if note is None:
+            await self.vector_store.delete_vector(change.note_id)
+            return
+        
+        await self.vector_store.update_vector(
+            note.id,
+            f"{note.title} {note.body}",
+            {
+                "user_id": note.user_id,
+                "workspace_id": note.workspace_id,
+                "tags": note.tags,
+                "created_at": note.created_at.isoformat(),
+                "updated_at": note.updated_at.isoformat()
+            }
+        )
+    
+    async def _resolve_note_links(self, note: Note):
+        """Set a note's links from the [[wikilinks]] in its body
+        
+        Encrypted bodies are opaque, so their client-computed links are kept.
+        """
+        
+        if note.encrypted:
+            return
+        if "[[" not in note.body:
+            note.links = []
+            return
+        
+        write_session = await self._write_session(note)
+        async with write_session() as session:
+            note.links = ordered_targets(await self.link_index.resolve(session, note))
+    
+    async def _sync_note_links(self, change: NoteChange):
+        """Record the note's references and re-resolve the ones this change affects
+        
+        Besides the note itself, only notes whose references dangled on its
+        title, or pointed at it under an old title, are rewritten.
+        """
+        
+        note = await self._get_note_from_postgres(change.note_id, change.user_id, use_primary=True)
+        tenant = tenant_key(change.workspace_id, change.user_id)
+        
+        if self.shard_router:
+            session_factory = self.shard_router.session(await self.shard_router.shard_for(tenant))
+        else:
+            session_factory = self.postgres_session
+        
+        async with session_factory() as session:
+            changed = await self.link_index.sync(session, change.note_id, tenant, note)
+            await session.commit()
+        
+        for note_id, user_id in changed:
+            await self._drop_note_caches(note_id, user_id)
+    
+    # ==================== TITLE AUTOCOMPLETE ====================
     
-    async def save_performance_snapshot(self, performance_data: Dict[str, Any]):
-        """Save performance snapshot"""
+    async def autocomplete_titles(
+        self,
+        user_id: str,
+        query: str,
+        workspace_id: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Top note titles for a [[ link query in the user's workspace or personal notes"""
         
         try:
-            # Store performance metrics
-            for metric_name, value in performance_data.items():
-                async with self.postgres_session() as session:
-                    await session.execute(
-                        text("""
-                        INSERT INTO performance_metrics (id, metric_type, value, timestamp)
-                        VALUES (:id, :metric_type, :value, :timestamp)
-                        """),
-                        {
-                            "id": str(uuid.uuid4()),
-                            "metric_type": metric_name,
-                            "value": value if isinstance(value, (int, float)) else 0.0,
-                            "timestamp": datetime.now()
-                        }
-                    )
-                    await session.commit()
-                    
+            if workspace_id and not await self._can_access_workspace(workspace_id, user_id):
+                return []
+            
+            return await self.autocomplete.suggest(tenant_key(workspace_id, user_id), query, limit)
+            
         except Exception as e:
-            logger.error("Failed to save performance snapshot", error=str(e))
-    
-    # ==================== PRIVATE METHODS ====================
+            logger.error("Failed to autocomplete titles", user_id=user_id, workspace_id=workspace_id, error=str(e))
+            raise
     
-    async def _store_note_postgres(self, note: Note):
-        """Store note in PostgreSQL"""
+    async def _can_access_workspace(self, workspace_id: str, user_id: str) -> bool:
+        """Owner or member check, cached briefly since it runs per keystroke"""
+        
+        key = (workspace_id, user_id)
+        cached = self.workspace_access.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
         
         async with self.postgres_session() as session:
-            await session.execute(
+            result = await session.execute(
                 text("""
-                INSERT INTO notes (id, title, body, tags, links, color, user_id, workspace_id, 
-                                 status, created_at, updated_at, version, encrypted)
-                VALUES (:id, :title, :body, :tags, :links, :color, :user_id, :workspace_id,
-                        :status, :created_at, :updated_at, :version, :encrypted)
+                SELECT EXISTS (SELECT 1 FROM workspaces WHERE id = :workspace_id AND owner_id = :user_id)
+                    OR EXISTS (SELECT 1 FROM workspace_members WHERE workspace_id = :workspace_id AND user_id = :user_id)
                 """),
-                {
-                    "id": note.id,
-                    "title": note.title,
-                    "body": note.body,
-                    "tags": note.tags,
+                {"workspace_id": workspace_id, "user_id": user_id}
+            )
+            allowed = bool(result.scalar())
+        
+        if len(self.workspace_access) > 10000:
+            self.workspace_access.clear()
+        self.workspace_access[key] = (allowed, time.monotonic() + self.workspace_access_ttl)
+        return allowed
+    
+    async def _load_title_rows(self, tenant: str) -> List[Tuple[str, str, float, int]]:
+        """A tenant's live titles with their backlink counts, for a title index build
+        
+        Backlink counts are refreshed when the index is rebuilt (max_age).
+        """
+        
+        kind, _, owner = tenant.partition(":")
+        if kind == "ws":
+            tenant_filter = "n.workspace_id = :owner"
+        else:
+            tenant_filter = "n.workspace_id IS NULL AND n.user_id = :owner"
+        
+        if self.shard_router:
+            session_factory = self.shard_router.session(await self.shard_router.shard_for(tenant))
+        else:
+            session_factory = self.postgres_session
+        
+        rows = await self._fetch_rows(
+            session_factory,
+            f"""
+            SELECT n.id, n.title, n.updated_at, COUNT(l.source_id)
+            FROM notes n
+            LEFT JOIN note_links l ON l.target_id = n.id
+            WHERE n.status != 'deleted' AND {tenant_filter}
+            GROUP BY n.id, n.title, n.updated_at
+            """,
+            {"owner": owner}
+        )
+        return [(row[0], row[1], row[2].timestamp(), row[3]) for row in rows]
+    
+    async def _publish_note_title(self, change: NoteChange):
+        """Feed a committed title change to every worker's title index"""
+        
+        note = change.note
+        updated_at = datetime.fromisoformat(note["updated_at"]).timestamp() if note else time.time()
+        title = None if change.event_type == NoteEvent.DELETED or note is None else note["title"]
+        
+        await self.autocomplete.publish(
+            tenant_key(change.workspace_id, change.user_id), change.note_id, title, updated_at
+        )
+    
+    # ==================== PERMISSIONS ====================
+    
+    async def can_edit_note(self, note_id: str, user_id: str) -> bool:
+        """Check if user can edit note"""
+        
+        try:
+            note = await self._get_note_from_postgres(note_id, user_id, use_primary=True)
+            return note is not None and note.user_id == user_id
+            
+        except Exception as e:
+            logger.error("Failed to check note permissions", note_id=note_id, user_id=user_id, error=str(e))
+            return False
+    
+    # ==================== ANALYTICS ====================
+    
+    async def save_model_performance(self, request_id: str, performance_data: Dict[str, Any]):
+        """Save AI model performance data
+        
+        The row is queued on the analytics write-behind buffer and inserted
+        in a batch; this never waits on PostgreSQL.
+        """
+        
+        try:
+            self.analytics_buffer.add({
+                "id": str(uuid.uuid4()),
+                "event_type": "ai_model_performance",
+                "data": json.dumps(performance_data, default=str),
+                "timestamp": datetime.now()
+            })
+            
+        except Exception as e:
+            logger.error("Failed to save model performance", request_id=request_id, error=str(e))
+    
+    async def _insert_analytics_events(self, rows: List[Dict[str, Any]]):
+        """Insert a batch of analytics events with one multi-row INSERT
+        
+        Rows already present are skipped, so a replayed spill batch is harmless.
+        """
+        
+        async with self.postgres_session() as session:
+            await session.execute(
+                text("""
+                INSERT INTO analytics_events (id, event_type, data, timestamp)
+                SELECT * FROM unnest(
+                    CAST(:ids AS VARCHAR[]),
+                    CAST(:event_types AS VARCHAR[]),
+                    CAST(:data AS JSONB[]),
+                    CAST(:timestamps AS TIMESTAMP[])
+                )
+                ON CONFLICT (id, timestamp) DO NOTHING
+                """),
+                {
+                    "ids": [row["id"] for row in rows],
+                    "event_types": [row["event_type"] for row in rows],
+                    "data": [row["data"] for row in rows],
+                    "timestamps": [row["timestamp"] for row in rows]
+                }
+            )
+            await session.commit()
+    
+    async def get_model_performance_history(self) -> Dict[str, Any]:
+        """Get historical model performance data"""
+        
+        try:
+            # This would query analytics_events table
+            # For now, return empty dict
+            return {}
+            
+        except Exception as e:
+            logger.error("Failed to get performance history", error=str(e))
+            return {}
+    
+    async def save_performance_snapshot(
+        self,
+        performance_data: Dict[str, Any],
+        dimensions: Optional[Dict[str, Any]] = None
+    ):
+        """Save performance snapshot in a single transaction
+        
+        Rows come from flatten_performance_data(): numeric values become
+        metrics, non-numeric values become their dimensions.
+        """
+        
+        try:
+            timestamp = datetime.now()
+            rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "metric_type": metric_type,
+                    "value": value,
+                    "dimensions": json.dumps(metric_dimensions, default=str) if metric_dimensions else None,
+                    "timestamp": timestamp
+                }
+                for metric_type, value, metric_dimensions
+                in flatten_performance_data(performance_data, dimensions or {})
+            ]
+            
+            if not rows:
+                return
+            
+            async with self.postgres_session() as session:
+                await session.execute(
+                    text("""
+                    INSERT INTO performance_metrics (id, metric_type, value, dimensions, timestamp)
+                    VALUES (:id, :metric_type, :value, CAST(:dimensions AS JSONB), :timestamp)
+                    """),
+                    rows
+                )
+                await session.commit()
+                    
+        except Exception as e:
+            logger.error("Failed to save performance snapshot", error=str(e))
+    
+    # ==================== PRIVATE METHODS ====================
+    
+    async def _store_note_postgres(self, note: Note, event: Optional[NoteEvent] = None):
+        """Store note in PostgreSQL, with its outbox row in the same transaction"""
+        
+        outbox = outbox_values(event, note) if event else None
+        body, body_zstd = self._encode_body(note.body)
+        
+        if self.fast_queries:
+            await self.fast_queries.insert_note((
+                note.id, note.title, body, note.tags, note.links, note.color,
+                note.user_id, note.workspace_id, note.status.value, note.created_at,
+                note.updated_at, note.version, note.encrypted, body_zstd
+            ), tuple(outbox.values()) if outbox else None)
+            if outbox:
+                self.outbox.notify()
+            return
+        
+        write_session = await self._write_session(note)
+        async with write_session() as session:
+            await session.execute(
+                text("""
+                INSERT INTO notes (id, title, body, tags, links, color, user_id, workspace_id, 
+                                 status, created_at, updated_at, version, encrypted, body_zstd)
+                VALUES (:id, :title, :body, :tags, :links, :color, :user_id, :workspace_id,
+                        :status, :created_at, :updated_at, :version, :encrypted, :body_zstd)
+                """),
+                {
+                    "id": note.id,
+                    "title": note.title,
+                    "body": body,
+                    "body_zstd": body_zstd,
+                    "tags": note.tags,
                     "links": note.links,
                     "color": note.color,
                     "user_id": note.user_id,
@@ -798,40 +1591,63 @@ class EnterpriseDataManager:
                     "encrypted": note.encrypted
                 }
             )
+            if outbox:
+                await session.execute(text(OUTBOX_INSERT), outbox)
             await session.commit()
+        
+        if outbox:
+            self.outbox.notify()
     
-    async def _get_note_from_postgres(self, note_id: str, user_id: str) -> Optional[Note]:
-        """Get note from PostgreSQL"""
+    async def _get_note_from_postgres(
+        self,
+        note_id: str,
+        user_id: str,
+        use_primary: bool = False,
+        rehydrate: bool = False
+    ) -> Optional[Note]:
+        """Get note from PostgreSQL (a read replica unless use_primary is set)
+        
+        An archived note's body is read from cold storage. Only user-facing
+        reads and writes pass rehydrate, which also promotes the row back to
+        warm and records the access; background readers leave it archived.
+        """
         
-        async with self.postgres_session() as session:
-            result = await session.execute(
-                text("""
-                SELECT id, title, body, tags, links, color, user_id, workspace_id,
-                       status, created_at, updated_at, version, encrypted
-                FROM notes 
-                WHERE id = :note_id AND user_id = :user_id AND status != 'deleted'
-                """),
-                {"note_id": note_id, "user_id": user_id}
-            )
+        if self.fast_queries:
+            fetch = lambda queries: queries.fetch_note(note_id, user_id)
+            row = await (fetch(self.fast_queries) if use_primary else self._routed_read(user_id, fetch, fast=True))
+        else:
+            async def fetch_row(session_factory: async_sessionmaker):
+                async with session_factory() as session:
+                    result = await session.execute(
+                        text("""
+                        SELECT id, title, body, tags, links, color, user_id, workspace_id,
+                               status, created_at, updated_at, version, encrypted, archive_key, body_zstd
+                        FROM notes 
+                        WHERE id = :note_id AND user_id = :user_id AND status != 'deleted'
+                        """),
+                        {"note_id": note_id, "user_id": user_id}
+                    )
+                    return result.fetchone()
             
-            row = result.fetchone()
-            if row:
-                return Note(
-                    id=row[0],
-                    title=row[1],
-                    body=row[2],
-                    tags=row[3] or [],
-                    links=row[4] or [],
-                    color=row[5],
-                    user_id=row[6],
-                    workspace_id=row[7],
-                    status=DataStatus(row[8]),
-                    created_at=row[9],
-                    updated_at=row[10],
-                    version=row[11],
-                    encrypted=row[12]
-                )
+            if use_primary:
+                session_factory = await self._note_session(note_id, user_id)
+                row = await fetch_row(session_factory) if session_factory else None
+            else:
+                row = await self._note_read(note_id, user_id, fetch_row)
+        
+        if not row:
             return None
+        
+        await self._load_body_dictionaries([row[14]])
+        note = self._row_to_note(row)
+        
+        if note.archive_key:
+            if rehydrate:
+                await self._rehydrate_note(note)
+            else:
+                note.body = await self._load_archived_body(note.archive_key)
+        
+        return note
     
     async def _get_notes_from_postgres(
         self, 
@@ -842,60 +1658,130 @@ class EnterpriseDataManager:
     ) -> List[Note]:
         """Get notes from PostgreSQL with pagination"""
         
+        if self.fast_queries:
+            rows = await self._routed_read(
+                user_id, lambda queries: queries.fetch_notes_page(user_id, limit, offset, workspace_id), fast=True
+            )
+        else:
+            query = """
+            SELECT id, title, body, tags, links, color, user_id, workspace_id,
+                   status, created_at, updated_at, version, encrypted, archive_key, body_zstd
+            FROM notes 
+            WHERE user_id = :user_id AND status = 'active'
+            """
+            
+            params = {"user_id": user_id, "limit": limit, "offset": offset}
+            
+            if workspace_id:
+                query += " AND workspace_id = :workspace_id"
+                params["workspace_id"] = workspace_id
+            
+            query += " ORDER BY updated_at DESC LIMIT :limit OFFSET :offset"
+            
+            if not self.shard_router:
+                rows = await self._routed_read(
+                    user_id, lambda session_factory: self._fetch_rows(session_factory, query, params)
+                )
+            elif workspace_id:
+                shard = await self.shard_router.shard_for(tenant_key(workspace_id, user_id))
+                rows = await self._fetch_rows(self.shard_router.session(shard), query, params)
+            else:
+                # Scatter-gather: top offset+limit from each shard, merged newest first
+                shard_params = {**params, "limit": offset + limit, "offset": 0}
+                shard_rows = await self.shard_router.scatter(
+                    lambda session_factory: self._fetch_rows(session_factory, query, shard_params)
+                )
+                # Notes mid-move can briefly exist on two shards; keep one copy
+                seen = set()
+                rows = []
+                for row in heapq.merge(*shard_rows, key=lambda row: row[10], reverse=True):
+                    if row[0] not in seen:
+                        seen.add(row[0])
+                        rows.append(row)
+                rows = rows[offset:offset + limit]
+        
+        await self._load_body_dictionaries(row[14] for row in rows)
+        notes = [self._row_to_note(row) for row in rows]
+        await self._fill_archived_bodies(notes)
+        
+        return notes
+    
+    async def _get_notes_by_ids_from_postgres(self, note_ids: List[str], user_id: str) -> List[Note]:
+        """Get active notes by id in one query per shard (order not preserved)"""
+        
         query = """
         SELECT id, title, body, tags, links, color, user_id, workspace_id,
-               status, created_at, updated_at, version, encrypted
-        FROM notes 
-        WHERE user_id = :user_id AND status = 'active'
+               status, created_at, updated_at, version, encrypted, archive_key, body_zstd
+        FROM notes
+        WHERE id = ANY(:note_ids) AND user_id = :user_id AND status = 'active'
         """
+        params = {"note_ids": note_ids, "user_id": user_id}
         
-        params = {"user_id": user_id, "limit": limit, "offset": offset}
+        if self.shard_router:
+            shard_rows = await self.shard_router.scatter(
+                lambda session_factory: self._fetch_rows(session_factory, query, params)
+            )
+            rows = [row for rows_on_shard in shard_rows for row in rows_on_shard]
+        else:
+            rows = await self._routed_read(
+                user_id, lambda session_factory: self._fetch_rows(session_factory, query, params)
+            )
         
-        if workspace_id:
-            query += " AND workspace_id = :workspace_id"
-            params["workspace_id"] = workspace_id
+        await self._load_body_dictionaries(row[14] for row in rows)
+        notes = [self._row_to_note(row) for row in rows]
+        await self._fill_archived_bodies(notes)
         
-        query += " ORDER BY updated_at DESC LIMIT :limit OFFSET :offset"
+        return notes
+    
+    @staticmethod
+    async def _fetch_rows(session_factory: async_sessionmaker, query: str, params: Dict[str, Any]) -> List[Any]:
+        """Run a read query in its own session"""
         
-        async with self.postgres_session() as session:
+        async with session_factory() as session:
             result = await session.execute(text(query), params)
-            
-            notes = []
-            for row in result.fetchall():
-                notes.append(Note(
-                    id=row[0],
-                    title=row[1],
-                    body=row[2],
-                    tags=row[3] or [],
-                    links=row[4] or [],
-                    color=row[5],
-                    user_id=row[6],
-                    workspace_id=row[7],
-                    status=DataStatus(row[8]),
-                    created_at=row[9],
-                    updated_at=row[10],
-                    version=row[11],
-                    encrypted=row[12]
-                ))
-            
-            return notes
+            return result.fetchall()
     
-    async def _update_note_postgres(self, note: Note):
-        """Update note in PostgreSQL"""
+    async def _fill_archived_bodies(self, notes: List[Note]):
+        """Fill in archived bodies without promoting them"""
         
-        async with self.postgres_session() as session:
+        archived = [note for note in notes if note.archive_key]
+        if archived:
+            bodies = await asyncio.gather(
+                *(self._load_archived_body(note.archive_key) for note in archived)
+            )
+            for note, body in zip(archived, bodies):
+                note.body = body
+    
+    async def _update_note_postgres(self, note: Note, event: Optional[NoteEvent] = None):
+        """Update note in PostgreSQL, with its outbox row in the same transaction"""
+        
+        outbox = outbox_values(event, note) if event else None
+        body, body_zstd = self._encode_body(note.body)
+        
+        if self.fast_queries:
+            await self.fast_queries.update_note((
+                note.id, note.title, body, note.tags, note.links, note.color,
+                note.updated_at, note.version, note.status.value, body_zstd
+            ), tuple(outbox.values()) if outbox else None)
+            if outbox:
+                self.outbox.notify()
+            return
+        
+        write_session = await self._write_session(note)
+        async with write_session() as session:
             await session.execute(
                 text("""
                 UPDATE notes 
                 SET title = :title, body = :body, tags = :tags, links = :links,
                     color = :color, updated_at = :updated_at, version = :version,
-                    status = :status
+                    status = :status, body_zstd = :body_zstd
                 WHERE id = :id
                 """),
                 {
                     "id": note.id,
                     "title": note.title,
-                    "body": note.body,
+                    "body": body,
+                    "body_zstd": body_zstd,
                     "tags": note.tags,
                     "links": note.links,
                     "color": note.color,
@@ -904,69 +1790,447 @@ class EnterpriseDataManager:
                     "status": note.status.value
                 }
             )
+            if outbox:
+                await session.execute(text(OUTBOX_INSERT), outbox)
             await session.commit()
+        
+        if outbox:
+            self.outbox.notify()
     
-    async def _cache_note_redis(self, note: Note):
-        """Cache note in Redis"""
+    async def _cache_note_redis(self, note: Note) -> bytes:
+        """Cache note in Redis as canonical JSON bytes"""
         
-        note_data = self._note_to_dict(note)
-        await self.redis_client.setex(
+        payload = serialize_note(note)
+        await self.redis_raw_client.setex(
             f"note:{note.id}",
             self.hot_data_ttl,
-            json.dumps(note_data)
+            self.body_codec.pack(payload)
         )
+        return payload
     
-    async def _get_note_from_cache(self, note_id: str) -> Optional[Dict[str, Any]]:
-        """Get note from Redis cache"""
+    async def _hydrate_notes(self, note_ids: List[str], user_id: str) -> List[Dict[str, Any]]:
+        """Hydrate an ordered id list from the per-note cache
         
-        cached_data = await self.redis_client.get(f"note:{note_id}")
-        if cached_data:
-            return json.loads(cached_data)
+        One MGET covers the whole page; misses are backfilled from PostgreSQL
+        in a single query and re-cached. Ids whose note was deleted since the
+        page was cached are dropped.
+        """
+        
+        if not note_ids:
+            return []
+        
+        payloads = await self._unpack_cached(
+            await self.redis_raw_client.mget([f"note:{note_id}" for note_id in note_ids])
+        )
+        
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for note_id, payload in zip(note_ids, payloads):
+            if payload and self.payload_owned_by(payload, user_id):
+                found[note_id] = orjson.loads(payload)
+            else:
+                missing.append(note_id)
+        
+        if missing:
+            notes = await self._get_notes_by_ids_from_postgres(missing, user_id)
+            async with self.redis_raw_client.pipeline(transaction=False) as pipe:
+                for note in notes:
+                    note_data = note_to_dict(note)
+                    found[note.id] = note_data
+                    pipe.setex(f"note:{note.id}", self.hot_data_ttl, self.body_codec.pack(orjson.dumps(note_data)))
+                await pipe.execute()
+        
+        return [found[note_id] for note_id in note_ids if note_id in found]
+    
+    async def _get_owned_note_from_cache(self, note_id: str, user_id: str) -> Optional[bytes]:
+        """Get a note payload from Redis cache if it belongs to user_id"""
+        
+        payload = await self.redis_raw_client.get(f"note:{note_id}")
+        if payload:
+            payload = (await self._unpack_cached([payload]))[0]
+        if payload and self.payload_owned_by(payload, user_id):
+            return payload
         return None
     
     async def _create_note_version(self, note: Note, user_id: str, change_type: str) -> str:
-        """Create note version"""
+        """Create note version, delta-encoded against the previous version
+        
+        Versioning the same note version twice (e.g. an explicit version
+        followed by an update) is a no-op that returns the existing row id.
+        """
         
-        version_id = str(uuid.uuid4())
+        try:
+            return await self._insert_note_version(note, user_id, change_type)
+        except UnknownDictionaryError:
+            # The chain's snapshot uses a dictionary another worker trained
+            await self._load_body_dictionaries(force=True)
+            return await self._insert_note_version(note, user_id, change_type)
+    
+    async def _insert_note_version(self, note: Note, user_id: str, change_type: str) -> str:
+        """Read the version chain and insert the encoded version in one transaction"""
+        
+        if self.fast_queries:
+            return await self.fast_queries.insert_version(
+                note.id,
+                note.version,
+                lambda rows: self._version_insert_values(note, user_id, change_type, rows)
+            )
         
-        async with self.postgres_session() as session:
-            await session.execute(
+        write_session = await self._write_session(note)
+        async with write_session() as session:
+            result = await session.execute(
                 text("""
-                INSERT INTO note_versions (id, note_id, version, title, body, changed_by, change_type)
-                VALUES (:id, :note_id, :version, :title, :body, :changed_by, :change_type)
+                SELECT id, version, storage_kind, body, delta, body_zstd
+                FROM note_versions
+                WHERE note_id = :note_id AND version <= :version
+                  AND version >= COALESCE((
+                      SELECT MAX(version) FROM note_versions
+                      WHERE note_id = :note_id AND version < :version AND storage_kind = 'snapshot'
+                  ), 0)
+                ORDER BY version, created_at
+                """),
+                {"note_id": note.id, "version": note.version}
+            )
+            rows = result.fetchall()
+            
+            for row in rows:
+                if row[1] == note.version:
+                    return row[0]
+            
+            values = self._version_insert_values(note, user_id, change_type, rows)
+            
+            # A concurrent writer may insert the same version first; keep its row
+            result = await session.execute(
+                text("""
+                INSERT INTO note_versions (id, note_id, version, title, body, delta,
+                                           storage_kind, changed_by, change_type, body_zstd)
+                VALUES (:id, :note_id, :version, :title, :body, :delta,
+                        :storage_kind, :changed_by, :change_type, :body_zstd)
+                ON CONFLICT (note_id, version) DO NOTHING
+                RETURNING id
                 """),
                 {
-                    "id": version_id,
-                    "note_id": note.id,
-                    "version": note.version,
-                    "title": note.title,
-                    "body": note.body,
-                    "changed_by": user_id,
-                    "change_type": change_type
+                    "id": str(uuid.uuid4()),
+                    "note_id": values[0],
+                    "version": values[1],
+                    "title": values[2],
+                    "body": values[3],
+                    "delta": values[4],
+                    "storage_kind": values[5],
+                    "changed_by": values[6],
+                    "change_type": values[7],
+                    "body_zstd": values[8]
                 }
             )
+            version_id = result.scalar()
+            if version_id is None:
+                result = await session.execute(
+                    text("SELECT id FROM note_versions WHERE note_id = :note_id AND version = :version"),
+                    {"note_id": note.id, "version": note.version}
+                )
+                version_id = result.scalar()
             await session.commit()
         
         return version_id
     
-    def _note_to_dict(self, note: Note) -> Dict[str, Any]:
-        """Convert Note object to dictionary"""
+    def _version_insert_values(
+        self,
+        note: Note,
+        user_id: str,
+        change_type: str,
+        chain_rows: List[Any]
+    ) -> Tuple[Any, ...]:
+        """Encode a version against its chain of (id, version, kind, body, delta, body_zstd) rows"""
+        
+        chain = [self._row_to_version_record(tuple(row)[1:]) for row in chain_rows]
+        previous_body = VersionDelta.reconstruct(chain) if chain else None
+        chain_length = len({record.version for record in chain})
+        
+        record = VersionDelta.encode(
+            previous_body, note.body, chain_length, self.version_snapshot_interval
+        )
         
-        return {
-            "id": note.id,
-            "title": note.title,
-            "body": note.body,
-            "tags": note.tags,
-            "links": note.links,
-            "color": note.color,
-            "user_id": note.user_id,
-            "workspace_id": note.workspace_id,
-            "status": note.status.value,
-            "created_at": note.created_at.isoformat(),
-            "updated_at": note.updated_at.isoformat(),
-            "version": note.version,
-            "encrypted": note.encrypted
-        }
+        body, body_zstd = self._encode_body(record.body, placeholder=None)
+        return (
+            note.id, note.version, note.title, body, record.delta,
+            record.kind.value, user_id, change_type, body_zstd
+        )
+    
+    async def _get_version_body(self, session: AsyncSession, note_id: str, version: int) -> Optional[str]:
+        """Reconstruct a version body from its nearest snapshot (at most N patches)"""
+        
+        result = await session.execute(
+            text("""
+            SELECT version, storage_kind, body, delta, body_zstd
+            FROM note_versions
+            WHERE note_id = :note_id AND version <= :version
+              AND version >= COALESCE((
+                  SELECT MAX(version) FROM note_versions
+                  WHERE note_id = :note_id AND version <= :version AND storage_kind = 'snapshot'
+              ), 0)
+            ORDER BY version, created_at
+            """),
+            {"note_id": note_id, "version": version}
+        )
+        rows = result.fetchall()
+        await self._load_body_dictionaries(row[4] for row in rows)
+        chain = [self._row_to_version_record(row) for row in rows]
+        
+        if not chain or chain[-1].version != version:
+            return None
+        return VersionDelta.reconstruct(chain)
+    
+    async def compact_version_history(self, batch_size: int = 50) -> int:
+        """Migrate full-copy version history to snapshot + delta storage
+        
+        A one-shot job: rewrites notes whose history has more snapshots than
+        the snapshot interval calls for, one note per transaction, and
+        records completion in completed_jobs so later startups skip it.
+        Short bodies legitimately stay snapshots (a delta would not be
+        smaller), so the selection is not re-run to a fixed point.
+        Duplicate version rows are removed by migration 0005. Returns the
+        number of notes compacted.
+        """
+        
+        interval = self.version_snapshot_interval
+        compacted = 0
+        last_note_id = ""
+        
+        try:
+            async with self.postgres_session() as session:
+                result = await session.execute(
+                    text("SELECT 1 FROM completed_jobs WHERE name = 'compact_version_history'")
+                )
+                if result.scalar():
+                    return 0
+            
+            while True:
+                async with self.postgres_session() as session:
+                    result = await session.execute(
+                        text("""
+                        SELECT note_id FROM note_versions
+                        WHERE note_id > :after
+                        GROUP BY note_id
+                        HAVING COUNT(*) FILTER (WHERE storage_kind = 'snapshot')
+                               > (COUNT(DISTINCT version) + :interval - 1) / :interval
+                        ORDER BY note_id
+                        LIMIT :limit
+                        """),
+                        {"after": last_note_id, "interval": interval, "limit": batch_size}
+                    )
+                    note_ids = [row[0] for row in result.fetchall()]
+                
+                if not note_ids:
+                    break
+                
+                for note_id in note_ids:
+                    await self._compact_note_versions(note_id)
+                    compacted += 1
+                last_note_id = note_ids[-1]
+            
+            async with self.postgres_session() as session:
+                await session.execute(text(
+                    "INSERT INTO completed_jobs (name) VALUES ('compact_version_history') "
+                    "ON CONFLICT (name) DO NOTHING"
+                ))
+                await session.commit()
+            
+            if compacted:
+                logger.info("Version history compacted", notes=compacted)
+            return compacted
+            
+        except Exception as e:
+            logger.error("Failed to compact version history", error=str(e))
+            return compacted
+    
+    async def _compact_note_versions(self, note_id: str):
+        """Re-encode one note's version history in a single transaction"""
+        
+        async with self.postgres_session() as session:
+            result = await session.execute(
+                text("""
+                SELECT id, version, storage_kind, body, delta, body_zstd
+                FROM note_versions
+                WHERE note_id = :note_id
+                ORDER BY version, created_at
+                FOR UPDATE
+                """),
+                {"note_id": note_id}
+            )
+            rows = result.fetchall()
+            await self._load_body_dictionaries(row[5] for row in rows)
+            
+            duplicate_ids = []
+            previous_body: Optional[str] = None
+            previous_version: Optional[int] = None
+            chain_length = 0
+            
+            for row in rows:
+                if row[1] == previous_version:
+                    duplicate_ids.append(row[0])
+                    continue
+                previous_version = row[1]
+                
+                # Rebuild the full body from the stored form
+                stored = self._row_to_version_record(row[1:])
+                if stored.kind == VersionKind.SNAPSHOT:
+                    body = stored.body
+                else:
+                    body = VersionDelta.apply(previous_body or "", stored.delta)
+                
+                record = VersionDelta.encode(
+                    previous_body, body, chain_length, self.version_snapshot_interval
+                )
+                chain_length = 1 if record.kind == VersionKind.SNAPSHOT else chain_length + 1
+                previous_body = body
+                stored_body, body_zstd = self._encode_body(record.body, placeholder=None)
+                
+                await session.execute(
+                    text("""
+                    UPDATE note_versions
+                    SET body = :body, delta = :delta, storage_kind = :storage_kind, body_zstd = :body_zstd
+                    WHERE id = :id
+                    """),
+                    {
+                        "id": row[0],
+                        "body": stored_body,
+                        "body_zstd": body_zstd,
+                        "delta": record.delta,
+                        "storage_kind": record.kind.value
+                    }
+                )
+            
+            if duplicate_ids:
+                await session.execute(
+                    text("DELETE FROM note_versions WHERE id = ANY(:ids)"),
+                    {"ids": duplicate_ids}
+                )
+            
+            await session.commit()
+    
+    def _row_to_note(self, row: Any) -> Note:
+        """Build a Note from a row in NOTE_COLUMNS order"""
+        
+        return Note(
+            id=row[0],
+            title=row[1],
+            body=self.body_codec.decode_text(row[2], row[14]),
+            tags=row[3] or [],
+            links=row[4] or [],
+            color=row[5],
+            user_id=row[6],
+            workspace_id=row[7],
+            status=DataStatus(row[8]),
+            created_at=row[9],
+            updated_at=row[10],
+            version=row[11],
+            encrypted=row[12],
+            archive_key=row[13]
+        )
+    
+    def _row_to_version_record(self, row: Any) -> VersionRecord:
+        """Build a VersionRecord from a (version, kind, body, delta, body_zstd) row"""
+        
+        return row_to_version_record((row[0], row[1], self.body_codec.decode_text(row[2], row[4]), row[3]))
+    
+    # ==================== BODY COMPRESSION ====================
+    
+    def _encode_body(self, body: Optional[str], placeholder: Optional[str] = "") -> Tuple[Optional[str], Optional[bytes]]:
+        """Stored (body, body_zstd) columns for a body
+        
+        A compressed body leaves ``placeholder`` in the text column: '' for
+        notes.body, which is NOT NULL, and NULL for note_versions.body.
+        """
+        
+        frame = self.body_codec.encode_text(body)
+        return (placeholder, frame) if frame is not None else (body, None)
+    
+    async def _unpack_cached(self, payloads: List[Optional[bytes]]) -> List[Optional[bytes]]:
+        """Cached note payloads, decompressed where they were packed"""
+        
+        await self._load_body_dictionaries(payloads)
+        return [self.body_codec.unpack(payload) if payload else payload for payload in payloads]
+    
+    async def _load_body_dictionaries(self, frames: Iterable[Optional[bytes]] = (), force: bool = False):
+        """Load dictionaries these frames need (all new ones if force) from the primary
+        
+        Dictionaries are loaded oldest first, so the newest becomes the one
+        new frames are written with.
+        """
+        
+        if not force and not self.body_codec.missing_dictionaries(frames):
+            return
+        
+        async with self.postgres_session() as session:
+            result = await session.execute(
+                text("""
+                SELECT dictionary FROM body_dictionaries
+                WHERE dict_id != ALL(:loaded)
+                ORDER BY created_at, dict_id
+                """),
+                {"loaded": list(self.body_codec.dictionaries)}
+            )
+            for row in result.fetchall():
+                dict_id = self.body_codec.add_dictionary(row[0])
+                logger.info("Body compression dictionary loaded", dict_id=dict_id)
+    
+    async def train_body_dictionary(self, force: bool = False) -> Optional[int]:
+        """Train a shared dictionary for small bodies from a sample of notes
+        
+        Runs once, when no dictionary exists yet and enough notes between
+        the compression threshold and BODY_DICTIONARY_MAX_BYTES are stored;
+        force trains a replacement. Workers racing here each add one, which
+        is harmless: every dictionary stays loadable for its frames.
+        """
+        
+        codec = self.body_codec
+        if not codec.enabled or (codec.dictionaries and not force):
+            return None
+        
+        try:
+            query = """
+            SELECT body, body_zstd FROM notes
+            WHERE status = 'active' AND archive_key IS NULL AND encrypted = false
+            ORDER BY updated_at DESC
+            LIMIT :limit
+            """
+            limit = self.body_dictionary_samples // len(self._note_sessions()) + 1
+            shard_rows = await asyncio.gather(*(
+                self._fetch_rows(session_factory, query, {"limit": limit})
+                for session_factory in self._note_sessions()
+            ))
+            rows = [row for rows_on_shard in shard_rows for row in rows_on_shard]
+            
+            await self._load_body_dictionaries(row[1] for row in rows)
+            samples = [
+                sample for sample in (codec.decode_text(row[0], row[1]).encode() for row in rows)
+                if codec.threshold <= len(sample) <= codec.dictionary_max_bytes
+            ]
+            if len(samples) < self.body_dictionary_min_samples:
+                return None
+            
+            dictionary = await asyncio.to_thread(codec.train, samples, self.body_dictionary_size)
+            dict_id = codec.dictionary_id(dictionary)
+            
+            async with self.postgres_session() as session:
+                await session.execute(
+                    text("""
+                    INSERT INTO body_dictionaries (dict_id, dictionary, samples)
+                    VALUES (:dict_id, :dictionary, :samples)
+                    ON CONFLICT (dict_id) DO NOTHING
+                    """),
+                    {"dict_id": dict_id, "dictionary": dictionary, "samples": len(samples)}
+                )
+                await session.commit()
+            
+            await self._load_body_dictionaries(force=True)
+            logger.info("Body compression dictionary trained", dict_id=dict_id,
+                        samples=len(samples), size=len(dictionary))
+            return dict_id
+            
+        except Exception as e:
+            logger.error("Failed to train body compression dictionary", error=str(e))
+            return None
     
     # ==================== BACKGROUND TASKS ====================
     
@@ -975,21 +2239,59 @@ class EnterpriseDataManager:
         
         while True:
             try:
-                # Archive old data
-                await self._archive_old_data()
-                
-                # Clean up deleted data
-                await self._cleanup_deleted_data()
+                # Archive, partition maintenance and purge run in one worker
+                await self._run_exclusive("data_lifecycle", self._maintain_shared_data)
                 
                 # Optimize cache
                 await self._optimize_cache()
                 
+                # Train the body dictionary once enough notes exist
+                await self.train_body_dictionary()
+                
                 await asyncio.sleep(3600)  # Run every hour
                 
             except Exception as e:
                 logger.error("Data lifecycle management error", error=str(e))
                 await asyncio.sleep(1800)  # Wait 30 minutes before retrying
     
+    async def _maintain_shared_data(self):
+        """Database-wide lifecycle work, done by one worker per round"""
+        
+        # Archive old data
+        await self._archive_old_data()
+        
+        # Roll time partitions forward and drop expired ones
+        await self.partition_manager.maintain()
+        
+        # Clean up deleted data
+        await self._cleanup_deleted_data()
+        
+        # Drop cold storage blobs left behind by rehydrated notes
+        await self._collect_orphaned_blobs()
+    
+    async def _run_exclusive(self, job: str, run: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a database-wide background job in at most one worker at a time
+        
+        Every worker schedules the same jobs. The first to take a
+        session-level advisory lock on the primary runs the job; the others
+        skip this round and return None.
+        """
+        
+        lock_key = zlib.crc32(f"background_job:{job}".encode())
+        async with self.postgres_engine.connect() as conn:
+            result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": lock_key})
+            acquired = result.scalar()
+            await conn.commit()
+            if not acquired:
+                logger.debug("Background job running in another worker", job=job)
+                return None
+            
+            try:
+                return await run()
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": lock_key})
+                await conn.commit()
+    
     async def _performance_monitor(self):
         """Monitor database performance"""
         
@@ -1015,8 +2317,8 @@ class EnterpriseDataManager:
         
         while True:
             try:
-                # Perform backup
-                await self._perform_backup()
+                # Perform backup, in one worker at a time
+                await self._run_exclusive("backup", self._perform_backup)
                 
                 # Wait for next backup interval
                 await asyncio.sleep(self.config.BACKUP_INTERVAL_HOURS * 3600)
@@ -1026,14 +2328,330 @@ class EnterpriseDataManager:
                 await asyncio.sleep(3600)  # Wait 1 hour before retrying
     
     async def _archive_old_data(self):
-        """Archive old data to cold storage"""
-        # Implementation would move old data to cold storage
-        pass
+        """Archive notes untouched for cold_data_threshold to cold storage
+        
+        The body is compressed into a content-addressed object and the
+        notes row is kept as a stub with an empty body and archive_key set.
+        """
+        
+        cutoff = datetime.now() - self.cold_data_threshold
+        cutoff_ts = cutoff.timestamp()
+        archived = 0
+        
+        for session_factory in self._note_sessions():
+            last_id = ""
+            
+            while True:
+                async with session_factory() as session:
+                    result = await session.execute(
+                        text("""
+                        SELECT id, body, updated_at, body_zstd
+                        FROM notes
+                        WHERE status = 'active' AND archive_key IS NULL
+                          AND updated_at < :cutoff AND id > :after
+                        ORDER BY id
+                        LIMIT :limit
+                        """),
+                        {"cutoff": cutoff, "after": last_id, "limit": self.archive_batch_size}
+                    )
+                    rows = result.fetchall()
+                
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                
+                # Skip notes that were read recently
+                access_times = await self.redis_client.zmscore("note_access", [row[0] for row in rows])
+                candidates = [
+                    row for row, accessed_at in zip(rows, access_times)
+                    if accessed_at is None or accessed_at < cutoff_ts
+                ]
+                if not candidates:
+                    continue
+                
+                # Write objects first so a stub never points at a missing blob
+                await self._load_body_dictionaries(row[3] for row in candidates)
+                stubs = []
+                for note_id, body, updated_at, body_zstd in candidates:
+                    key, data = pack_blob("notes", self.body_codec.decode_text(body, body_zstd))
+                    await self.object_store.put(key, data)
+                    stubs.append({"id": note_id, "archive_key": key, "updated_at": updated_at})
+                
+                async with session_factory() as session:
+                    await session.execute(
+                        text("""
+                        UPDATE notes SET body = '', body_zstd = NULL, archive_key = :archive_key
+                        WHERE id = :id AND updated_at = :updated_at AND archive_key IS NULL
+                        """),
+                        stubs
+                    )
+                    await session.commit()
+                
+                await self.redis_client.delete(*[f"note:{stub['id']}" for stub in stubs])
+                archived += len(stubs)
+        
+        # Forget access records older than the threshold
+        await self.redis_client.zremrangebyscore("note_access", "-inf", cutoff_ts)
+        
+        if archived:
+            self.archive_stats["archived"] += archived
+            logger.info("Archived cold notes", count=archived)
+    
+    async def _load_archived_body(self, archive_key: str) -> str:
+        """Read an archived note body from cold storage"""
+        
+        data = await self.object_store.get(archive_key)
+        if data is None:
+            raise Exception(f"Archived object missing: {archive_key}")
+        return unpack_blob(data)
+    
+    async def _rehydrate_note(self, note: Note):
+        """Restore an archived note body and promote the row back to warm"""
+        
+        note.body = await self._load_archived_body(note.archive_key)
+        
+        if self.shard_router:
+            shard = await self.shard_router.shard_for(tenant_key(note.workspace_id, note.user_id))
+            session_factory = self.shard_router.session(shard)
+        else:
+            session_factory = self.postgres_session
+        
+        body, body_zstd = self._encode_body(note.body)
+        async with session_factory() as session:
+            await session.execute(
+                text("""
+                UPDATE notes SET body = :body, body_zstd = :body_zstd, archive_key = NULL
+                WHERE id = :id AND archive_key = :archive_key
+                """),
+                {"id": note.id, "body": body, "body_zstd": body_zstd, "archive_key": note.archive_key}
+            )
+            await session.commit()
+        
+        # The blob may now be unreferenced; the lifecycle job decides
+        await self.redis_client.sadd("archive_orphans", note.archive_key)
+        note.archive_key = None
+        self.archive_stats["rehydrated"] += 1
+        
+        # Keep the next archive sweep from sending it straight back
+        await self.redis_client.zadd("note_access", {note.id: time.time()})
+        logger.debug("Note rehydrated from cold storage", note_id=note.id)
+    
+    async def _collect_orphaned_blobs(self):
+        """Delete blobs of rehydrated notes that no note refers to any more"""
+        
+        keys = list(await self.redis_client.smembers("archive_orphans"))
+        for start in range(0, len(keys), self.archive_batch_size):
+            batch = keys[start:start + self.archive_batch_size]
+            await self._delete_unreferenced_blobs(batch)
+            await self.redis_client.srem("archive_orphans", *batch)
+    
+    async def _delete_unreferenced_blobs(self, archive_keys: List[str]):
+        """Delete archived blobs that no notes row on any shard refers to
+        
+        Blobs are content-addressed, so notes with identical bodies share
+        one. Runs with the archive job under the data_lifecycle lock, so no
+        stub can start pointing at a blob between the check and the delete.
+        """
+        
+        referenced = set()
+        for session_factory in self._note_sessions():
+            async with session_factory() as session:
+                result = await session.execute(
+                    text("SELECT DISTINCT archive_key FROM notes WHERE archive_key = ANY(:keys)"),
+                    {"keys": archive_keys}
+                )
+                referenced.update(row[0] for row in result.fetchall())
+        
+        unreferenced = [key for key in archive_keys if key not in referenced]
+        for key in unreferenced:
+            await self.object_store.delete(key)
+        self.archive_stats["blobs_deleted"] += len(unreferenced)
     
     async def _cleanup_deleted_data(self):
         """Permanently delete old deleted records"""
-        # Implementation would clean up old deleted records
-        pass
+        
+        await self.purge_deleted_notes()
+    
+    async def purge_deleted_notes(self) -> int:
+        """Hard-delete notes soft-deleted longer than deleted_retention
+        
+        Candidates are read in id order from a partial index, one batch of
+        purge_batch_size notes at a time. Each batch deletes its version
+        rows in chunks of the same size, then the note rows and their
+        outgoing wikilink edges, every
+        statement in its own short transaction with lock_timeout set and a
+        pause after it, so the job never holds locks for long or writes WAL
+        in bursts. Returns the number of notes purged.
+        
+        Archived bodies of purged notes are deleted from cold storage once
+        no other note refers to the same content-addressed blob.
+        
+        Incremental backups do not record hard deletes; restoring a chain
+        brings purged rows back as soft-deleted notes for the next run.
+        """
+        
+        cutoff = datetime.now() - self.deleted_retention
+        purged = 0
+        
+        try:
+            for session_factory in self._note_sessions():
+                last_id = ""
+                
+                while True:
+                    async with session_factory() as session:
+                        result = await session.execute(
+                            text("""
+                            SELECT id FROM notes
+                            WHERE status = 'deleted' AND updated_at < :cutoff AND id > :after
+                            ORDER BY id
+                            LIMIT :limit
+                            """),
+                            {"cutoff": cutoff, "after": last_id, "limit": self.purge_batch_size}
+                        )
+                        note_ids = [row[0] for row in result.fetchall()]
+                    
+                    if not note_ids:
+                        break
+                    last_id = note_ids[-1]
+                    
+                    purged_ids, archive_keys = await self._purge_note_batch(session_factory, note_ids, cutoff)
+                    if purged_ids:
+                        await self._forget_purged_notes(purged_ids)
+                        purged += len(purged_ids)
+                    if archive_keys:
+                        await self._delete_unreferenced_blobs(archive_keys)
+            
+            self.purge_stats["last_run"] = datetime.now().isoformat()
+            if purged:
+                logger.info("Purged deleted notes", count=purged, retention_days=self.deleted_retention.days)
+            return purged
+            
+        except Exception as e:
+            logger.error("Failed to purge deleted notes", purged=purged, error=str(e))
+            raise
+    
+    async def _purge_note_batch(
+        self,
+        session_factory: async_sessionmaker,
+        note_ids: List[str],
+        cutoff: datetime
+    ) -> Tuple[List[str], List[str]]:
+        """Delete one batch of notes and their versions
+        
+        Returns the purged ids and the archive keys they referred to.
+        
+        Every statement re-checks status and updated_at, so a note restored
+        or touched since it was selected is left alone.
+        """
+        
+        params = {"note_ids": note_ids, "cutoff": cutoff, "limit": self.purge_batch_size}
+        
+        while True:
+            deleted, _ = await self._purge_statement(
+                session_factory,
+                """
+                DELETE FROM note_versions
+                WHERE id IN (
+                    SELECT v.id FROM note_versions v
+                    JOIN notes n ON n.id = v.note_id
+                    WHERE v.note_id = ANY(:note_ids)
+                      AND n.status = 'deleted' AND n.updated_at < :cutoff
+                    LIMIT :limit
+                )
+                """,
+                params
+            )
+            self.purge_stats["versions"] += deleted
+            if deleted < self.purge_batch_size:
+                break
+        
+        _, rows = await self._purge_statement(
+            session_factory,
+            """
+            DELETE FROM notes n
+            WHERE n.id = ANY(:note_ids)
+              AND n.status = 'deleted' AND n.updated_at < :cutoff
+              AND NOT EXISTS (SELECT 1 FROM note_versions v WHERE v.note_id = n.id)
+            RETURNING n.id, n.archive_key
+            """,
+            params
+        )
+        purged_ids = [row[0] for row in rows]
+        self.purge_stats["notes"] += len(purged_ids)
+        
+        # Outgoing wikilink edges; references to these notes were detached on delete
+        if purged_ids:
+            deleted, _ = await self._purge_statement(
+                session_factory,
+                "DELETE FROM note_links WHERE source_id = ANY(:note_ids)",
+                {"note_ids": purged_ids}
+            )
+            self.purge_stats["links"] += deleted
+        
+        return purged_ids, sorted({row[1] for row in rows if row[1]})
+    
+    async def _purge_statement(
+        self,
+        session_factory: async_sessionmaker,
+        statement: str,
+        params: Dict[str, Any]
+    ) -> Tuple[int, List[Any]]:
+        """Run one purge statement in its own transaction, then pause
+        
+        The pause doubles (up to purge_max_delay) when a statement is slow
+        or hits lock_timeout, and drops back to the base delay once
+        statements are fast again. Lock timeouts (SQLSTATE 55P03) are
+        retried; any other error is raised. Returns the affected row count
+        and any RETURNING rows.
+        """
+        
+        for attempt in range(self.purge_max_retries + 1):
+            start_time = time.monotonic()
+            try:
+                async with session_factory() as session:
+                    await session.execute(
+                        text("SELECT set_config('lock_timeout', :timeout, true)"),
+                        {"timeout": f"{self.purge_lock_timeout_ms}ms"}
+                    )
+                    result = await session.execute(text(statement), params)
+                    rows = result.fetchall() if result.returns_rows else []
+                    rowcount = result.rowcount
+                    await session.commit()
+                
+            except DBAPIError as e:
+                if not _is_lock_timeout(e) or attempt == self.purge_max_retries:
+                    raise
+                self._backoff_purge()
+                logger.warning("Purge statement hit lock_timeout, backing off", attempt=attempt + 1,
+                               delay=self.purge_delay, error=str(e))
+                await asyncio.sleep(self.purge_delay)
+                continue
+            
+            if time.monotonic() - start_time > self.purge_slow_statement:
+                self._backoff_purge()
+            else:
+                self.purge_delay = self.purge_base_delay
+            await asyncio.sleep(self.purge_delay)
+            
+            return rowcount, rows
+    
+    def _backoff_purge(self):
+        """Double the pause between purge statements"""
+        
+        self.purge_delay = min(self.purge_max_delay, max(self.purge_delay, 0.1) * 2)
+        self.purge_stats["backoffs"] += 1
+    
+    async def _forget_purged_notes(self, note_ids: List[str]):
+        """Drop cache, routing and access entries of purged notes"""
+        
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.delete(*[f"note:{note_id}" for note_id in note_ids])
+            pipe.delete(*[f"note_loc:{note_id}" for note_id in note_ids])
+            pipe.zrem("note_access", *note_ids)
+            await pipe.execute()
+        
+        for note_id in note_ids:
+            await self.vector_store.delete_vector(note_id)
     
     async def _optimize_cache(self):
         """Optimize Redis cache performance"""
@@ -1043,11 +2661,18 @@ class EnterpriseDataManager:
     async def _collect_performance_metrics(self) -> Dict[str, Any]:
         """Collect database performance metrics"""
         
+        query_latency = self.query_metrics.summary()
+        pools = pool_telemetry.snapshot()
+        
+        # Nested pool stats are stored as metric rows with the pool as source
         return {
             "cache_hit_rate": self.cache_stats["hits"] / max(1, self.cache_stats["hits"] + self.cache_stats["misses"]),
-            "avg_query_time": sum(m.query_time for m in self.query_metrics) / max(1, len(self.query_metrics)),
-            "active_connections": len(self.postgres_engine.pool._queue._queue) if hasattr(self.postgres_engine, 'pool') else 0,
-            "redis_memory_usage": 0  # Would get from Redis INFO
+            "avg_query_time": query_latency["mean"],
+            "p95_query_time": query_latency["p95"],
+            "p99_query_time": query_latency["p99"],
+            "active_connections": pools["postgres"]["checked_out"] if "postgres" in pools else 0,
+            "redis_memory_usage": 0,  # Would get from Redis INFO
+            **pools
         }
     
     async def _save_performance_metrics(self, metrics: Dict[str, Any]):
@@ -1064,11 +2689,30 @@ class EnterpriseDataManager:
         # Check query performance
         if metrics["avg_query_time"] > 1.0:
             logger.warning("Slow queries detected", avg_time=metrics["avg_query_time"])
+        
+        # Check tail latency
+        if metrics["p99_query_time"] > 2.0:
+            logger.warning("High p99 query latency", p99=metrics["p99_query_time"])
+        
+        # Check connection pool saturation and checkout waits
+        pool_telemetry.check_alerts(
+            self.config.DATABASE.POOL_SATURATION_ALERT,
+            self.config.DATABASE.POOL_WAIT_ALERT_MS
+        )
     
     async def _perform_backup(self):
-        """Perform database backup"""
-        # Implementation would create database backup
-        logger.info("Database backup completed")
+        """Perform an incremental (or periodic full) database backup"""
+        
+        if not self.config.ENABLE_BACKUP_SYSTEM:
+            return
+        
+        # Workers wake at different times; skip if another just took one
+        last_backup = self.backup_engine.last_backup_time()
+        interval = timedelta(hours=self.config.BACKUP_INTERVAL_HOURS)
+        if last_backup and datetime.utcnow() - last_backup < interval / 2:
+            return
+        
+        await self.backup_engine.run()
     
     async def health_check(self) -> Dict[str, Any]:
         """Data manager health check"""
@@ -1084,6 +2728,13 @@ class EnterpriseDataManager:
         except Exception as e:
             logger.error("PostgreSQL health check failed", error=str(e))
         
+        # Check replicas; unhealthy replicas are skipped by read routing
+        if self.replica_engines and postgres_healthy:
+            try:
+                await self._probe_replicas()
+            except Exception as e:
+                logger.error("PostgreSQL replica health check failed", error=str(e))
+        
         try:
             # Check Redis
             await self.redis_client.ping()
@@ -1091,12 +2742,36 @@ class EnterpriseDataManager:
         except Exception as e:
             logger.error("Redis health check failed", error=str(e))
         
+        outbox_backlog = {}
+        try:
+            outbox_backlog = await self.outbox.backlog()
+        except Exception as e:
+            logger.error("Outbox backlog check failed", error=str(e))
+        
         return {
             "healthy": postgres_healthy and redis_healthy,
             "postgres_healthy": postgres_healthy,
             "redis_healthy": redis_healthy,
             "cache_hit_rate": self.cache_stats["hits"] / max(1, self.cache_stats["hits"] + self.cache_stats["misses"]),
-            "total_queries": len(self.query_metrics),
+            "total_queries": self.query_metrics.total_queries,
+            "query_latency": self.query_metrics.snapshot(),
+            "analytics_buffer": self.analytics_buffer.get_stats(),
+            "cold_storage": self.archive_stats,
+            "purge": self.purge_stats,
+            "schema": self.schema_migrator.stats if self.schema_migrator else None,
+            "wikilinks": self.link_index.stats,
+            "body_compression": self.body_codec.get_stats(),
+            "autocomplete": self.autocomplete.get_stats(),
+            "backups": self.backup_engine.stats,
+            "replicas_healthy": sum(self.replica_healthy),
+            "replicas_total": len(self.replica_engines),
+            "replica_lag_seconds": self.replica_lag_seconds,
+            "read_routing": self.read_routing_stats,
+            "single_flight": self.single_flight.get_stats(),
+            "partitions": self.partition_manager.stats if self.partition_manager else {},
+            "shards": self.shard_router.get_stats() if self.shard_router else None,
+            "outbox": {**self.outbox.get_stats(), **outbox_backlog},
+            "connection_pools": pool_telemetry.snapshot(),
             "vector_store_healthy": len(self.vector_store.vectors) >= 0
         }
     
@@ -1105,14 +2780,33 @@ class EnterpriseDataManager:
         
         logger.info("🔄 Shutting down data management system...")
         
+        # Drain buffered analytics writes while the database is still open
+        await self.analytics_buffer.drain()
+        
+        # Stop outbox consumers; undelivered rows are picked up on restart
+        await self.outbox.stop()
+        
         # Close database connections
         if self.postgres_engine:
             await self.postgres_engine.dispose()
         
+        for engine in self.replica_engines:
+            await engine.dispose()
+        
+        if self.shard_router:
+            await self.shard_router.close()
+        
+        if self.fast_queries:
+            await self.fast_queries.close()
+        for replica_queries in self.replica_fast_queries:
+            await replica_queries.close()
+        
         if self.redis_client:
-            await self.redis_client.close()
+            await pool_telemetry.close_redis(self.redis_client)
+        if self.redis_raw_client:
+            await pool_telemetry.close_redis(self.redis_raw_client)
         
         # Clear metrics
-        self.query_metrics.clear()
+        self.query_metrics.reset()
         
         logger.info("✅ Data management system shutdown complete")
\ No newline at end of file
@@ -0,0 +1,871 @@
+"""
+🪶 EMBEDDED STORAGE BACKEND
+O5 Elite Level Single-Node Persistence
+
+This module implements the storage backend without external services:
+- SQLite in WAL mode as the note, version and analytics store
+- FTS5 full-text index standing in for vector search
+- In-process TTL/LRU cache standing in for Redis
+- In-process title autocomplete updated by note events
+- Same canonical note payloads and version encoding as the PostgreSQL backend
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterable, Set, TypeVar
+from collections import Counter, OrderedDict
+from datetime import datetime
+from pathlib import Path
+import structlog
+
+import orjson
+
+from config.enterprise_config import EnterpriseConfig
+from core.latency import QueryLatencyRecorder
+from core.autocomplete import TitleAutocomplete
+from core.storage_backend import (
+    StorageBackend, StorageTier, DataStatus, QueryMetrics, Note, NoteEvent, NoteChange,
+    NoteEventHandler, note_to_dict, serialize_note, payload_owned_by, flatten_performance_data
+)
+from core.versioning import VersionDelta, DiffGranularity, diff_texts, row_to_version_record, CURRENT_CHANGE_TYPE
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+EMBEDDED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    body TEXT,
+    tags TEXT NOT NULL DEFAULT '[]',
+    links TEXT NOT NULL DEFAULT '[]',
+    color TEXT DEFAULT '#6B7280',
+    user_id TEXT,
+    workspace_id TEXT,
+    status TEXT DEFAULT 'active',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    version INTEGER DEFAULT 1,
+    encrypted INTEGER DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_notes_user_updated ON notes(user_id, status, updated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_notes_workspace_id ON notes(workspace_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    title, body, content='notes', content_rowid='rowid'
+);
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts(rowid, title, body) VALUES (new.rowid, new.title, new.body);
+END;
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, title, body) VALUES ('delete', old.rowid, old.title, old.body);
+END;
+
+CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF title, body ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, title, body) VALUES ('delete', old.rowid, old.title, old.body);
+    INSERT INTO notes_fts(rowid, title, body) VALUES (new.rowid, new.title, new.body);
+END;
+
+CREATE TABLE IF NOT EXISTS note_versions (
+    id TEXT PRIMARY KEY,
+    note_id TEXT NOT NULL REFERENCES notes(id),
+    version INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT,
+    delta TEXT,
+    storage_kind TEXT DEFAULT 'snapshot',
+    changed_by TEXT,
+    change_type TEXT,
+    created_at TEXT NOT NULL,
+    UNIQUE (note_id, version)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_events (
+    id TEXT PRIMARY KEY,
+    event_type TEXT NOT NULL,
+    user_id TEXT,
+    session_id TEXT,
+    data TEXT,
+    timestamp TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_analytics_events_timestamp ON analytics_events(timestamp);
+
+CREATE TABLE IF NOT EXISTS performance_metrics (
+    id TEXT PRIMARY KEY,
+    metric_type TEXT NOT NULL,
+    value REAL NOT NULL,
+    dimensions TEXT,
+    timestamp TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_performance_metrics_timestamp ON performance_metrics(timestamp);
+"""
+
+NOTE_SELECT = """
+SELECT id, title, body, tags, links, color, user_id, workspace_id,
+       status, created_at, updated_at, version, encrypted
+FROM notes
+"""
+
+class InProcessCache:
+    """Bounded LRU cache with per-entry TTL, standing in for Redis"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.entries[key] = (value, time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+class EmbeddedDataManager(StorageBackend):
+    """Storage backend on an embedded SQLite database
+
+    All statements run on one connection owned by a single worker thread,
+    so SQLite never sees concurrent use of a connection and the event loop
+    never blocks on disk I/O. WAL mode keeps readers of the file (e.g.
+    backups or a second process) from blocking the writer.
+    """
+
+    def __init__(self, config: EnterpriseConfig):
+        self.config = config
+        self.db_path = config.EMBEDDED_DB_PATH
+        self.connection: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedded-store")
+
+        self.cache = InProcessCache(config.EMBEDDED_CACHE_MAX_ENTRIES)
+        self.hot_data_ttl = 3600  # Same as the Redis note cache
+        self.list_cache_ttl = 600
+        self.version_snapshot_interval = max(1, config.VERSION_SNAPSHOT_INTERVAL)
+
+        self.query_metrics = QueryLatencyRecorder(window_seconds=300, slices=5)
+        self.note_handlers: List[Tuple[str, NoteEventHandler, Set[NoteEvent]]] = []
+
+        self.autocomplete = TitleAutocomplete(
+            self._load_title_rows,
+            max_tenants=config.AUTOCOMPLETE_MAX_TENANTS,
+            max_age=config.AUTOCOMPLETE_MAX_AGE_SECONDS
+        )
+        self.register_note_handler("autocomplete", self._publish_note_title)
+        self.initialized = False
+
+    async def initialize(self):
+        """Open the database and create the schema"""
+
+        await self._run(self._open)
+        self.initialized = True
+        logger.info("✅ Embedded storage initialized", path=self.db_path)
+
+    # ==================== NOTE OPERATIONS ====================
+
+    async def create_note(self, note_data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        """Create a new note"""
+
+        start_time = time.time()
+
+        try:
+            note = Note(
+                id=str(uuid.uuid4()),
+                title=note_data.get("title", "Untitled Note"),
+                body=note_data.get("body", ""),
+                tags=note_data.get("tags", []),
+                links=note_data.get("links", []),
+                color=note_data.get("color", "#6B7280"),
+                user_id=user_id,
+                workspace_id=note_data.get("workspace_id"),
+                encrypted=note_data.get("encrypted", False)
+            )
+
+            await self._run(self._insert_note, note)
+            self.cache.set(f"note:{note.id}", serialize_note(note), self.hot_data_ttl)
+            self._invalidate_lists(user_id)
+            await self._publish(NoteEvent.CREATED, note)
+
+            self._record("create_note", start_time, 1, False)
+            return note_to_dict(note)
+
+        except Exception as e:
+            logger.error("Failed to create note", user_id=user_id, error=str(e))
+            raise
+
+    async def get_note(self, note_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a note owned by user_id"""
+
+        payload = await self.get_note_payload(note_id, user_id)
+        return orjson.loads(payload) if payload else None
+
+    async def get_note_payload(self, note_id: str, user_id: str) -> Optional[bytes]:
+        """Get a note as canonical JSON bytes"""
+
+        start_time = time.time()
+
+        cached = self.cache.get(f"note:{note_id}")
+        if cached and payload_owned_by(cached, user_id):
+            self._record("get_note", start_time, 1, True)
+            return cached
+
+        note = await self._run(self._select_note, note_id, user_id)
+        if not note:
+            return None
+
+        payload = serialize_note(note)
+        self.cache.set(f"note:{note_id}", payload, self.hot_data_ttl)
+        self._record("get_note", start_time, 1, False)
+        return payload
+
+    async def update_note(self, note_id: str, note_data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        """Update a note, versioning the previous content"""
+
+        start_time = time.time()
+
+        try:
+            note = await self._run(self._update_note, note_id, note_data, user_id)
+            if not note:
+                raise Exception("Note not found")
+
+            self.cache.set(f"note:{note_id}", serialize_note(note), self.hot_data_ttl)
+            self._invalidate_lists(user_id)
+            await self._publish(NoteEvent.UPDATED, note)
+
+            self._record("update_note", start_time, 1, False)
+            return note_to_dict(note)
+
+        except Exception as e:
+            logger.error("Failed to update note", note_id=note_id, user_id=user_id, error=str(e))
+            raise
+
+    async def get_notes(self, user_id: str, limit: int = 50, offset: int = 0, workspace_id: str = None) -> List[Dict[str, Any]]:
+        """Get a page of active notes, newest first"""
+
+        start_time = time.time()
+        cache_key = f"notes:{user_id}:{limit}:{offset}:{workspace_id or 'all'}"
+
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self._record("get_notes", start_time, len(cached), True)
+            return [dict(note_data) for note_data in cached]
+
+        notes = await self._run(self._select_notes_page, user_id, limit, offset, workspace_id)
+        notes_data = [note_to_dict(note) for note in notes]
+        self.cache.set(cache_key, notes_data, self.list_cache_ttl)
+
+        self._record("get_notes", start_time, len(notes_data), False)
+        return [dict(note_data) for note_data in notes_data]
+
+    async def vector_search(self, query: str, user_id: str, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        """Full-text search over a user's notes (FTS5 BM25 ranking)"""
+
+        start_time = time.time()
+
+        try:
+            results = await self._run(self._search_notes, query, user_id, limit, offset)
+
+            notes = []
+            for note, rank in results:
+                note_data = note_to_dict(note)
+                # bm25() is lower-is-better and unbounded; map to (0, 1]
+                note_data["similarity_score"] = 1.0 / (1.0 + max(0.0, -rank))
+                notes.append(note_data)
+
+            self._record("vector_search", start_time, len(notes), False, StorageTier.VECTOR)
+            return notes
+
+        except Exception as e:
+            logger.error("Full-text search failed", query=query, user_id=user_id, error=str(e))
+            raise
+
+    async def delete_note(self, note_id: str, user_id: str) -> bool:
+        """Soft delete a note"""
+
+        note = await self._run(self._delete_note, note_id, user_id)
+        if not note:
+            return False
+
+        self.cache.delete(f"note:{note_id}")
+        self._invalidate_lists(user_id)
+        await self._publish(NoteEvent.DELETED, note)
+        return True
+
+    # ==================== VERSIONING ====================
+
+    async def create_version(self, note_id: str, user_id: str) -> str:
+        """Create an explicit version of a note"""
+
+        return await self._run(self._create_manual_version, note_id, user_id)
+
+    async def get_note_versions(
+        self,
+        note_id: str,
+        user_id: str,
+        limit: int = 50,
+        before_version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """List version metadata newest-first with keyset pagination"""
+
+        rows = await self._run(self._select_versions, note_id, user_id, limit + 1, before_version)
+
+        has_more = len(rows) > limit
+        versions = [
+            {
+                "note_id": note_id,
+                "version": row[0],
+                "title": row[1],
+                "changed_by": row[2],
+                "change_type": row[3],
+                "created_at": row[4]
+            }
+            for row in rows[:limit]
+        ]
+
+        return {
+            "versions": versions,
+            "next_cursor": versions[-1]["version"] if has_more else None
+        }
+
+    async def get_note_version(self, note_id: str, version: int, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single reconstructed version of a note"""
+
+        return await self._run(self._select_version, note_id, version, user_id)
+
+    async def diff_note_versions(
+        self,
+        note_id: str,
+        from_version: int,
+        to_version: int,
+        user_id: str,
+        granularity: DiffGranularity = DiffGranularity.LINE
+    ) -> Optional[Dict[str, Any]]:
+        """Diff two versions of a note (cached unless one side is the live version)"""
+
+        cache_key = f"note_diff:{note_id}:{from_version}:{to_version}:{granularity.value}:{user_id}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        old = await self.get_note_version(note_id, from_version, user_id)
+        new = await self.get_note_version(note_id, to_version, user_id)
+        if not old or not new:
+            return None
+
+        diff = {
+            "note_id": note_id,
+            "from_version": from_version,
+            "to_version": to_version,
+            "granularity": granularity.value,
+            "title": diff_texts(old["title"], new["title"], DiffGranularity.WORD),
+            "body": diff_texts(old["body"] or "", new["body"] or "", granularity)
+        }
+        if CURRENT_CHANGE_TYPE not in (old["change_type"], new["change_type"]):
+            self.cache.set(cache_key, diff, 86400)
+        return diff
+
+    # ==================== TITLE AUTOCOMPLETE ====================
+
+    async def autocomplete_titles(
+        self,
+        user_id: str,
+        query: str,
+        workspace_id: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Top titles of the user's notes in a workspace (or personal notes) for a [[ query"""
+
+        return await self.autocomplete.suggest(self._title_tenant(user_id, workspace_id), query, limit)
+
+    @staticmethod
+    def _title_tenant(user_id: str, workspace_id: Optional[str]) -> str:
+        # No workspace membership in single-node mode: notes are scoped to their owner
+        return f"{user_id}|{workspace_id or ''}"
+
+    async def _load_title_rows(self, tenant: str) -> List[Tuple[str, str, float, int]]:
+        user_id, _, workspace_id = tenant.rpartition("|")
+        return await self._run(self._select_title_rows, user_id, workspace_id or None)
+
+    async def _publish_note_title(self, change: NoteChange):
+        note = change.note
+        title = None if change.event_type == NoteEvent.DELETED else note["title"]
+        await self.autocomplete.publish(
+            self._title_tenant(change.user_id, change.workspace_id),
+            change.note_id,
+            title,
+            datetime.fromisoformat(note["updated_at"]).timestamp()
+        )
+
+    # ==================== NOTE EVENTS ====================
+
+    def register_note_handler(
+        self,
+        name: str,
+        handler: NoteEventHandler,
+        event_types: Optional[Iterable[NoteEvent]] = None
+    ):
+        """Run handler in-process after every committed note change"""
+
+        self.note_handlers.append((name, handler, set(event_types or NoteEvent)))
+
+    async def _publish(self, event_type: NoteEvent, note: Note):
+        """Run note handlers for a committed change
+
+        Single-node mode has no outbox: a failing handler is logged and the
+        change is not redelivered.
+        """
+
+        change = NoteChange(
+            event_type=event_type,
+            note_id=note.id,
+            user_id=note.user_id,
+            workspace_id=note.workspace_id,
+            payload=serialize_note(note)
+        )
+        for name, handler, event_types in self.note_handlers:
+            if event_type not in event_types:
+                continue
+            try:
+                await handler(change)
+            except Exception as e:
+                logger.error("Note handler failed", handler=name, note_id=note.id, error=str(e))
+
+    # ==================== PERMISSIONS ====================
+
+    async def can_edit_note(self, note_id: str, user_id: str) -> bool:
+        """Check if user can edit note"""
+
+        note = await self._run(self._select_note, note_id, user_id)
+        return note is not None
+
+    # ==================== ANALYTICS ====================
+
+    async def save_model_performance(self, request_id: str, performance_data: Dict[str, Any]):
+        """Record an AI model performance event"""
+
+        try:
+            await self._run(
+                self._execute_many,
+                "INSERT INTO analytics_events (id, event_type, data, timestamp) VALUES (?, ?, ?, ?)",
+                [(str(uuid.uuid4()), "ai_model_performance", json.dumps(performance_data, default=str), datetime.now().isoformat())]
+            )
+        except Exception as e:
+            logger.error("Failed to save model performance", request_id=request_id, error=str(e))
+
+    async def get_model_performance_history(self) -> Dict[str, Any]:
+        """Get historical model performance data"""
+
+        return {}
+
+    async def save_performance_snapshot(
+        self,
+        performance_data: Dict[str, Any],
+        dimensions: Optional[Dict[str, Any]] = None
+    ):
+        """Save a performance snapshot in a single transaction"""
+
+        try:
+            timestamp = datetime.now().isoformat()
+            rows = [
+                (
+                    str(uuid.uuid4()),
+                    metric_type,
+                    value,
+                    json.dumps(metric_dimensions, default=str) if metric_dimensions else None,
+                    timestamp
+                )
+                for metric_type, value, metric_dimensions
+                in flatten_performance_data(performance_data, dimensions or {})
+            ]
+            if rows:
+                await self._run(
+                    self._execute_many,
+                    "INSERT INTO performance_metrics (id, metric_type, value, dimensions, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+        except Exception as e:
+            logger.error("Failed to save performance snapshot", error=str(e))
+
+    # ==================== HEALTH & SHUTDOWN ====================
+
+    async def health_check(self) -> Dict[str, Any]:
+        """Embedded storage health check"""
+
+        healthy = False
+        try:
+            await self._run(lambda: self.connection.execute("SELECT 1").fetchone())
+            healthy = True
+        except Exception as e:
+            logger.error("Embedded storage health check failed", error=str(e))
+
+        return {
+            "healthy": healthy,
+            "backend": "embedded",
+            "path": self.db_path,
+            "cache_entries": len(self.cache.entries),
+            "cache_hit_rate": self.cache.hits / max(1, self.cache.hits + self.cache.misses),
+            "autocomplete": self.autocomplete.get_stats(),
+            "total_queries": self.query_metrics.total_queries,
+            "query_latency": self.query_metrics.snapshot()
+        }
+
+    async def shutdown(self):
+        """Checkpoint the WAL and close the database"""
+
+        if self.connection:
+            await self._run(self._close)
+        self._executor.shutdown(wait=True)
+        self.cache.clear()
+        self.query_metrics.reset()
+        logger.info("✅ Embedded storage shutdown complete")
+
+    # ==================== PRIVATE METHODS ====================
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a blocking database function on the storage thread"""
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _record(self, operation: str, start_time: float, rows: int, cache_hit: bool, tier: Optional[StorageTier] = None):
+        """Record query latency"""
+
+        self.query_metrics.record(operation, QueryMetrics(
+            query_time=time.time() - start_time,
+            rows_returned=rows,
+            cache_hit=cache_hit,
+            storage_tier=tier or (StorageTier.HOT if cache_hit else StorageTier.WARM)
+        ))
+
+    def _invalidate_lists(self, user_id: str):
+        """Drop a user's cached list pages (cheap in-process, unlike Redis SCAN)"""
+
+        prefix = f"notes:{user_id}:"
+        for key in [key for key in self.cache.entries if key.startswith(prefix)]:
+            self.cache.delete(key)
+
+    # All methods below run on the storage thread
+
+    def _open(self):
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.execute("PRAGMA busy_timeout=5000")
+        self.connection.executescript(EMBEDDED_SCHEMA)
+
+    def _close(self):
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.connection.close()
+        self.connection = None
+
+    def _execute_many(self, sql: str, rows: List[Tuple[Any, ...]]):
+        with self._transaction():
+            self.connection.executemany(sql, rows)
+
+    def _transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT/ROLLBACK context"""
+
+        connection = self.connection
+
+        class Transaction:
+            def __enter__(self):
+                connection.execute("BEGIN IMMEDIATE")
+
+            def __exit__(self, exc_type, exc, tb):
+                connection.execute("ROLLBACK" if exc_type else "COMMIT")
+                return False
+
+        return Transaction()
+
+    @staticmethod
+    def _row_to_note(row: Tuple[Any, ...]) -> Note:
+        return Note(
+            id=row[0],
+            title=row[1],
+            body=row[2],
+            tags=json.loads(row[3]),
+            links=json.loads(row[4]),
+            color=row[5],
+            user_id=row[6],
+            workspace_id=row[7],
+            status=DataStatus(row[8]),
+            created_at=datetime.fromisoformat(row[9]),
+            updated_at=datetime.fromisoformat(row[10]),
+            version=row[11],
+            encrypted=bool(row[12])
+        )
+
+    def _insert_note(self, note: Note):
+        with self._transaction():
+            self.connection.execute(
+                """
+                INSERT INTO notes (id, title, body, tags, links, color, user_id, workspace_id,
+                                   status, created_at, updated_at, version, encrypted)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    note.id, note.title, note.body, json.dumps(note.tags), json.dumps(note.links),
+                    note.color, note.user_id, note.workspace_id, note.status.value,
+                    note.created_at.isoformat(), note.updated_at.isoformat(), note.version, int(note.encrypted)
+                )
+            )
+
+    def _select_note(self, note_id: str, user_id: str) -> Optional[Note]:
+        row = self.connection.execute(
+            NOTE_SELECT + "WHERE id = ? AND user_id = ? AND status != 'deleted'",
+            (note_id, user_id)
+        ).fetchone()
+        return self._row_to_note(row) if row else None
+
+    def _select_notes_page(self, user_id: str, limit: int, offset: int, workspace_id: Optional[str]) -> List[Note]:
+        query = NOTE_SELECT + "WHERE user_id = ? AND status = 'active'"
+        params: List[Any] = [user_id]
+        if workspace_id:
+            query += " AND workspace_id = ?"
+            params.append(workspace_id)
+        query += " ORDER BY updated_at DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        return [self._row_to_note(row) for row in self.connection.execute(query, params).fetchall()]
+
+    def _select_title_rows(self, user_id: str, workspace_id: Optional[str]) -> List[Tuple[str, str, float, int]]:
+        query = "SELECT id, title, updated_at, links FROM notes WHERE user_id = ? AND status != 'deleted'"
+        params: List[Any] = [user_id]
+        if workspace_id:
+            query += " AND workspace_id = ?"
+            params.append(workspace_id)
+        else:
+            query += " AND workspace_id IS NULL"
+        rows = self.connection.execute(query, params).fetchall()
+
+        backlinks = Counter(target for row in rows for target in set(json.loads(row[3])))
+        return [(row[0], row[1], datetime.fromisoformat(row[2]).timestamp(), backlinks[row[0]]) for row in rows]
+
+    def _search_notes(self, query: str, user_id: str, limit: int, offset: int) -> List[Tuple[Note, float]]:
+        # Quote every term so user input is never parsed as FTS5 syntax
+        terms = [term.replace('"', '""') for term in query.split()]
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"' for term in terms)
+
+        rows = self.connection.execute(
+            """
+            SELECT n.id, n.title, n.body, n.tags, n.links, n.color, n.user_id, n.workspace_id,
+                   n.status, n.created_at, n.updated_at, n.version, n.encrypted, bm25(notes_fts)
+            FROM notes_fts
+            JOIN notes n ON n.rowid = notes_fts.rowid
+            WHERE notes_fts MATCH ? AND n.user_id = ? AND n.status = 'active'
+            ORDER BY bm25(notes_fts)
+            LIMIT ? OFFSET ?
+            """,
+            (match, user_id, limit, offset)
+        ).fetchall()
+        return [(self._row_to_note(row[:13]), row[13]) for row in rows]
+
+    def _update_note(self, note_id: str, note_data: Dict[str, Any], user_id: str) -> Optional[Note]:
+        with self._transaction():
+            note = self._select_note(note_id, user_id)
+            if not note:
+                return None
+
+            self._insert_version(note, user_id, "update")
+
+            note.title = note_data.get("title", note.title)
+            note.body = note_data.get("body", note.body)
+            note.tags = note_data.get("tags", note.tags)
+            note.links = note_data.get("links", note.links)
+            note.color = note_data.get("color", note.color)
+            note.updated_at = datetime.now()
+            note.version += 1
+
+            self.connection.execute(
+                """
+                UPDATE notes SET title = ?, body = ?, tags = ?, links = ?, color = ?,
+                                 updated_at = ?, version = ?
+                WHERE id = ?
+                """,
+                (
+                    note.title, note.body, json.dumps(note.tags), json.dumps(note.links), note.color,
+                    note.updated_at.isoformat(), note.version, note.id
+                )
+            )
+        return note
+
+    def _delete_note(self, note_id: str, user_id: str) -> Optional[Note]:
+        with self._transaction():
+            note = self._select_note(note_id, user_id)
+            if not note:
+                return None
+
+            self._insert_version(note, user_id, "delete")
+            note.status = DataStatus.DELETED
+            note.updated_at = datetime.now()
+            self.connection.execute(
+                "UPDATE notes SET status = ?, updated_at = ? WHERE id = ?",
+                (note.status.value, note.updated_at.isoformat(), note_id)
+            )
+        return note
+
+    def _create_manual_version(self, note_id: str, user_id: str) -> str:
+        with self._transaction():
+            note = self._select_note(note_id, user_id)
+            return self._insert_version(note, user_id, "manual") if note else ""
+
+    def _insert_version(self, note: Note, user_id: str, change_type: str) -> str:
+        """Delta-encode and insert a version (caller holds the transaction)"""
+
+        chain_rows = self.connection.execute(
+            """
+            SELECT id, version, storage_kind, body, delta
+            FROM note_versions
+            WHERE note_id = ? AND version <= ?
+              AND version >= COALESCE((
+                  SELECT MAX(version) FROM note_versions
+                  WHERE note_id = ? AND version < ? AND storage_kind = 'snapshot'
+              ), 0)
+            ORDER BY version, created_at
+            """,
+            (note.id, note.version, note.id, note.version)
+        ).fetchall()
+
+        for row in chain_rows:
+            if row[1] == note.version:
+                return row[0]
+
+        chain = [row_to_version_record(row[1:]) for row in chain_rows]
+        previous_body = VersionDelta.reconstruct(chain) if chain else None
+        chain_length = len({record.version for record in chain})
+        record = VersionDelta.encode(
+            previous_body, note.body, chain_length, self.version_snapshot_interval
+        )
+
+        version_id = str(uuid.uuid4())
+        self.connection.execute(
+            """
+            INSERT INTO note_versions (id, note_id, version, title, body, delta,
+                                       storage_kind, changed_by, change_type, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                version_id, note.id, note.version, note.title, record.body, record.delta,
+                record.kind.value, user_id, change_type, datetime.now().isoformat()
+            )
+        )
+        return version_id
+
+    def _select_versions(
+        self,
+        note_id: str,
+        user_id: str,
+        limit: int,
+        before_version: Optional[int]
+    ) -> List[Tuple[Any, ...]]:
+        # The live version is listed until an update stores it
+        query = f"""
+        SELECT version, title, changed_by, change_type, created_at FROM (
+            SELECT v.version, v.title, v.changed_by, v.change_type, v.created_at
+            FROM note_versions v
+            JOIN notes n ON n.id = v.note_id
+            WHERE v.note_id = ? AND n.user_id = ?
+            UNION ALL
+            SELECT n.version, n.title, n.user_id, '{CURRENT_CHANGE_TYPE}', n.updated_at
+            FROM notes n
+            WHERE n.id = ? AND n.user_id = ?
+              AND NOT EXISTS (SELECT 1 FROM note_versions v WHERE v.note_id = n.id AND v.version = n.version)
+        )
+        """
+        params: List[Any] = [note_id, user_id, note_id, user_id]
+        if before_version is not None:
+            query += " WHERE version < ?"
+            params.append(before_version)
+        query += " ORDER BY version DESC LIMIT ?"
+        params.append(limit)
+
+        return self.connection.execute(query, params).fetchall()
+
+    def _select_live_version(self, note_id: str, version: int, user_id: str) -> Optional[Dict[str, Any]]:
+        """The note's current state, when it is the requested version"""
+
+        row = self.connection.execute(
+            "SELECT title, body, updated_at FROM notes WHERE id = ? AND user_id = ? AND version = ?",
+            (note_id, user_id, version)
+        ).fetchone()
+        if not row:
+            return None
+
+        return {
+            "note_id": note_id,
+            "version": version,
+            "title": row[0],
+            "body": row[1],
+            "changed_by": user_id,
+            "change_type": CURRENT_CHANGE_TYPE,
+            "created_at": row[2]
+        }
+
+    def _select_version(self, note_id: str, version: int, user_id: str) -> Optional[Dict[str, Any]]:
+        row = self.connection.execute(
+            """
+            SELECT v.version, v.title, v.changed_by, v.change_type, v.created_at
+            FROM note_versions v
+            JOIN notes n ON n.id = v.note_id
+            WHERE v.note_id = ? AND v.version = ? AND n.user_id = ?
+            """,
+            (note_id, version, user_id)
+        ).fetchone()
+        if not row:
+            return self._select_live_version(note_id, version, user_id)
+
+        chain_rows = self.connection.execute(
+            """
+            SELECT version, storage_kind, body, delta
+            FROM note_versions
+            WHERE note_id = ? AND version <= ?
+              AND version >= COALESCE((
+                  SELECT MAX(version) FROM note_versions
+                  WHERE note_id = ? AND version <= ? AND storage_kind = 'snapshot'
+              ), 0)
+            ORDER BY version, created_at
+            """,
+            (note_id, version, note_id, version)
+        ).fetchall()
+        chain = [row_to_version_record(chain_row) for chain_row in chain_rows]
+
+        return {
+            "note_id": note_id,
+            "version": row[0],
+            "title": row[1],
+            "body": VersionDelta.reconstruct(chain) if chain else None,
+            "changed_by": row[2],
+            "change_type": row[3],
+            "created_at": row[4]
+        }
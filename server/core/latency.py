@@ -0,0 +1,196 @@
+"""
+⏱️ STREAMING LATENCY HISTOGRAMS
+O5 Elite Level Query Telemetry
+
+This module implements fixed-memory latency recording:
+- Log-bucketed histograms with bounded relative error (DDSketch-style)
+- Sliding windows built from rotating sub-window histograms
+- Per operation × storage tier × cache-hit series
+- Percentile queries in O(buckets)
+"""
+
+import math
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+class LatencyHistogram:
+    """Log-bucketed histogram with fixed relative accuracy
+
+    Values are placed in buckets whose bounds grow geometrically by
+    ``gamma = (1 + alpha) / (1 - alpha)``, so any reported quantile is
+    within ``alpha`` relative error. Values outside ``[min_value,
+    max_value]`` are clamped into the first or last bucket, which keeps
+    the bucket count (and memory) fixed.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.02, min_value: float = 1e-6, max_value: float = 120.0):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self._offset = math.ceil(math.log(min_value) / self._log_gamma)
+        self.bucket_count = math.ceil(math.log(max_value) / self._log_gamma) - self._offset + 1
+
+        self.buckets: List[int] = [0] * self.bucket_count
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        """Record a latency in seconds"""
+
+        index = math.ceil(math.log(max(value, self.min_value)) / self._log_gamma) - self._offset
+        self.buckets[min(max(index, 0), self.bucket_count - 1)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram with the same layout into this one"""
+
+        for index, bucket in enumerate(other.buckets):
+            if bucket:
+                self.buckets[index] += bucket
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantiles(self, qs: Tuple[float, ...] = (0.5, 0.95, 0.99)) -> List[float]:
+        """Get several quantiles in a single pass over the buckets"""
+
+        if not self.count:
+            return [0.0 for _ in qs]
+
+        ranks = sorted((q * (self.count - 1), position) for position, q in enumerate(qs))
+        results = [0.0] * len(qs)
+        seen = 0
+        pending = 0
+
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            while pending < len(ranks) and seen > ranks[pending][0]:
+                # Midpoint of the bucket in log space
+                value = 2 * self.gamma ** (index + self._offset) / (1 + self.gamma)
+                results[ranks[pending][1]] = min(value, self.max)
+                pending += 1
+            if pending == len(ranks):
+                break
+
+        return results
+
+    def describe(self) -> Dict[str, Any]:
+        """Count, mean, max and p50/p95/p99"""
+
+        p50, p95, p99 = self.quantiles((0.5, 0.95, 0.99))
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": p50,
+            "p95": p95,
+            "p99": p99
+        }
+
+    def reset(self):
+        """Clear all recorded values"""
+
+        self.buckets = [0] * self.bucket_count
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+class WindowedHistogram:
+    """Sliding-window histogram made of rotating sub-windows
+
+    The window is split into ``slices`` sub-histograms; recording goes to
+    the current slice and slices older than the window are reset in place,
+    so memory stays at ``slices`` histograms.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, slices: int = 5, **histogram_options):
+        self.slice_seconds = window_seconds / slices
+        self.slices = [LatencyHistogram(**histogram_options) for _ in range(slices)]
+        self.slice_ids = [0] * slices
+        self.histogram_options = histogram_options
+
+    def record(self, value: float, now: Optional[float] = None):
+        """Record a latency in seconds"""
+
+        self._current_slice(now if now is not None else time.monotonic()).record(value)
+
+    def snapshot(self, now: Optional[float] = None) -> LatencyHistogram:
+        """Merge the live slices into a single histogram"""
+
+        slice_id = int((now if now is not None else time.monotonic()) // self.slice_seconds)
+        merged = LatencyHistogram(**self.histogram_options)
+        for index, histogram in enumerate(self.slices):
+            if slice_id - self.slice_ids[index] < len(self.slices):
+                merged.merge(histogram)
+        return merged
+
+    def reset(self):
+        """Clear every slice"""
+
+        for histogram in self.slices:
+            histogram.reset()
+
+    def _current_slice(self, now: float) -> LatencyHistogram:
+        """Get the slice for now, rotating out a stale one if needed"""
+
+        slice_id = int(now // self.slice_seconds)
+        index = slice_id % len(self.slices)
+        if self.slice_ids[index] != slice_id:
+            self.slices[index].reset()
+            self.slice_ids[index] = slice_id
+        return self.slices[index]
+
+class QueryLatencyRecorder:
+    """Fixed-memory query latency recorder keyed by operation, tier and cache hit"""
+
+    def __init__(self, window_seconds: float = 300.0, slices: int = 5):
+        self.window_seconds = window_seconds
+        self.slices = slices
+        self.series: Dict[Tuple[str, str, bool], WindowedHistogram] = {}
+        self.total_queries = 0
+        self.total_rows = 0
+
+    def record(self, operation: str, metrics: Any):
+        """Record a QueryMetrics sample for an operation"""
+
+        key = (operation, metrics.storage_tier.value, metrics.cache_hit)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = WindowedHistogram(self.window_seconds, self.slices)
+
+        series.record(metrics.query_time)
+        self.total_queries += 1
+        self.total_rows += metrics.rows_returned
+
+    def summary(self) -> Dict[str, Any]:
+        """Window-wide count, mean and percentiles across all series"""
+
+        merged = LatencyHistogram()
+        for series in self.series.values():
+            merged.merge(series.snapshot())
+        return self._describe(merged)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-series window statistics"""
+
+        return {
+            f"{operation}:{tier}:{'hit' if cache_hit else 'miss'}": self._describe(series.snapshot())
+            for (operation, tier, cache_hit), series in self.series.items()
+        }
+
+    def reset(self):
+        """Drop all series"""
+
+        self.series.clear()
+        self.total_queries = 0
+        self.total_rows = 0
+
+    @staticmethod
+    def _describe(histogram: LatencyHistogram) -> Dict[str, Any]:
+        """Describe a histogram as count, mean, max and p50/p95/p99"""
+
+        return histogram.describe()
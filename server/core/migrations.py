@@ -0,0 +1,205 @@
+"""
+🧬 SCHEMA MIGRATIONS
+O5 Elite Level Schema Versioning
+
+This module implements versioned schema migrations:
+- Ordered, numbered SQL files per database role (primary, shard)
+- A schema_version table recording what each database has applied
+- A single-query "already current" check on the startup fast path
+- A Postgres advisory lock so exactly one worker migrates at a time
+- Checksums that flag migration files edited after they were applied
+"""
+
+import hashlib
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Awaitable
+from dataclasses import dataclass
+import structlog
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncConnection
+
+logger = structlog.get_logger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+MIGRATION_FILE = re.compile(r"^(\d{4})_([a-z0-9_]+)\.sql$")
+
+SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum VARCHAR(64) NOT NULL,
+    duration_ms DOUBLE PRECISION,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# Runs inside a migration's transaction, before its SQL
+MigrationHook = Callable[[AsyncConnection], Awaitable[None]]
+
+@dataclass
+class Migration:
+    """One numbered migration file"""
+    version: int
+    name: str
+    sql: str
+    checksum: str
+
+def load_migrations(directory: Path) -> List[Migration]:
+    """Read ``NNNN_name.sql`` files, which must be numbered 1..N without gaps"""
+
+    migrations = []
+    for path in sorted(directory.glob("*.sql")):
+        match = MIGRATION_FILE.match(path.name)
+        if not match:
+            raise ValueError(f"Invalid migration file name: {path.name}")
+
+        sql = path.read_text()
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=match.group(2),
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode()).hexdigest()
+        ))
+
+    versions = [migration.version for migration in migrations]
+    if versions != list(range(1, len(migrations) + 1)):
+        raise ValueError(f"Migrations in {directory} must be numbered 1..N: {versions}")
+
+    return migrations
+
+class SchemaMigrator:
+    """Apply one migration set to one database
+
+    Startup costs one ``MAX(version)`` query when the database is current.
+    Otherwise the worker takes a session-level advisory lock (other workers
+    block on it), re-reads schema_version and applies each pending
+    migration in its own transaction together with its schema_version row.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        migration_set: str,
+        hooks: Optional[Dict[int, MigrationHook]] = None,
+        directory: Path = MIGRATIONS_DIR
+    ):
+        self.engine = engine
+        self.migration_set = migration_set
+        self.migrations = load_migrations(directory / migration_set)
+        self.hooks = hooks or {}
+        self.lock_key = zlib.crc32(f"schema_migrations:{migration_set}".encode())
+
+        self.stats: Dict[str, Any] = {
+            "migration_set": migration_set,
+            "version": None,
+            "latest": self.latest_version,
+            "applied": 0,
+            "check_ms": 0.0
+        }
+
+    @property
+    def latest_version(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    async def current_version(self) -> int:
+        """Highest applied version, 0 before the first migration"""
+
+        try:
+            async with self.engine.connect() as conn:
+                result = await conn.execute(text("SELECT MAX(version) FROM schema_version"))
+                return result.scalar() or 0
+        except ProgrammingError:
+            # schema_version does not exist yet
+            return 0
+
+    async def migrate(self) -> int:
+        """Bring the database up to date, returning the number of migrations applied"""
+
+        start_time = time.perf_counter()
+        current = await self.current_version()
+        self.stats["check_ms"] = (time.perf_counter() - start_time) * 1000
+        self.stats["version"] = current
+
+        if current >= self.latest_version:
+            if current > self.latest_version:
+                logger.warning("Database schema is newer than this build",
+                               migration_set=self.migration_set, version=current, latest=self.latest_version)
+            return 0
+
+        try:
+            async with self.engine.connect() as conn:
+                # Session-level lock: held across the per-migration transactions
+                await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": self.lock_key})
+                await conn.commit()
+
+                try:
+                    applied = await self._apply_pending(conn)
+                finally:
+                    await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+                    await conn.commit()
+
+            self.stats["version"] = self.latest_version
+            self.stats["applied"] += applied
+            return applied
+
+        except Exception as e:
+            logger.error("Schema migration failed", migration_set=self.migration_set, error=str(e))
+            raise
+
+    # ==================== PRIVATE METHODS ====================
+
+    async def _apply_pending(self, conn: AsyncConnection) -> int:
+        """Apply what is still pending once the lock is held"""
+
+        async with conn.begin():
+            await conn.execute(text(SCHEMA_VERSION_TABLE))
+            result = await conn.execute(text("SELECT version, checksum FROM schema_version"))
+            applied = {row[0]: row[1] for row in result.fetchall()}
+
+        for migration in self.migrations:
+            checksum = applied.get(migration.version)
+            if checksum is not None and checksum != migration.checksum:
+                logger.warning("Applied migration file has changed",
+                               migration_set=self.migration_set, version=migration.version, name=migration.name)
+
+        pending = [migration for migration in self.migrations if migration.version not in applied]
+        for migration in pending:
+            await self._apply(conn, migration)
+
+        return len(pending)
+
+    async def _apply(self, conn: AsyncConnection, migration: Migration):
+        """Run one migration and record it in the same transaction"""
+
+        start_time = time.perf_counter()
+
+        async with conn.begin():
+            hook = self.hooks.get(migration.version)
+            if hook:
+                await hook(conn)
+
+            # Simple query protocol, so a file may hold many statements. The
+            # driver call bypasses SQLAlchemy's lazily started transaction, so
+            # the script and its schema_version row share an explicit one
+            # (a savepoint when a hook has already begun the outer one)
+            raw_connection = await conn.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            async with driver_connection.transaction():
+                await driver_connection.execute(migration.sql)
+
+                duration_ms = (time.perf_counter() - start_time) * 1000
+                await driver_connection.execute(
+                    """
+                    INSERT INTO schema_version (version, name, checksum, duration_ms)
+                    VALUES ($1, $2, $3, $4)
+                    """,
+                    migration.version, migration.name, migration.checksum, duration_ms
+                )
+
+        logger.info("Schema migration applied", migration_set=self.migration_set,
+                    version=migration.version, name=migration.name, duration_ms=round(duration_ms, 1))
@@ -0,0 +1,117 @@
+"""
+🧊 COLD STORAGE OBJECT STORE
+O5 Elite Level Archival Storage
+
+This module implements the object storage used by the cold data tier:
+- Pluggable async object store interface
+- Local filesystem implementation with atomic writes
+- Content-addressed, compressed blob helpers
+"""
+
+import asyncio
+import hashlib
+import os
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+from pathlib import Path
+
+from config.enterprise_config import EnterpriseConfig
+
+class ObjectStore(ABC):
+    """Async key/value blob storage for archived data"""
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes):
+        """Store a blob under key (idempotent for content-addressed keys)"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Fetch a blob, or None if it does not exist"""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Check whether a blob exists"""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Delete a blob if it exists"""
+
+class LocalObjectStore(ObjectStore):
+    """Object store backed by a local directory
+
+    Keys map to files under ``root``. Writes go to a temporary file that is
+    fsynced and renamed into place, so readers never see partial blobs.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    async def put(self, key: str, data: bytes):
+        await asyncio.to_thread(self._write, self._path(key), data)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, self._path(key))
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self._path(key).exists)
+
+    async def delete(self, key: str):
+        path = self._path(key)
+        await asyncio.to_thread(lambda: path.unlink(missing_ok=True))
+
+    def _path(self, key: str) -> Path:
+        """Resolve a key to a file path inside the store root"""
+
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    @staticmethod
+    def _write(path: Path, data: bytes):
+        """Atomically write a blob"""
+
+        if path.exists():
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per call: concurrent puts of one key may run in the same process
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as blob_file:
+            blob_file.write(data)
+            blob_file.flush()
+            os.fsync(blob_file.fileno())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read(path: Path) -> Optional[bytes]:
+        """Read a blob if present"""
+
+        try:
+            with open(path, "rb") as blob_file:
+                return blob_file.read()
+        except FileNotFoundError:
+            return None
+
+def pack_blob(namespace: str, content: str) -> Tuple[str, bytes]:
+    """Compress content and derive its content-addressed key"""
+
+    data = zlib.compress(content.encode("utf-8"), 6)
+    digest = hashlib.sha256(data).hexdigest()
+    return f"{namespace}/{digest[:2]}/{digest}.z", data
+
+def unpack_blob(data: bytes) -> str:
+    """Decompress a blob produced by pack_blob()"""
+
+    return zlib.decompress(data).decode("utf-8")
+
+def create_object_store(config: EnterpriseConfig) -> ObjectStore:
+    """Create the configured cold storage backend"""
+
+    backend = config.COLD_STORAGE_BACKEND
+    if backend == "local":
+        return LocalObjectStore(config.COLD_STORAGE_PATH)
+
+    raise ValueError(f"Unsupported cold storage backend: {backend}")
@@ -0,0 +1,287 @@
+"""
+📮 TRANSACTIONAL OUTBOX
+O5 Elite Level Reliable Side Effects
+
+This module implements asynchronous fan-out of note changes:
+- Outbox rows written in the same transaction as the note change
+- A pool of consumers claiming rows with leases and SKIP LOCKED
+- At-least-once delivery with per-handler progress and retry backoff
+- Dead-lettering after repeated failures and delivery lag metrics
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Any, Optional, Callable, Iterable, Set, Tuple
+from dataclasses import dataclass
+import structlog
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from core.latency import WindowedHistogram
+from core.storage_backend import Note, NoteEvent, NoteChange, NoteEventHandler, serialize_note
+
+logger = structlog.get_logger(__name__)
+
+OUTBOX_INSERT = """
+INSERT INTO note_outbox (event_type, note_id, user_id, workspace_id, payload)
+VALUES (:event_type, :note_id, :user_id, :workspace_id, :payload)
+"""
+
+def outbox_values(event_type: NoteEvent, note: Note) -> Dict[str, Any]:
+    """Outbox row for a note change, carrying the committed note payload"""
+
+    return {
+        "event_type": event_type.value,
+        "note_id": note.id,
+        "user_id": note.user_id,
+        "workspace_id": note.workspace_id,
+        "payload": serialize_note(note).decode()
+    }
+
+@dataclass
+class OutboxMetrics:
+    """Outbox relay counters"""
+    claimed: int = 0
+    delivered: int = 0
+    retried: int = 0
+    dead: int = 0
+    handler_errors: int = 0
+
+class OutboxRelay:
+    """Consumer pool delivering outbox rows to registered handlers
+
+    Workers claim a batch by pushing its rows' ``available_at`` one lease
+    into the future, so no transaction stays open while handlers run. A
+    row is deleted once every matching handler has succeeded; if a worker
+    dies its lease expires and another worker delivers the row again.
+    Handlers that already succeeded are recorded in ``completed`` and
+    skipped on retry.
+
+    Rows of one note are claimed in id order but may be handled by
+    different workers concurrently, so handlers should apply the latest
+    state (e.g. invalidate, or reload) rather than rely on event order.
+    """
+
+    def __init__(
+        self,
+        session_factories: Callable[[], List[async_sessionmaker]],
+        workers: int = 4,
+        batch_size: int = 100,
+        poll_interval: float = 0.5,
+        lease_seconds: int = 30,
+        max_attempts: int = 10
+    ):
+        self.session_factories = session_factories
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self.handlers: List[Tuple[str, NoteEventHandler, Set[NoteEvent]]] = []
+        self.metrics = OutboxMetrics()
+        self.delivery_lag = WindowedHistogram(window_seconds=300, slices=5, max_value=86400.0)
+        self.handler_latency: Dict[str, WindowedHistogram] = {}
+
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.running = False
+
+    def register(
+        self,
+        name: str,
+        handler: NoteEventHandler,
+        event_types: Optional[Iterable[NoteEvent]] = None
+    ):
+        """Register an idempotent handler (names identify progress on retry)"""
+
+        self.handlers.append((name, handler, set(event_types or NoteEvent)))
+        self.handler_latency[name] = WindowedHistogram(window_seconds=300, slices=5)
+        logger.info("Outbox handler registered", handler=name)
+
+    def start(self):
+        """Start the consumer pool"""
+
+        if self.running:
+            return
+
+        self.running = True
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+        logger.info("✅ Outbox relay started", workers=self.workers)
+
+    async def stop(self):
+        """Stop the consumers; undelivered rows stay in the outbox"""
+
+        self.running = False
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle consumers after a local write committed an outbox row"""
+
+        self._wakeup.set()
+
+    async def backlog(self) -> Dict[str, Any]:
+        """Pending and dead rows and the age of the oldest pending row"""
+
+        pending = 0
+        dead = 0
+        oldest = 0.0
+        for session_factory in self.session_factories():
+            async with session_factory() as session:
+                result = await session.execute(text("""
+                    SELECT COUNT(*) FILTER (WHERE NOT dead),
+                           COUNT(*) FILTER (WHERE dead),
+                           COALESCE(EXTRACT(EPOCH FROM NOW() - MIN(created_at) FILTER (WHERE NOT dead)), 0)
+                    FROM note_outbox
+                """))
+                row = result.fetchone()
+            pending += row[0]
+            dead += row[1]
+            oldest = max(oldest, float(row[2]))
+
+        return {"pending": pending, "dead": dead, "oldest_pending_seconds": oldest}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get relay statistics"""
+
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "handlers": [name for name, _, _ in self.handlers],
+            "claimed": self.metrics.claimed,
+            "delivered": self.metrics.delivered,
+            "retried": self.metrics.retried,
+            "dead": self.metrics.dead,
+            "handler_errors": self.metrics.handler_errors,
+            "delivery_lag": self.delivery_lag.snapshot().describe(),
+            "handler_latency": {
+                name: histogram.snapshot().describe()
+                for name, histogram in self.handler_latency.items()
+            }
+        }
+
+    # ==================== PRIVATE METHODS ====================
+
+    async def _worker(self, index: int):
+        """Claim and deliver batches until stopped"""
+
+        while self.running:
+            delivered = 0
+            try:
+                for session_factory in self.session_factories():
+                    for change, completed in await self._claim(session_factory):
+                        await self._deliver(session_factory, change, completed)
+                        delivered += 1
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Outbox worker error", worker=index, error=str(e))
+
+            if not delivered:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    async def _claim(self, session_factory: async_sessionmaker) -> List[Tuple[NoteChange, Set[str]]]:
+        """Lease a batch of available rows"""
+
+        async with session_factory() as session:
+            result = await session.execute(
+                text("""
+                UPDATE note_outbox
+                SET available_at = NOW() + make_interval(secs => :lease), attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM note_outbox
+                    WHERE NOT dead AND available_at <= NOW()
+                    ORDER BY id
+                    LIMIT :limit
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, event_type, note_id, user_id, workspace_id, payload,
+                          attempts, completed, EXTRACT(EPOCH FROM NOW() - created_at)
+                """),
+                {"lease": self.lease_seconds, "limit": self.batch_size}
+            )
+            rows = result.fetchall()
+            await session.commit()
+
+        self.metrics.claimed += len(rows)
+        claimed = [
+            (
+                NoteChange(
+                    event_type=NoteEvent(row[1]),
+                    note_id=row[2],
+                    user_id=row[3],
+                    workspace_id=row[4],
+                    payload=row[5].encode() if row[5] else None,
+                    id=row[0],
+                    attempts=row[6],
+                    age=float(row[8])
+                ),
+                set(row[7] or [])
+            )
+            for row in rows
+        ]
+        claimed.sort(key=lambda item: item[0].id)
+        return claimed
+
+    async def _deliver(self, session_factory: async_sessionmaker, change: NoteChange, completed: Set[str]):
+        """Run the pending handlers for one row, then delete or reschedule it"""
+
+        claimed_at = time.monotonic()
+        error = None
+
+        for name, handler, event_types in self.handlers:
+            if change.event_type not in event_types or name in completed:
+                continue
+
+            start_time = time.monotonic()
+            try:
+                await handler(change)
+                completed.add(name)
+            except Exception as e:
+                self.metrics.handler_errors += 1
+                error = f"{name}: {e}"
+                logger.warning("Outbox handler failed", handler=name, outbox_id=change.id,
+                               attempts=change.attempts, error=str(e))
+            finally:
+                self.handler_latency[name].record(time.monotonic() - start_time)
+
+        async with session_factory() as session:
+            if error is None:
+                await session.execute(text("DELETE FROM note_outbox WHERE id = :id"), {"id": change.id})
+            else:
+                dead = change.attempts >= self.max_attempts
+                await session.execute(
+                    text("""
+                    UPDATE note_outbox
+                    SET available_at = NOW() + make_interval(secs => :backoff),
+                        completed = :completed, last_error = :error, dead = :dead
+                    WHERE id = :id
+                    """),
+                    {
+                        "id": change.id,
+                        "backoff": min(300, 2 ** change.attempts),
+                        "completed": sorted(completed),
+                        "error": error,
+                        "dead": dead
+                    }
+                )
+            await session.commit()
+
+        if error is None:
+            self.metrics.delivered += 1
+            self.delivery_lag.record(change.age + time.monotonic() - claimed_at)
+        elif change.attempts >= self.max_attempts:
+            self.metrics.dead += 1
+            logger.error("Outbox row dead-lettered", outbox_id=change.id, note_id=change.note_id, error=error)
+        else:
+            self.metrics.retried += 1
@@ -0,0 +1,300 @@
+"""
+📅 TIME PARTITION MANAGEMENT
+O5 Elite Level Time-Series Retention
+
+This module implements native range partitioning for append-only tables:
+- Daily or weekly partitions on the timestamp column
+- Automatic creation of upcoming partitions ahead of time
+- Retention by dropping whole expired partitions
+- Rows stranded in the default partition moved out or expired by row
+- One-time conversion of legacy unpartitioned tables
+"""
+
+import re
+from typing import List, Optional, Tuple
+from dataclasses import dataclass
+from enum import Enum
+from datetime import datetime, timedelta
+import structlog
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncConnection
+
+logger = structlog.get_logger(__name__)
+
+UPPER_BOUND_PATTERN = re.compile(r"TO \('([^']+)'\)")
+
+class PartitionInterval(Enum):
+    """Width of one partition"""
+    DAY = "day"
+    WEEK = "week"
+
+@dataclass
+class PartitionSpec:
+    """Partitioning policy for one table"""
+    table: str
+    interval: PartitionInterval = PartitionInterval.DAY
+    retention_days: int = 90
+    premake: int = 7  # Future partitions kept ready
+
+def partition_start(interval: PartitionInterval, at: datetime) -> datetime:
+    """Start of the partition containing ``at`` (weeks start on Monday)"""
+
+    start = datetime(at.year, at.month, at.day)
+    if interval == PartitionInterval.WEEK:
+        start -= timedelta(days=start.weekday())
+    return start
+
+def partition_step(interval: PartitionInterval) -> timedelta:
+    """Width of one partition"""
+
+    return timedelta(weeks=1) if interval == PartitionInterval.WEEK else timedelta(days=1)
+
+def partition_name(table: str, start: datetime) -> str:
+    """Partition table name for a partition starting at ``start``"""
+
+    return f"{table}_p{start:%Y%m%d}"
+
+class PartitionManager:
+    """Creates upcoming partitions and drops expired ones
+
+    Parents are declared in the schema as ``PARTITION BY RANGE
+    (timestamp)``. Each parent also gets a ``_default`` partition so rows
+    outside the prepared range (e.g. late backfills) are never rejected.
+    When rows for a range are already in the default partition (creation
+    lapsed), the range is built as a plain table, the rows are moved into
+    it and it is attached, all in one transaction. Default rows past
+    retention are deleted, since the default is never dropped.
+    """
+
+    def __init__(self, engine: AsyncEngine, specs: List[PartitionSpec]):
+        self.engine = engine
+        self.specs = specs
+        self.stats = {
+            "created": 0,
+            "dropped": 0,
+            "legacy_converted": 0,
+            "rows_moved_from_default": 0,
+            "default_rows_expired": 0,
+            "failures": 0,
+            "last_error": None
+        }
+
+    async def detach_legacy_tables(self, conn: AsyncConnection):
+        """Rename unpartitioned tables (and their indexes) out of the way
+
+        Runs before the schema creates the partitioned parents. The renamed
+        ``{table}_legacy`` heap is attached back by ensure_partitions().
+        """
+
+        for spec in self.specs:
+            relkind = await self._relkind(conn, spec.table)
+            if relkind != "r":
+                continue
+
+            legacy = f"{spec.table}_legacy"
+            result = await conn.execute(
+                text("""
+                SELECT c.relname FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE i.indrelid = CAST(:table AS regclass)
+                """),
+                {"table": spec.table}
+            )
+            for (index_name,) in result.fetchall():
+                await conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_legacy"'))
+
+            await conn.execute(text(f'ALTER TABLE "{spec.table}" RENAME TO "{legacy}"'))
+            logger.info("Legacy table detached for partitioning", table=spec.table, legacy=legacy)
+
+    async def ensure_partitions(self, now: Optional[datetime] = None):
+        """Create the current and upcoming partitions for every spec"""
+
+        now = now or datetime.now()
+
+        for spec in self.specs:
+            first_start = partition_start(spec.interval, now)
+            step = partition_step(spec.interval)
+            for offset in range(spec.premake + 1):
+                start = first_start + step * offset
+                await self._create_partition(spec, start, start + step)
+
+            # Default and legacy come after the ranges so recent legacy rows
+            # land in real partitions instead of blocking their creation
+            async with self.engine.begin() as conn:
+                await conn.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS "{spec.table}_default" PARTITION OF "{spec.table}" DEFAULT'
+                ))
+                await self._attach_legacy(conn, spec, first_start)
+
+    async def drop_expired(self, now: Optional[datetime] = None) -> int:
+        """Drop partitions that end before the retention cutoff
+
+        Expired rows in the default partition are deleted as well.
+        """
+
+        now = now or datetime.now()
+        dropped = 0
+
+        for spec in self.specs:
+            cutoff = now - timedelta(days=spec.retention_days)
+
+            for name, upper in await self._list_partitions(spec.table):
+                if upper is None or upper > cutoff:
+                    continue
+
+                async with self.engine.begin() as conn:
+                    # Detach first so the drop only locks the partition
+                    await conn.execute(text(f'ALTER TABLE "{spec.table}" DETACH PARTITION "{name}"'))
+                    await conn.execute(text(f'DROP TABLE "{name}"'))
+
+                dropped += 1
+                logger.info("Expired partition dropped", table=spec.table, partition=name, upper_bound=upper.isoformat())
+
+            expired = await self._expire_default_rows(spec, cutoff)
+            if expired:
+                logger.warning("Expired rows deleted from default partition", table=spec.table, rows=expired)
+
+        self.stats["dropped"] += dropped
+        return dropped
+
+    async def maintain(self, now: Optional[datetime] = None):
+        """Create upcoming partitions, then enforce retention"""
+
+        await self.ensure_partitions(now)
+        await self.drop_expired(now)
+
+    # ==================== PRIVATE METHODS ====================
+
+    async def _create_partition(self, spec: PartitionSpec, start: datetime, end: datetime):
+        """Create one range partition if it does not exist"""
+
+        name = partition_name(spec.table, start)
+        default = f"{spec.table}_default"
+        bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        try:
+            async with self.engine.begin() as conn:
+                if await self._relkind(conn, name):
+                    return
+
+                stranded = False
+                if await self._relkind(conn, default):
+                    result = await conn.execute(
+                        text(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE timestamp >= :start AND timestamp < :end)'),
+                        {"start": start, "end": end}
+                    )
+                    stranded = result.scalar()
+
+                if not stranded:
+                    await conn.execute(text(f'CREATE TABLE "{name}" PARTITION OF "{spec.table}" {bounds}'))
+                else:
+                    # The range's rows sit in the default partition, which
+                    # blocks PARTITION OF: move them into a plain table and
+                    # attach it (ATTACH revalidates the default)
+                    await conn.execute(text(
+                        f'CREATE TABLE "{name}" (LIKE "{spec.table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+                    ))
+                    result = await conn.execute(
+                        text(f'WITH moved AS (DELETE FROM "{default}" WHERE timestamp >= :start AND timestamp < :end '
+                             f'RETURNING *) INSERT INTO "{name}" SELECT * FROM moved'),
+                        {"start": start, "end": end}
+                    )
+                    await conn.execute(text(f'ALTER TABLE "{spec.table}" ATTACH PARTITION "{name}" {bounds}'))
+                    self.stats["rows_moved_from_default"] += result.rowcount
+                    logger.warning("Rows moved out of default partition", table=spec.table,
+                                   partition=name, rows=result.rowcount)
+
+            self.stats["created"] += 1
+            logger.info("Partition created", table=spec.table, partition=name)
+
+        except Exception as e:
+            self.stats["failures"] += 1
+            self.stats["last_error"] = f"{name}: {e}"
+            logger.error("Failed to create partition", table=spec.table, partition=name, error=str(e))
+
+    async def _expire_default_rows(self, spec: PartitionSpec, cutoff: datetime) -> int:
+        """Delete default-partition rows older than the retention cutoff"""
+
+        default = f"{spec.table}_default"
+        try:
+            async with self.engine.begin() as conn:
+                if not await self._relkind(conn, default):
+                    return 0
+                result = await conn.execute(
+                    text(f'DELETE FROM "{default}" WHERE timestamp < :cutoff'), {"cutoff": cutoff}
+                )
+        except Exception as e:
+            self.stats["failures"] += 1
+            self.stats["last_error"] = f"{default}: {e}"
+            logger.error("Failed to expire default partition rows", table=spec.table, error=str(e))
+            return 0
+
+        self.stats["default_rows_expired"] += result.rowcount
+        return result.rowcount
+
+    async def _attach_legacy(self, conn: AsyncConnection, spec: PartitionSpec, first_start: datetime):
+        """Attach a renamed legacy heap as the partition for all older rows"""
+
+        legacy = f"{spec.table}_legacy"
+        result = await conn.execute(
+            text("SELECT relispartition FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": legacy}
+        )
+        row = result.fetchone()
+        if not row or row[0]:
+            return
+
+        # Range partitions cannot hold NULL keys; treat unknown ages as oldest
+        await conn.execute(text(f'UPDATE "{legacy}" SET timestamp = \'epoch\' WHERE timestamp IS NULL'))
+        await conn.execute(text(f'ALTER TABLE "{legacy}" ALTER COLUMN timestamp SET NOT NULL'))
+
+        # Rows newer than the first partition belong in the regular partitions
+        await conn.execute(
+            text(f'WITH moved AS (DELETE FROM "{legacy}" WHERE timestamp >= :start RETURNING *) '
+                 f'INSERT INTO "{spec.table}" SELECT * FROM moved'),
+            {"start": first_start}
+        )
+
+        await conn.execute(text(
+            f'ALTER TABLE "{spec.table}" ATTACH PARTITION "{legacy}" '
+            f"FOR VALUES FROM (MINVALUE) TO ('{first_start.isoformat()}')"
+        ))
+
+        self.stats["legacy_converted"] += 1
+        logger.info("Legacy table attached as partition", table=spec.table, legacy=legacy)
+
+    async def _list_partitions(self, table: str) -> List[Tuple[str, Optional[datetime]]]:
+        """List a parent's partitions with their upper bounds (None for DEFAULT)"""
+
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                text("""
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = CAST(:table AS regclass)
+                """),
+                {"table": table}
+            )
+            rows = result.fetchall()
+
+        partitions = []
+        for name, bound in rows:
+            match = UPPER_BOUND_PATTERN.search(bound or "")
+            partitions.append((name, datetime.fromisoformat(match.group(1)) if match else None))
+        return partitions
+
+    @staticmethod
+    async def _relkind(conn: AsyncConnection, name: str) -> Optional[str]:
+        """Relation kind in the public schema ('r' heap, 'p' partitioned), or None"""
+
+        result = await conn.execute(
+            text("""
+            SELECT CAST(c.relkind AS TEXT) FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relname = :name AND n.nspname = 'public'
+            """),
+            {"name": name}
+        )
+        row = result.fetchone()
+        return row[0] if row else None
@@ -0,0 +1,187 @@
+"""
+🏎️ ASYNCPG FAST PATH
+O5 Elite Level Hot Query Access
+
+This module implements a thin data-access layer for the hottest note queries:
+- Direct asyncpg pool, bypassing SQLAlchemy text() compilation
+- Prepared statements cached per connection by asyncpg
+- Binary wire codecs for TEXT[] and TIMESTAMP columns
+- Positional records consumed without dict parameter rebuilding
+"""
+
+import uuid
+from typing import List, Any, Optional, Callable, Sequence
+import structlog
+
+import asyncpg
+
+logger = structlog.get_logger(__name__)
+
+NOTE_COLUMNS = """id, title, body, tags, links, color, user_id, workspace_id,
+       status, created_at, updated_at, version, encrypted, archive_key, body_zstd"""
+
+def asyncpg_dsn(sqlalchemy_url: str) -> str:
+    """Convert a postgresql+asyncpg:// SQLAlchemy URL to a plain libpq DSN"""
+
+    return sqlalchemy_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+class PreparedNoteQueries:
+    """asyncpg access to the five hottest note queries
+
+    Every statement is a fixed SQL string, so asyncpg prepares it once per
+    pooled connection and reuses the server-side statement afterwards.
+    Array and timestamp values travel in binary format and rows come back
+    as asyncpg Records in NOTE_COLUMNS order.
+    """
+
+    STATEMENTS = {
+        "note_by_id": f"""
+            SELECT {NOTE_COLUMNS}
+            FROM notes
+            WHERE id = $1 AND user_id = $2 AND status != 'deleted'
+        """,
+        "notes_page": f"""
+            SELECT {NOTE_COLUMNS}
+            FROM notes
+            WHERE user_id = $1 AND status = 'active'
+            ORDER BY updated_at DESC LIMIT $2 OFFSET $3
+        """,
+        "notes_page_workspace": f"""
+            SELECT {NOTE_COLUMNS}
+            FROM notes
+            WHERE user_id = $1 AND status = 'active' AND workspace_id = $2
+            ORDER BY updated_at DESC LIMIT $3 OFFSET $4
+        """,
+        "note_insert": """
+            INSERT INTO notes (id, title, body, tags, links, color, user_id, workspace_id,
+                               status, created_at, updated_at, version, encrypted, body_zstd)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14)
+        """,
+        "note_update": """
+            UPDATE notes
+            SET title = $2, body = $3, tags = $4, links = $5, color = $6,
+                updated_at = $7, version = $8, status = $9, body_zstd = $10
+            WHERE id = $1
+        """,
+        "outbox_insert": """
+            INSERT INTO note_outbox (event_type, note_id, user_id, workspace_id, payload)
+            VALUES ($1, $2, $3, $4, $5)
+        """,
+        "version_chain": """
+            SELECT id, version, storage_kind, body, delta, body_zstd
+            FROM note_versions
+            WHERE note_id = $1 AND version <= $2
+              AND version >= COALESCE((
+                  SELECT MAX(version) FROM note_versions
+                  WHERE note_id = $1 AND version < $2 AND storage_kind = 'snapshot'
+              ), 0)
+            ORDER BY version, created_at
+        """,
+        "version_insert": """
+            INSERT INTO note_versions (id, note_id, version, title, body, delta,
+                                       storage_kind, changed_by, change_type, body_zstd)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+            ON CONFLICT (note_id, version) DO NOTHING
+            RETURNING id
+        """,
+        "version_id": """
+            SELECT id FROM note_versions WHERE note_id = $1 AND version = $2
+        """
+    }
+
+    def __init__(self, dsn: str, min_size: int = 5, max_size: int = 20):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool: Optional[asyncpg.Pool] = None
+
+    async def initialize(self):
+        """Create the connection pool"""
+
+        self.pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            statement_cache_size=max(100, len(self.STATEMENTS) * 4)
+        )
+        logger.info("✅ asyncpg fast path initialized", max_size=self.max_size)
+
+    async def close(self):
+        """Close the pool"""
+
+        if self.pool:
+            await self.pool.close()
+
+    async def fetch_note(self, note_id: str, user_id: str) -> Optional[asyncpg.Record]:
+        """Get one note by id for its owner"""
+
+        return await self.pool.fetchrow(self.STATEMENTS["note_by_id"], note_id, user_id)
+
+    async def fetch_notes_page(
+        self,
+        user_id: str,
+        limit: int,
+        offset: int,
+        workspace_id: Optional[str] = None
+    ) -> List[asyncpg.Record]:
+        """Get one page of active notes, newest first"""
+
+        if workspace_id:
+            return await self.pool.fetch(
+                self.STATEMENTS["notes_page_workspace"], user_id, workspace_id, limit, offset
+            )
+        return await self.pool.fetch(self.STATEMENTS["notes_page"], user_id, limit, offset)
+
+    async def insert_note(self, values: Sequence[Any], outbox: Optional[Sequence[Any]] = None):
+        """Insert a note; values follow the note_insert column order
+
+        ``outbox`` values (outbox_insert order) are written in the same
+        transaction as the note.
+        """
+
+        await self._write("note_insert", values, outbox)
+
+    async def update_note(self, values: Sequence[Any], outbox: Optional[Sequence[Any]] = None):
+        """Update a note; values follow the note_update parameter order"""
+
+        await self._write("note_update", values, outbox)
+
+    async def insert_version(
+        self,
+        note_id: str,
+        version: int,
+        encode: Callable[[List[asyncpg.Record]], Sequence[Any]]
+    ) -> str:
+        """Read the version chain and insert a version in one transaction
+
+        ``encode`` receives the chain rows (id, version, storage_kind, body,
+        delta, body_zstd) and returns the version_insert values that follow the id. If
+        the version already exists, or a concurrent writer inserts it first, its
+        id is returned and nothing is written.
+        """
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                rows = await conn.fetch(self.STATEMENTS["version_chain"], note_id, version)
+                for row in rows:
+                    if row[1] == version:
+                        return row[0]
+
+                values = encode(rows)
+                version_id = await conn.fetchval(self.STATEMENTS["version_insert"], str(uuid.uuid4()), *values)
+                if version_id is None:
+                    # A concurrent writer inserted this version first
+                    version_id = await conn.fetchval(self.STATEMENTS["version_id"], note_id, version)
+                return version_id
+
+    async def _write(self, statement: str, values: Sequence[Any], outbox: Optional[Sequence[Any]]):
+        """Run a note write, with its outbox row in the same transaction"""
+
+        if outbox is None:
+            await self.pool.execute(self.STATEMENTS[statement], *values)
+            return
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(self.STATEMENTS[statement], *values)
+                await conn.execute(self.STATEMENTS["outbox_insert"], *outbox)
@@ -0,0 +1,254 @@
+"""
+🔌 CONNECTION POOL TELEMETRY
+O5 Elite Level Pool Observability
+
+This module implements instrumentation for every connection pool:
+- SQLAlchemy queue pools timed at checkout, with pool event hooks
+- redis-py connection pools with checkout timing and usage counters
+- Checked-out, idle and overflow gauges per pool
+- Checkout wait and hold time histograms, timeouts and errors
+- Saturation alerting across all registered pools
+"""
+
+import time
+from typing import Dict, List, Any, Optional, Callable
+from dataclasses import dataclass, field
+import structlog
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import redis.asyncio as redis
+from redis.asyncio import ConnectionPool
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from core.latency import WindowedHistogram
+
+logger = structlog.get_logger(__name__)
+
+def _window() -> WindowedHistogram:
+    return WindowedHistogram(window_seconds=300, slices=5)
+
+@dataclass
+class PoolMetrics:
+    """Counters and histograms for one pool"""
+    name: str
+    kind: str
+    checkouts: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    wait: WindowedHistogram = field(default_factory=_window)
+    hold: WindowedHistogram = field(default_factory=_window)
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that times checkouts
+
+    Pass as ``poolclass`` to create_async_engine(); the wait covers queueing
+    for a free connection and opening a new one.
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def __init__(self, creator, pool_size: int = 5, max_overflow: int = 10, **kw):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kw)
+        self.capacity = pool_size + max_overflow if max_overflow >= 0 else None
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.timeouts += 1
+            raise
+        except Exception:
+            if self.metrics:
+                self.metrics.errors += 1
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.wait.record(time.perf_counter() - start_time)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class InstrumentedRedisPool(ConnectionPool):
+    """redis-py ConnectionPool that counts and times checkouts"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def reset(self):
+        super().reset()
+        self.opened = 0
+        self.in_use = 0
+
+    def make_connection(self):
+        self.opened += 1
+        return super().make_connection()
+
+    async def get_connection(self, *args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except RedisConnectionError as e:
+            if self.metrics:
+                # The non-blocking pool fails fast when max_connections is reached
+                if "Too many connections" in str(e):
+                    self.metrics.timeouts += 1
+                else:
+                    self.metrics.errors += 1
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.wait.record(time.perf_counter() - start_time)
+
+        self.in_use += 1
+        if self.metrics:
+            self.metrics.checkouts += 1
+        connection._checked_out_at = time.perf_counter()
+        return connection
+
+    async def release(self, connection):
+        checked_out_at = getattr(connection, "_checked_out_at", None)
+        if checked_out_at is not None:
+            connection._checked_out_at = None
+            self.in_use -= 1
+            if self.metrics:
+                self.metrics.hold.record(time.perf_counter() - checked_out_at)
+        await super().release(connection)
+
+class PoolTelemetry:
+    """Registry of instrumented pools in this process"""
+
+    def __init__(self):
+        self.metrics: Dict[str, PoolMetrics] = {}
+        self.gauges: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._timeouts_seen: Dict[str, int] = {}
+
+    def instrument_engine(self, name: str, engine: AsyncEngine) -> AsyncEngine:
+        """Track an engine created with poolclass=InstrumentedAsyncPool"""
+
+        metrics = PoolMetrics(name, "postgres")
+        sync_engine = engine.sync_engine
+        if isinstance(sync_engine.pool, InstrumentedAsyncPool):
+            sync_engine.pool.metrics = metrics
+
+        @event.listens_for(sync_engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            metrics.checkouts += 1
+            connection_record.info["checked_out_at"] = time.perf_counter()
+
+        @event.listens_for(sync_engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            checked_out_at = connection_record.info.pop("checked_out_at", None)
+            if checked_out_at is not None:
+                metrics.hold.record(time.perf_counter() - checked_out_at)
+
+        @event.listens_for(sync_engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            metrics.errors += 1
+
+        def gauges() -> Dict[str, Any]:
+            pool = sync_engine.pool  # Replaced on dispose()
+            return {
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "capacity": getattr(pool, "capacity", None)
+            }
+
+        self._register(metrics, gauges)
+        return engine
+
+    def redis_client(self, name: str, url: str, **kwargs) -> redis.Redis:
+        """Create a Redis client on an instrumented pool
+
+        The client does not own the pool: close it with close_redis().
+        """
+
+        pool = InstrumentedRedisPool.from_url(url, **kwargs)
+        metrics = PoolMetrics(name, "redis")
+        pool.metrics = metrics
+
+        def gauges() -> Dict[str, Any]:
+            return {
+                "checked_out": pool.in_use,
+                "idle": max(0, pool.opened - pool.in_use),
+                "overflow": 0,
+                "capacity": pool.max_connections
+            }
+
+        self._register(metrics, gauges)
+        return redis.Redis(connection_pool=pool)
+
+    async def close_redis(self, client: redis.Redis):
+        """Close a client from redis_client() and its pool"""
+
+        await client.close()
+        await client.connection_pool.disconnect()
+
+    def register_gauges(self, name: str, kind: str, gauges: Callable[[], Dict[str, Any]]):
+        """Track a pool that only exposes gauges (e.g. asyncpg pools)"""
+
+        self._register(PoolMetrics(name, kind), gauges)
+
+    def unregister(self, name: str):
+        """Stop tracking a pool"""
+
+        self.metrics.pop(name, None)
+        self.gauges.pop(name, None)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-pool gauges, counters and latency percentiles (numbers in ms)"""
+
+        pools = {}
+        for name, metrics in self.metrics.items():
+            gauges = self.gauges[name]()
+            capacity = gauges["capacity"]
+            wait_p50, wait_p99 = metrics.wait.snapshot().quantiles((0.5, 0.99))
+            (hold_p99,) = metrics.hold.snapshot().quantiles((0.99,))
+
+            pools[name] = {
+                "kind": metrics.kind,
+                **gauges,
+                "saturation": gauges["checked_out"] / capacity if capacity else 0.0,
+                "checkouts": metrics.checkouts,
+                "timeouts": metrics.timeouts,
+                "errors": metrics.errors,
+                "wait_p50_ms": wait_p50 * 1000,
+                "wait_p99_ms": wait_p99 * 1000,
+                "hold_p99_ms": hold_p99 * 1000
+            }
+        return pools
+
+    def check_alerts(self, saturation_threshold: float, wait_threshold_ms: float) -> List[Dict[str, Any]]:
+        """Log and return pools that are saturated, slow to check out or timing out"""
+
+        alerts = []
+        for name, stats in self.snapshot().items():
+            reasons = []
+            if stats["saturation"] >= saturation_threshold:
+                reasons.append("saturated")
+            if stats["wait_p99_ms"] >= wait_threshold_ms:
+                reasons.append("slow_checkout")
+            if stats["timeouts"] > self._timeouts_seen.get(name, 0):
+                reasons.append("timeouts")
+            self._timeouts_seen[name] = stats["timeouts"]
+
+            if reasons:
+                alerts.append({"pool": name, "reasons": reasons, **stats})
+                logger.warning("Connection pool under pressure", pool=name, reasons=reasons,
+                               checked_out=stats["checked_out"], capacity=stats["capacity"],
+                               wait_p99_ms=stats["wait_p99_ms"], timeouts=stats["timeouts"])
+        return alerts
+
+    # ==================== PRIVATE METHODS ====================
+
+    def _register(self, metrics: PoolMetrics, gauges: Callable[[], Dict[str, Any]]):
+        self.metrics[metrics.name] = metrics
+        self.gauges[metrics.name] = gauges
+
+# Process-wide registry shared by the data and cache managers
+pool_telemetry = PoolTelemetry()
@@ -0,0 +1,506 @@
+"""
+🧩 NOTE SHARDING
+O5 Elite Level Horizontal Write Scaling
+
+This module implements tenant-sharded storage for notes and note versions:
+- Tenant keys (workspace, or owner for personal notes) mapped to shards
+- Directory table for placement, consistent hash ring for new tenants
+- One engine pool per shard, scatter-gather helpers for cross-shard reads
+- Online tenant moves with write freeze, catch-up copy and cutover
+"""
+
+import asyncio
+import bisect
+import hashlib
+import time
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable, TypeVar
+from datetime import datetime
+import structlog
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, async_sessionmaker
+
+from core.migrations import SchemaMigrator
+from core.pool_telemetry import InstrumentedAsyncPool, pool_telemetry
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+# SQL form of tenant_key() and a filter for the rows of one tenant
+TENANT_KEY_SQL = "CASE WHEN workspace_id IS NOT NULL THEN 'ws:' || workspace_id ELSE 'user:' || user_id END"
+TENANT_FILTER = f"({TENANT_KEY_SQL}) = :tenant"
+
+NOTE_COPY_COLUMNS = [
+    "id", "title", "body", "tags", "links", "color", "user_id", "workspace_id",
+    "status", "created_at", "updated_at", "version", "encrypted", "archive_key", "body_zstd"
+]
+
+VERSION_COPY_COLUMNS = [
+    "id", "note_id", "version", "title", "body", "delta",
+    "storage_kind", "changed_by", "change_type", "created_at", "body_zstd"
+]
+
+LINK_COPY_COLUMNS = ["source_id", "target_key", "tenant", "target_id", "position"]
+
+# Digest of a note's wikilink edges; edges change without touching the note row
+LINK_DIGEST_SQL = """(
+    SELECT md5(string_agg(l.target_key || '>' || COALESCE(l.target_id, '') || '@' || l.position, ',' ORDER BY l.target_key))
+    FROM note_links l WHERE l.source_id = notes.id
+)"""
+
+class ShardMovingError(Exception):
+    """Raised for writes to a tenant that is frozen for a shard move"""
+
+def tenant_key(workspace_id: Optional[str], user_id: str) -> str:
+    """Shard key for a note: its workspace, or its owner for personal notes"""
+
+    return f"ws:{workspace_id}" if workspace_id else f"user:{user_id}"
+
+class ConsistentHashRing:
+    """Consistent hash ring with virtual nodes
+
+    Adding a shard only re-homes about 1/N of new tenant placements;
+    existing tenants keep their directory entries regardless.
+    """
+
+    def __init__(self, shards: List[int], vnodes: int = 128):
+        self.points: List[int] = []
+        self.owners: List[int] = []
+
+        for point, shard in sorted(
+            (self._hash(f"{shard}:{vnode}"), shard) for shard in shards for vnode in range(vnodes)
+        ):
+            self.points.append(point)
+            self.owners.append(shard)
+
+    def lookup(self, key: str) -> int:
+        """Shard owning key"""
+
+        index = bisect.bisect(self.points, self._hash(key)) % len(self.points)
+        return self.owners[index]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+class ShardRouter:
+    """Maps tenants to shards and holds one engine pool per shard
+
+    Shard 0 is the primary database, which also stores the
+    ``shard_directory`` table. Directory entries are cached per worker for
+    ``directory_ttl`` seconds; shard moves wait out that TTL so every
+    worker observes a freeze before cutover.
+    """
+
+    def __init__(
+        self,
+        primary_engine: AsyncEngine,
+        primary_session: async_sessionmaker,
+        shard_dsns: List[str],
+        pool_size: int = 5,
+        max_overflow: int = 15,
+        directory_ttl: float = 5.0
+    ):
+        self.shard_dsns = shard_dsns
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.directory_ttl = directory_ttl
+
+        self.engines: List[AsyncEngine] = [primary_engine]
+        self.sessions: List[async_sessionmaker] = [primary_session]
+        self.ring: Optional[ConsistentHashRing] = None
+
+        self._directory: Dict[str, Tuple[int, str, float]] = {}
+        self.stats = {
+            "routed": {},
+            "scatters": 0,
+            "directory_lookups": 0,
+            "placements": 0,
+            "frozen_rejections": 0
+        }
+
+    async def initialize(self):
+        """Open shard pools, migrate shard schemas and seed the directory"""
+
+        for dsn in self.shard_dsns:
+            engine = create_async_engine(
+                dsn,
+                poolclass=InstrumentedAsyncPool,
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_pre_ping=True
+            )
+            pool_telemetry.instrument_engine(f"postgres_shard_{len(self.engines)}", engine)
+            await SchemaMigrator(engine, "shard").migrate()
+
+            self.engines.append(engine)
+            self.sessions.append(async_sessionmaker(engine, expire_on_commit=False))
+
+        self.ring = ConsistentHashRing(list(range(len(self.engines))))
+        self.stats["routed"] = {shard: 0 for shard in range(len(self.engines))}
+
+        # Pin every tenant that already has notes on the primary to shard 0
+        async with self.sessions[0]() as session:
+            result = await session.execute(text("SELECT 1 FROM shard_directory LIMIT 1"))
+            if not result.fetchone():
+                await session.execute(text(f"""
+                    INSERT INTO shard_directory (shard_key, shard)
+                    SELECT DISTINCT {TENANT_KEY_SQL}, 0 FROM notes
+                    ON CONFLICT (shard_key) DO NOTHING
+                """))
+                await session.commit()
+
+        logger.info("✅ Note shards initialized", shards=len(self.engines))
+
+    async def close(self):
+        """Dispose shard pools (the primary engine is owned by the caller)"""
+
+        for engine in self.engines[1:]:
+            await engine.dispose()
+
+    @property
+    def shard_count(self) -> int:
+        return len(self.engines)
+
+    async def shard_for(self, key: str, for_write: bool = False) -> int:
+        """Shard for a tenant key, placing new tenants on writes"""
+
+        shard, state = await self._lookup(key)
+
+        if shard is None:
+            if not for_write:
+                # Nothing was ever written for this tenant
+                return self.ring.lookup(key)
+            shard, state = await self._place(key)
+
+        if for_write and state == "frozen":
+            self.stats["frozen_rejections"] += 1
+            raise ShardMovingError(f"Tenant {key} is being moved between shards, retry shortly")
+
+        self.stats["routed"][shard] = self.stats["routed"].get(shard, 0) + 1
+        return shard
+
+    def session(self, shard: int) -> async_sessionmaker:
+        """Session factory for a shard"""
+
+        return self.sessions[shard]
+
+    async def scatter(self, query: Callable[[async_sessionmaker], Awaitable[T]]) -> List[T]:
+        """Run a query on every shard concurrently, in shard order"""
+
+        self.stats["scatters"] += 1
+        return list(await asyncio.gather(*(query(session) for session in self.sessions)))
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop cached directory entries"""
+
+        if key is None:
+            self._directory.clear()
+        else:
+            self._directory.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing statistics"""
+
+        return {
+            "shards": self.shard_count,
+            "cached_directory_entries": len(self._directory),
+            **self.stats
+        }
+
+    # ==================== PRIVATE METHODS ====================
+
+    async def _lookup(self, key: str) -> Tuple[Optional[int], Optional[str]]:
+        """Directory entry for a key, from the local cache when fresh"""
+
+        cached = self._directory.get(key)
+        if cached and cached[2] > time.monotonic():
+            return cached[0], cached[1]
+
+        self.stats["directory_lookups"] += 1
+        async with self.sessions[0]() as session:
+            result = await session.execute(
+                text("SELECT shard, state FROM shard_directory WHERE shard_key = :key"),
+                {"key": key}
+            )
+            row = result.fetchone()
+
+        if not row:
+            return None, None
+
+        self._directory[key] = (row[0], row[1], time.monotonic() + self.directory_ttl)
+        return row[0], row[1]
+
+    async def _place(self, key: str) -> Tuple[int, str]:
+        """Assign a new tenant to its ring shard (first writer wins)"""
+
+        async with self.sessions[0]() as session:
+            await session.execute(
+                text("""
+                INSERT INTO shard_directory (shard_key, shard)
+                VALUES (:key, :shard)
+                ON CONFLICT (shard_key) DO NOTHING
+                """),
+                {"key": key, "shard": self.ring.lookup(key)}
+            )
+            await session.commit()
+
+        self.stats["placements"] += 1
+        self._directory.pop(key, None)
+        shard, state = await self._lookup(key)
+        return shard, state
+
+class ShardMover:
+    """Moves one tenant's notes, versions and wikilink edges to another shard while online
+
+    1. Bulk copy every row, then repeat catch-up copies of rows changed
+       since the previous pass until the remaining delta is small.
+    2. Freeze the tenant in the directory and wait out the directory TTL,
+       so no worker still routes writes to the source.
+    3. Copy the final delta, then reconcile the whole tenant by
+       (id, version, updated_at, archive_key, edges) so rows whose timestamp
+       predates a pass (``updated_at`` is set by the app before its write
+       commits) are not lost. Point the directory at the target and
+       unfreeze, then delete the rows from the source.
+
+    Writes are rejected with ShardMovingError only during step 3.
+    """
+
+    def __init__(self, router: ShardRouter, batch_size: int = 500, catch_up_threshold: int = 100):
+        self.router = router
+        self.batch_size = batch_size
+        self.catch_up_threshold = catch_up_threshold
+
+    async def move(self, key: str, target: int, max_catch_up_passes: int = 10) -> Dict[str, Any]:
+        """Move a tenant to the target shard"""
+
+        start_time = time.time()
+        source, _ = await self.router._lookup(key)
+        if source is None:
+            raise ValueError(f"Unknown tenant: {key}")
+        if not 0 <= target < self.router.shard_count:
+            raise ValueError(f"Unknown shard: {target}")
+        if source == target:
+            return {"tenant": key, "moved": False, "shard": source}
+
+        logger.info("Shard move started", tenant=key, source=source, target=target)
+
+        # 1. Bulk copy, then catch up until the delta is small
+        since = None
+        copied = 0
+        for _ in range(max_catch_up_passes):
+            pass_started = await self._source_now(source)
+            changed = await self._copy(key, source, target, since)
+            copied += changed
+            since = pass_started
+            if changed <= self.catch_up_threshold:
+                break
+
+        # 2. Freeze writes and let every worker's directory cache see it
+        await self._set_directory(key, source, "frozen")
+        try:
+            await asyncio.sleep(self.router.directory_ttl + 1)
+
+            # 3. Final delta, a full reconcile, then cutover
+            copied += await self._copy(key, source, target, since)
+            copied += await self._reconcile(key, source, target)
+            await self._set_directory(key, target, "active")
+        except Exception:
+            await self._set_directory(key, source, "active")
+            raise
+
+        # Stale caches may still read from the source for one TTL
+        await asyncio.sleep(self.router.directory_ttl + 1)
+        deleted = await self._delete_source(key, source)
+
+        duration = time.time() - start_time
+        logger.info(
+            "Shard move complete",
+            tenant=key, source=source, target=target, copied=copied, deleted=deleted, duration=duration
+        )
+        return {
+            "tenant": key,
+            "moved": True,
+            "source": source,
+            "target": target,
+            "rows_copied": copied,
+            "rows_deleted": deleted,
+            "duration": duration
+        }
+
+    # ==================== PRIVATE METHODS ====================
+
+    async def _source_now(self, source: int) -> datetime:
+        """Database clock of the source shard"""
+
+        async with self.router.session(source)() as session:
+            result = await session.execute(text("SELECT LOCALTIMESTAMP"))
+            return result.scalar()
+
+    async def _copy(
+        self,
+        key: str,
+        source: int,
+        target: int,
+        since: Optional[datetime],
+        note_ids: Optional[List[str]] = None
+    ) -> int:
+        """Upsert a tenant's notes (changed since ``since``, or only ``note_ids``), their versions and edges"""
+
+        copied = 0
+        last_id = ""
+        note_columns = ", ".join(NOTE_COPY_COLUMNS)
+        version_columns = ", ".join(VERSION_COPY_COLUMNS)
+        link_columns = ", ".join(LINK_COPY_COLUMNS)
+
+        while True:
+            params: Dict[str, Any] = {"tenant": key, "last_id": last_id, "limit": self.batch_size}
+            query = f"SELECT {note_columns} FROM notes WHERE {TENANT_FILTER} AND id > :last_id"
+            if since is not None:
+                query += " AND updated_at >= :since"
+                params["since"] = since
+            if note_ids is not None:
+                query += " AND id = ANY(:note_ids)"
+                params["note_ids"] = note_ids
+            query += " ORDER BY id LIMIT :limit"
+
+            async with self.router.session(source)() as session:
+                notes = [dict(row._mapping) for row in (await session.execute(text(query), params)).fetchall()]
+                if not notes:
+                    break
+
+                version_query = f"SELECT {version_columns} FROM note_versions WHERE note_id = ANY(:note_ids)"
+                version_params: Dict[str, Any] = {"note_ids": [note["id"] for note in notes]}
+                versions = [
+                    dict(row._mapping)
+                    for row in (await session.execute(text(version_query), version_params)).fetchall()
+                ]
+
+                link_query = f"SELECT {link_columns} FROM note_links WHERE source_id = ANY(:note_ids)"
+                links = [
+                    dict(row._mapping)
+                    for row in (await session.execute(text(link_query), version_params)).fetchall()
+                ]
+
+            async with self.router.session(target)() as session:
+                await session.execute(text(self._upsert_sql("notes", NOTE_COPY_COLUMNS)), notes)
+                if versions:
+                    await session.execute(text(self._upsert_sql("note_versions", VERSION_COPY_COLUMNS)), versions)
+
+                # Edges are replaced per note, so ones removed on the source go too
+                await session.execute(text("DELETE FROM note_links WHERE source_id = ANY(:note_ids)"), version_params)
+                if links:
+                    placeholders = ", ".join(f":{column}" for column in LINK_COPY_COLUMNS)
+                    await session.execute(
+                        text(f"INSERT INTO note_links ({link_columns}) VALUES ({placeholders})"), links
+                    )
+                await session.commit()
+
+            copied += len(notes) + len(versions) + len(links)
+            last_id = notes[-1]["id"]
+
+        return copied
+
+    async def _reconcile(self, key: str, source: int, target: int) -> int:
+        """Make the target match the frozen source row for row
+
+        Copies notes missing or different on the target and deletes target
+        notes that no longer exist on the source (purged during the move).
+        """
+
+        source_rows = await self._fingerprints(key, source)
+        target_rows = await self._fingerprints(key, target)
+
+        stale = [note_id for note_id, row in source_rows.items() if target_rows.get(note_id) != row]
+        extra = [note_id for note_id in target_rows if note_id not in source_rows]
+
+        copied = 0
+        for start in range(0, len(stale), self.batch_size):
+            copied += await self._copy(key, source, target, None, stale[start:start + self.batch_size])
+
+        for start in range(0, len(extra), self.batch_size):
+            async with self.router.session(target)() as session:
+                await self._delete_notes(session, extra[start:start + self.batch_size])
+                await session.commit()
+
+        if stale or extra:
+            logger.warning(
+                "Shard move reconcile found missed rows",
+                tenant=key, source=source, target=target, copied=len(stale), deleted=len(extra)
+            )
+        return copied
+
+    async def _fingerprints(self, key: str, shard: int) -> Dict[str, Tuple[Any, ...]]:
+        """(version, updated_at, archive_key, edge digest) of every note of a tenant on a shard"""
+
+        rows: Dict[str, Tuple[Any, ...]] = {}
+        last_id = ""
+        while True:
+            async with self.router.session(shard)() as session:
+                result = await session.execute(
+                    text(f"""
+                    SELECT id, version, updated_at, archive_key, {LINK_DIGEST_SQL} FROM notes
+                    WHERE {TENANT_FILTER} AND id > :last_id
+                    ORDER BY id LIMIT :limit
+                    """),
+                    {"tenant": key, "last_id": last_id, "limit": self.batch_size * 10}
+                )
+                batch = result.fetchall()
+            if not batch:
+                return rows
+
+            for row in batch:
+                rows[row[0]] = tuple(row[1:])
+            last_id = batch[-1][0]
+
+    async def _delete_source(self, key: str, source: int) -> int:
+        """Delete a moved tenant's rows from the source shard in batches"""
+
+        deleted = 0
+        while True:
+            async with self.router.session(source)() as session:
+                result = await session.execute(
+                    text(f"SELECT id FROM notes WHERE {TENANT_FILTER} LIMIT :limit"),
+                    {"tenant": key, "limit": self.batch_size}
+                )
+                note_ids = [row[0] for row in result.fetchall()]
+                if not note_ids:
+                    break
+
+                await self._delete_notes(session, note_ids)
+                await session.commit()
+
+            deleted += len(note_ids)
+        return deleted
+
+    @staticmethod
+    async def _delete_notes(session, note_ids: List[str]):
+        await session.execute(text("DELETE FROM note_links WHERE source_id = ANY(:note_ids)"), {"note_ids": note_ids})
+        await session.execute(text("DELETE FROM note_versions WHERE note_id = ANY(:note_ids)"), {"note_ids": note_ids})
+        await session.execute(text("DELETE FROM notes WHERE id = ANY(:note_ids)"), {"note_ids": note_ids})
+
+    async def _set_directory(self, key: str, shard: int, state: str):
+        """Update a tenant's directory entry"""
+
+        async with self.router.session(0)() as session:
+            await session.execute(
+                text("""
+                UPDATE shard_directory SET shard = :shard, state = :state, updated_at = CURRENT_TIMESTAMP
+                WHERE shard_key = :key
+                """),
+                {"key": key, "shard": shard, "state": state}
+            )
+            await session.commit()
+        self.router.invalidate(key)
+
+    @staticmethod
+    def _upsert_sql(table: str, columns: List[str]) -> str:
+        """INSERT ... ON CONFLICT (id) DO UPDATE for a copy batch"""
+
+        placeholders = ", ".join(f":{column}" for column in columns)
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column != "id")
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}"
+        )
@@ -0,0 +1,163 @@
+"""
+🛬 SINGLE-FLIGHT LOADER
+O5 Elite Level Cache Stampede Protection
+
+This module implements miss coalescing for cache-aside reads:
+- Per-key in-flight deduplication within a worker
+- Optional Redis lock so one worker loads while others wait
+- Bounded waits with timeouts and shared error propagation
+- Counters for leader loads, coalesced waits and lock contention
+"""
+
+import asyncio
+import uuid
+from typing import Dict, Any, Optional, Callable, Awaitable
+from dataclasses import dataclass
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Delete the lock only if we still own it
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+@dataclass
+class SingleFlightMetrics:
+    """Single-flight counters"""
+    loads: int = 0
+    coalesced: int = 0
+    remote_waits: int = 0
+    remote_hits: int = 0
+    timeouts: int = 0
+    errors: int = 0
+
+class SingleFlight:
+    """Runs at most one loader per key at a time
+
+    Concurrent ``do()`` calls for the same key in this worker await the
+    first caller's loader and receive its result or exception. With a
+    Redis client, the first worker also takes ``sf_lock:{key}``; other
+    workers poll ``recheck`` (normally a cache read) until the leader has
+    filled the cache, the lock is released, or the timeout expires.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 5.0,
+        redis_client: Any = None,
+        lock_ttl_ms: int = 5000,
+        poll_interval: float = 0.05
+    ):
+        self.timeout = timeout
+        self.redis_client = redis_client
+        self.lock_ttl_ms = lock_ttl_ms
+        self.poll_interval = poll_interval
+
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.metrics = SingleFlightMetrics()
+
+    async def do(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        recheck: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Any:
+        """Load key once, sharing the result with concurrent callers"""
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.metrics.coalesced += 1
+        else:
+            # The load runs as its own task so a caller that disconnects or
+            # times out does not cancel it for the others
+            task = asyncio.ensure_future(self._load(key, loader, recheck))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get single-flight statistics"""
+
+        return {
+            "in_flight": len(self.in_flight),
+            "loads": self.metrics.loads,
+            "coalesced": self.metrics.coalesced,
+            "remote_waits": self.metrics.remote_waits,
+            "remote_hits": self.metrics.remote_hits,
+            "timeouts": self.metrics.timeouts,
+            "errors": self.metrics.errors,
+            "distributed": self.redis_client is not None
+        }
+
+    # ==================== PRIVATE METHODS ====================
+
+    def _finish(self, key: str, task: asyncio.Task):
+        """Forget a finished load"""
+
+        self.in_flight.pop(key, None)
+        # Retrieve the exception so failures every caller gave up on are not
+        # reported as never retrieved (they were already logged in _load)
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        recheck: Optional[Callable[[], Awaitable[Any]]]
+    ) -> Any:
+        """Run one bounded load, counting failures"""
+
+        try:
+            return await asyncio.wait_for(self._lead(key, loader, recheck), timeout=self.timeout)
+        except Exception as e:
+            self.metrics.errors += 1
+            logger.warning("Single-flight load failed", key=key, error=str(e) or type(e).__name__)
+            raise
+
+    async def _lead(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        recheck: Optional[Callable[[], Awaitable[Any]]]
+    ) -> Any:
+        """Run the loader, coordinating with other workers when configured"""
+
+        if self.redis_client is None or recheck is None:
+            self.metrics.loads += 1
+            return await loader()
+
+        lock_key = f"sf_lock:{key}"
+        token = uuid.uuid4().hex
+
+        while True:
+            if await self.redis_client.set(lock_key, token, nx=True, px=self.lock_ttl_ms):
+                try:
+                    self.metrics.loads += 1
+                    return await loader()
+                finally:
+                    await self.redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+            # Another worker is loading; wait for it to fill the cache
+            self.metrics.remote_waits += 1
+            while await self.redis_client.exists(lock_key):
+                await asyncio.sleep(self.poll_interval)
+                result = await recheck()
+                if result is not None:
+                    self.metrics.remote_hits += 1
+                    return result
+
+            # Lock released: use the leader's result, or take over if it failed
+            result = await recheck()
+            if result is not None:
+                self.metrics.remote_hits += 1
+                return result
@@ -0,0 +1,303 @@
+"""
+🧱 STORAGE BACKEND INTERFACE
+O5 Elite Level Pluggable Persistence
+
+This module implements the contract shared by every note storage backend:
+- Note, status and query metric data models
+- Canonical note dictionaries and cached JSON payload helpers
+- Note change events and their handler registration
+- Abstract note, version and analytics operations
+- Backend selection from EnterpriseConfig
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable, Iterable
+from dataclasses import dataclass, field
+from enum import Enum
+from datetime import datetime
+
+import orjson
+
+from config.enterprise_config import EnterpriseConfig
+from core.versioning import DiffGranularity
+
+class StorageTier(Enum):
+    """Data storage tiers"""
+    HOT = "hot"          # Frequently accessed data (Redis)
+    WARM = "warm"        # Regular access data (PostgreSQL)
+    COLD = "cold"        # Archived data (S3/Object Storage)
+    VECTOR = "vector"    # Vector embeddings (Pinecone/Weaviate)
+
+class DataStatus(Enum):
+    """Data record status"""
+    ACTIVE = "active"
+    ARCHIVED = "archived"
+    DELETED = "deleted"
+    PENDING = "pending"
+
+@dataclass
+class QueryMetrics:
+    """Query performance metrics"""
+    query_time: float = 0.0
+    rows_returned: int = 0
+    cache_hit: bool = False
+    storage_tier: StorageTier = StorageTier.WARM
+    timestamp: datetime = field(default_factory=datetime.now)
+
+@dataclass
+class Note:
+    """Note data model"""
+    id: str
+    title: str
+    body: str
+    tags: List[str] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+    color: str = "#6B7280"
+    user_id: str = ""
+    workspace_id: Optional[str] = None
+    status: DataStatus = DataStatus.ACTIVE
+    created_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
+    version: int = 1
+    encrypted: bool = False
+    embedding: Optional[List[float]] = None
+    archive_key: Optional[str] = None  # Set while the body lives in cold storage
+
+class NoteEvent(Enum):
+    """Note change event types"""
+    CREATED = "note_created"
+    UPDATED = "note_updated"
+    DELETED = "note_deleted"
+
+@dataclass
+class NoteChange:
+    """A committed note change delivered to note event handlers"""
+    event_type: NoteEvent
+    note_id: str
+    user_id: str
+    workspace_id: Optional[str] = None
+    payload: Optional[bytes] = None  # Canonical note payload as committed
+    id: int = 0
+    attempts: int = 1
+    age: float = 0.0  # Seconds since the change was committed
+
+    @property
+    def note(self) -> Optional[Dict[str, Any]]:
+        return orjson.loads(self.payload) if self.payload else None
+
+NoteEventHandler = Callable[[NoteChange], Awaitable[None]]
+
+def note_to_dict(note: Note) -> Dict[str, Any]:
+    """Convert Note object to dictionary
+
+    Key order is part of the cached payload format: "encrypted" must stay
+    last (see payload_is_encrypted).
+    """
+
+    return {
+        "id": note.id,
+        "title": note.title,
+        "body": note.body,
+        "tags": note.tags,
+        "links": note.links,
+        "color": note.color,
+        "user_id": note.user_id,
+        "workspace_id": note.workspace_id,
+        "status": note.status.value,
+        "created_at": note.created_at.isoformat(),
+        "updated_at": note.updated_at.isoformat(),
+        "version": note.version,
+        "encrypted": note.encrypted
+    }
+
+def serialize_note(note: Note) -> bytes:
+    """Serialize a note to the canonical cached payload"""
+
+    return orjson.dumps(note_to_dict(note))
+
+def payload_owned_by(payload: bytes, user_id: str) -> bool:
+    """Check a cached payload's owner without parsing it
+
+    orjson emits no whitespace and escapes quotes inside strings, so the
+    exact key/value sequence can only come from the real user_id field.
+    """
+
+    return b'"user_id":' + orjson.dumps(user_id) + b"," in payload
+
+def payload_is_encrypted(payload: bytes) -> bool:
+    """Check a cached payload's encrypted flag (the last note_to_dict key)"""
+
+    return payload.endswith(b'"encrypted":true}')
+
+def flatten_performance_data(
+    performance_data: Dict[str, Any],
+    dimensions: Dict[str, Any]
+) -> List[Tuple[str, float, Dict[str, Any]]]:
+    """Split a snapshot into (metric_type, value, dimensions) rows
+
+    Numeric values become metric rows. Non-numeric values are attached
+    to those rows as dimensions rather than stored as 0.0, and nested
+    dicts (e.g. per-model metrics) are flattened with their key recorded
+    as the ``source`` dimension.
+    """
+
+    def is_numeric(value: Any) -> bool:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    shared = dict(dimensions)
+    for name, value in performance_data.items():
+        if not is_numeric(value) and not isinstance(value, dict) and value is not None:
+            shared[name] = value
+
+    rows = []
+    for name, value in performance_data.items():
+        if is_numeric(value):
+            rows.append((name, float(value), shared))
+        elif isinstance(value, dict):
+            nested = {**shared, "source": name}
+            nested.update({
+                key: item for key, item in value.items()
+                if not is_numeric(item) and item is not None
+            })
+            rows.extend(
+                (key, float(item), nested)
+                for key, item in value.items()
+                if is_numeric(item)
+            )
+
+    return rows
+
+class StorageBackend(ABC):
+    """Note, version and analytics operations every backend provides"""
+
+    payload_owned_by = staticmethod(payload_owned_by)
+    payload_is_encrypted = staticmethod(payload_is_encrypted)
+
+    @abstractmethod
+    async def initialize(self):
+        """Open connections and create the schema"""
+
+    @abstractmethod
+    async def create_note(self, note_data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        """Create a note"""
+
+    @abstractmethod
+    async def get_note(self, note_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a note owned by user_id"""
+
+    @abstractmethod
+    async def get_note_payload(self, note_id: str, user_id: str) -> Optional[bytes]:
+        """Get a note as canonical JSON bytes"""
+
+    @abstractmethod
+    async def update_note(self, note_id: str, note_data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        """Update a note, versioning the previous content"""
+
+    @abstractmethod
+    async def get_notes(self, user_id: str, limit: int = 50, offset: int = 0, workspace_id: str = None) -> List[Dict[str, Any]]:
+        """Get a page of active notes, newest first"""
+
+    @abstractmethod
+    async def vector_search(self, query: str, user_id: str, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        """Search a user's notes"""
+
+    @abstractmethod
+    async def delete_note(self, note_id: str, user_id: str) -> bool:
+        """Soft delete a note"""
+
+    @abstractmethod
+    async def create_version(self, note_id: str, user_id: str) -> str:
+        """Create an explicit version of a note"""
+
+    @abstractmethod
+    async def get_note_versions(
+        self,
+        note_id: str,
+        user_id: str,
+        limit: int = 50,
+        before_version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """List version metadata newest-first with keyset pagination"""
+
+    @abstractmethod
+    async def get_note_version(self, note_id: str, version: int, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single reconstructed version of a note"""
+
+    @abstractmethod
+    async def diff_note_versions(
+        self,
+        note_id: str,
+        from_version: int,
+        to_version: int,
+        user_id: str,
+        granularity: DiffGranularity = DiffGranularity.LINE
+    ) -> Optional[Dict[str, Any]]:
+        """Diff two versions of a note"""
+
+    @abstractmethod
+    async def autocomplete_titles(
+        self,
+        user_id: str,
+        query: str,
+        workspace_id: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Top note titles for a [[ link query, ranked by match, recency and backlinks"""
+
+    @abstractmethod
+    def register_note_handler(
+        self,
+        name: str,
+        handler: NoteEventHandler,
+        event_types: Optional[Iterable[NoteEvent]] = None
+    ):
+        """Run handler after every committed note change (all types by default)
+
+        Handlers may see a change more than once and must be idempotent.
+        """
+
+    @abstractmethod
+    async def can_edit_note(self, note_id: str, user_id: str) -> bool:
+        """Check if user can edit note"""
+
+    @abstractmethod
+    async def save_model_performance(self, request_id: str, performance_data: Dict[str, Any]):
+        """Record an AI model performance event"""
+
+    @abstractmethod
+    async def get_model_performance_history(self) -> Dict[str, Any]:
+        """Get historical model performance data"""
+
+    @abstractmethod
+    async def save_performance_snapshot(
+        self,
+        performance_data: Dict[str, Any],
+        dimensions: Optional[Dict[str, Any]] = None
+    ):
+        """Save a performance snapshot as metric rows"""
+
+    @abstractmethod
+    async def health_check(self) -> Dict[str, Any]:
+        """Backend health check"""
+
+    @abstractmethod
+    async def shutdown(self):
+        """Flush pending writes and close connections"""
+
+def create_data_manager(config: EnterpriseConfig) -> StorageBackend:
+    """Create the storage backend selected by STORAGE_BACKEND
+
+    Backends are imported on demand so the embedded backend does not need
+    the PostgreSQL, Redis or embedding model packages installed.
+    """
+
+    backend = config.STORAGE_BACKEND
+    if backend == "postgres":
+        from core.data_manager import EnterpriseDataManager
+        return EnterpriseDataManager(config)
+
+    if backend == "embedded":
+        from core.embedded_store import EmbeddedDataManager
+        return EmbeddedDataManager(config)
+
+    raise ValueError(f"Unsupported storage backend: {backend}")
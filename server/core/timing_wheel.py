@@ -0,0 +1,115 @@
+"""
+⏱️ HIERARCHICAL TIMING WHEEL
+O5 Elite Level Expiry Scheduling
+
+This module implements key expiry in O(1) amortized time per key:
+- Levels of slots, each slot of a level spanning a whole turn of the level below
+- Schedule, reschedule and cancel by key in O(1)
+- Advancing the clock touches only due slots, never every scheduled key
+- Keys in an upper level cascade down once as their time approaches
+"""
+
+import math
+from typing import Dict, List, Set, Tuple
+
+class TimingWheel:
+    """Expire keys at a deadline, to tick_seconds resolution
+
+    Level 0 has one slot per tick; each slot of level L covers slots**L
+    ticks, so four levels of 64 one-second slots cover about 194 days.
+    A key sits in the lowest level whose span reaches its deadline and
+    moves down at most levels - 1 times before it fires. Deadlines past
+    the top level's span park in its furthest slot and are placed again
+    when that slot cascades.
+    """
+
+    def __init__(self, now: float, tick_seconds: float = 1.0, slot_bits: int = 6, levels: int = 4):
+        self.tick_seconds = tick_seconds
+        self.slot_bits = slot_bits
+        self.slot_mask = (1 << slot_bits) - 1
+        self.levels = levels
+        self.wheels: List[List[Set[str]]] = [
+            [set() for _ in range(1 << slot_bits)] for _ in range(levels)
+        ]
+        self.timers: Dict[str, Tuple[int, int, int]] = {}  # key -> (deadline tick, level, slot)
+        self.current_tick = self._tick(now)
+        self.cascaded = 0
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def schedule(self, key: str, expires_at: float):
+        """Expire key at expires_at, replacing any earlier schedule"""
+
+        self.cancel(key)
+        self._place(key, max(math.ceil(expires_at / self.tick_seconds), self.current_tick + 1))
+
+    def cancel(self, key: str) -> bool:
+        timer = self.timers.pop(key, None)
+        if timer is None:
+            return False
+
+        _, level, slot = timer
+        self.wheels[level][slot].discard(key)
+        return True
+
+    def advance(self, now: float) -> List[str]:
+        """Move the clock to now and return the keys that have expired"""
+
+        target = self._tick(now)
+        if not self.timers:
+            self.current_tick = max(self.current_tick, target)
+            return []
+
+        expired = []
+        while self.current_tick < target:
+            self.current_tick += 1
+            tick = self.current_tick
+
+            # Cascade upper levels whose slot boundary this tick crosses,
+            # highest first so keys can fall through several levels
+            level = 1
+            while level < self.levels and not (tick >> (self.slot_bits * (level - 1))) & self.slot_mask:
+                level += 1
+            for upper in range(level - 1, 0, -1):
+                self._cascade(upper, (tick >> (self.slot_bits * upper)) & self.slot_mask)
+
+            slot = self.wheels[0][tick & self.slot_mask]
+            for key in slot:
+                del self.timers[key]
+            expired.extend(slot)
+            slot.clear()
+
+            if not self.timers:
+                self.current_tick = target
+                break
+
+        return expired
+
+    # ==================== PRIVATE METHODS ====================
+
+    def _tick(self, now: float) -> int:
+        return math.floor(now / self.tick_seconds)
+
+    def _place(self, key: str, deadline: int):
+        slot_tick = deadline
+        for level in range(self.levels):
+            if deadline - self.current_tick < 1 << (self.slot_bits * (level + 1)):
+                break
+        else:
+            # Beyond the top level: park in its furthest slot for now
+            slot_tick = self.current_tick + (1 << (self.slot_bits * self.levels)) - 1
+
+        slot = (slot_tick >> (self.slot_bits * level)) & self.slot_mask
+        self.wheels[level][slot].add(key)
+        self.timers[key] = (deadline, level, slot)
+
+    def _cascade(self, level: int, slot_index: int):
+        slot = self.wheels[level][slot_index]
+        keys = list(slot)
+        slot.clear()
+
+        for key in keys:
+            deadline = self.timers.pop(key)[0]
+            self._place(key, deadline)
+        self.cascaded += len(keys)
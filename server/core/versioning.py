@@ -0,0 +1,159 @@
+"""
+🕰️ NOTE VERSION STORAGE
+O5 Elite Level Version History Encoding
+
+This module implements compact storage for note version history:
+- Line-level deltas against the previous version
+- Periodic full snapshots to bound reconstruction cost
+- Chain reconstruction from a snapshot plus its deltas
+- Line- and word-level diffs between arbitrary versions
+"""
+
+import difflib
+import json
+import re
+from typing import Dict, List, Any, Optional, Union, Sequence
+from dataclasses import dataclass
+from enum import Enum
+
+_WORD_TOKEN = re.compile(r"\s+|\w+|[^\w\s]")
+
+# change_type of a note's live version, which has no note_versions row
+# until the next update stores it
+CURRENT_CHANGE_TYPE = "current"
+
+class VersionKind(Enum):
+    """How a version row stores its body"""
+    SNAPSHOT = "snapshot"  # Full body
+    DELTA = "delta"        # Patch against the previous version
+
+@dataclass
+class VersionRecord:
+    """A stored note version as read back from note_versions"""
+    version: int
+    kind: VersionKind
+    body: Optional[str] = None
+    delta: Optional[str] = None
+
+class VersionDelta:
+    """Line-level delta encoding for note bodies
+
+    A delta is a JSON list of ops applied in order to the previous body:
+    ``[i1, i2]`` copies base lines ``i1:i2`` and a string inserts literal text.
+    """
+
+    @staticmethod
+    def compute(base: str, target: str) -> str:
+        """Compute the delta that turns base into target"""
+
+        base_lines = base.splitlines(keepends=True)
+        target_lines = target.splitlines(keepends=True)
+
+        ops: List[Union[List[int], str]] = []
+        matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                ops.append([i1, i2])
+            elif tag in ("replace", "insert"):
+                ops.append("".join(target_lines[j1:j2]))
+            # "delete" needs no op: the base lines are simply not copied
+
+        return json.dumps(ops, separators=(",", ":"))
+
+    @staticmethod
+    def apply(base: str, delta: str) -> str:
+        """Apply a delta produced by compute() to base"""
+
+        base_lines = base.splitlines(keepends=True)
+        parts: List[str] = []
+        for op in json.loads(delta):
+            if isinstance(op, str):
+                parts.append(op)
+            else:
+                parts.extend(base_lines[op[0]:op[1]])
+        return "".join(parts)
+
+    @staticmethod
+    def encode(previous_body: Optional[str], body: str, chain_length: int, snapshot_interval: int) -> VersionRecord:
+        """Choose the storage form for a new version
+
+        ``chain_length`` is the number of versions stored since (and including)
+        the latest snapshot. A snapshot is written when there is no previous
+        body, when the chain would exceed ``snapshot_interval``, or when the
+        delta would not be smaller than the body itself.
+        """
+
+        if previous_body is None or chain_length >= snapshot_interval:
+            return VersionRecord(version=0, kind=VersionKind.SNAPSHOT, body=body)
+
+        delta = VersionDelta.compute(previous_body, body)
+        if len(delta) >= len(body):
+            return VersionRecord(version=0, kind=VersionKind.SNAPSHOT, body=body)
+
+        return VersionRecord(version=0, kind=VersionKind.DELTA, delta=delta)
+
+    @staticmethod
+    def reconstruct(chain: Sequence[VersionRecord]) -> Optional[str]:
+        """Rebuild the body of the last record in a version chain
+
+        The chain must be ordered by version and start at a snapshot. Rows
+        with a duplicate version number (written before versions were
+        deduplicated) are skipped.
+        """
+
+        body: Optional[str] = None
+        last_version: Optional[int] = None
+
+        for record in chain:
+            if record.version == last_version:
+                continue
+            last_version = record.version
+
+            if record.kind == VersionKind.SNAPSHOT:
+                body = record.body
+            elif body is not None:
+                body = VersionDelta.apply(body, record.delta)
+
+        return body
+
+class DiffGranularity(Enum):
+    """Unit of comparison for version diffs"""
+    LINE = "line"
+    WORD = "word"
+
+def diff_texts(old: str, new: str, granularity: DiffGranularity = DiffGranularity.LINE) -> List[Dict[str, str]]:
+    """Diff two texts into a list of {"op", "text"} segments
+
+    ``op`` is one of ``equal``, ``insert`` or ``delete``; a replacement is
+    emitted as a delete followed by an insert.
+    """
+
+    if granularity == DiffGranularity.WORD:
+        old_tokens = _WORD_TOKEN.findall(old)
+        new_tokens = _WORD_TOKEN.findall(new)
+    else:
+        old_tokens = old.splitlines(keepends=True)
+        new_tokens = new.splitlines(keepends=True)
+
+    segments: List[Dict[str, str]] = []
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            segments.append({"op": "equal", "text": "".join(old_tokens[i1:i2])})
+            continue
+        if tag in ("replace", "delete"):
+            segments.append({"op": "delete", "text": "".join(old_tokens[i1:i2])})
+        if tag in ("replace", "insert"):
+            segments.append({"op": "insert", "text": "".join(new_tokens[j1:j2])})
+
+    return segments
+
+def row_to_version_record(row: Sequence[Any]) -> VersionRecord:
+    """Build a VersionRecord from a (version, kind, body, delta) row"""
+
+    return VersionRecord(
+        version=row[0],
+        kind=VersionKind(row[1] or VersionKind.SNAPSHOT.value),
+        body=row[2],
+        delta=row[3]
+    )
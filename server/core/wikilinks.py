@@ -0,0 +1,312 @@
+"""
+🔗 WIKILINK RESOLUTION
+O5 Elite Level Note Graph Maintenance
+
+This module implements server-side [[wikilink]] handling:
+- Single-pass extraction of [[Title]] and [[ID:note-id]] references
+- Resolution through a per-workspace hash index on normalized titles
+- A note_links edge table recording resolved and dangling references
+- Incremental maintenance: only notes whose links change are touched
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass
+import structlog
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.sharding import TENANT_KEY_SQL, tenant_key
+from core.storage_backend import Note
+
+logger = structlog.get_logger(__name__)
+
+# Must match the idx_notes_title_key expression (migration 0002)
+TITLE_KEY_SQL = f"(({TENANT_KEY_SQL}) || '|' || lower(btrim(title)))"
+
+ID_PREFIX = "id:"
+TITLE_PREFIX = "t:"
+
+def extract_wikilinks(body: str) -> List[str]:
+    """Return [[...]] targets in order of appearance
+
+    Matches what the web client's extractWikiLinks() finds (``\\[\\[([^\\]]+)\\]\\]``)
+    in one left-to-right pass: the text between ``[[`` and the next ``]``
+    is a target when that ``]`` starts ``]]``; otherwise the scan resumes
+    after it.
+    """
+
+    targets = []
+    position = 0
+
+    while True:
+        start = body.find("[[", position)
+        if start < 0:
+            break
+
+        end = body.find("]", start + 2)
+        if end < 0:
+            break
+
+        if end > start + 2 and body.startswith("]]", end):
+            target = body[start + 2:end].strip()
+            if target:
+                targets.append(target)
+            position = end + 2
+        else:
+            position = end + 1
+
+    return targets
+
+def title_key(title: str) -> str:
+    """Normalized title, the Python side of lower(btrim(title))"""
+
+    return title.strip(" ").lower()
+
+def link_key(target: str) -> str:
+    """Edge key for a target: ``id:<note id>`` or ``t:<normalized title>``"""
+
+    if target[:3].upper() == "ID:":
+        return ID_PREFIX + target.split(":")[1].strip()
+    return TITLE_PREFIX + title_key(target)
+
+@dataclass
+class LinkEdge:
+    """One distinct reference from a note, in order of first appearance"""
+    target_key: str
+    position: int
+    target_id: Optional[str] = None
+
+def ordered_targets(edges: List[LinkEdge]) -> List[str]:
+    """The note's ``links`` value: resolved ids, deduplicated, in body order"""
+
+    links = []
+    for edge in sorted(edges, key=lambda edge: edge.position):
+        if edge.target_id and edge.target_id not in links:
+            links.append(edge.target_id)
+    return links
+
+class NoteLinkIndex:
+    """Resolve and maintain wikilinks within one tenant's database
+
+    Titles resolve through the idx_notes_title_key hash index, keyed by
+    tenant and normalized title; when several notes share a title the
+    oldest wins. note_links keeps one row per distinct reference, with
+    target_id NULL while the reference dangles. sync() is idempotent and
+    reads current state, so redelivered outbox events converge.
+    """
+
+    def __init__(self):
+        self.stats = {
+            "resolved": 0,
+            "dangling": 0,
+            "reattached": 0,
+            "detached": 0,
+            "notes_relinked": 0
+        }
+
+    async def resolve(self, session: AsyncSession, note: Note) -> List[LinkEdge]:
+        """Resolve the references in a note's body with one query"""
+
+        edges: Dict[str, LinkEdge] = {}
+        for target in extract_wikilinks(note.body or ""):
+            key = link_key(target)
+            if key not in edges and key not in (ID_PREFIX, TITLE_PREFIX):
+                edges[key] = LinkEdge(key, len(edges))
+
+        if not edges:
+            return []
+
+        title_keys = [key[len(TITLE_PREFIX):] for key in edges if key.startswith(TITLE_PREFIX)]
+        targets = await self._lookup(
+            session,
+            tenant_key(note.workspace_id, note.user_id),
+            title_keys,
+            [key[len(ID_PREFIX):] for key in edges if key.startswith(ID_PREFIX)],
+            own=note
+        )
+
+        for key, edge in edges.items():
+            edge.target_id = targets.get(key)
+            self.stats["resolved" if edge.target_id else "dangling"] += 1
+
+        return list(edges.values())
+
+    async def sync(
+        self,
+        session: AsyncSession,
+        note_id: str,
+        note_tenant: str,
+        note: Optional[Note]
+    ) -> List[Tuple[str, str]]:
+        """Bring note_links and affected notes' ``links`` up to date after a change
+
+        ``note`` is the current state, or None once the note is deleted.
+        Returns (id, user_id) of every note whose ``links`` changed; the
+        caller commits and invalidates their caches. Encrypted bodies are
+        opaque, so an encrypted note keeps the links its client computed.
+        """
+
+        affected: Set[str] = set()
+        own_key = None
+
+        if note is None or note.encrypted:
+            await session.execute(text("DELETE FROM note_links WHERE source_id = :id"), {"id": note_id})
+        else:
+            edges = await self.resolve(session, note)
+            await self._replace_edges(session, note_id, note_tenant, edges)
+            affected.add(note_id)
+
+        if note is not None:
+            own_key = TITLE_PREFIX + title_key(note.title)
+
+        # References that stop matching this note: all of them once it is
+        # deleted, title references under its old title after a rename
+        result = await session.execute(
+            text("""
+            UPDATE note_links SET target_id = NULL
+            WHERE target_id = :id
+              AND (CAST(:own_key AS TEXT) IS NULL OR (target_key LIKE 't:%' AND target_key != :own_key))
+            RETURNING source_id, target_key
+            """),
+            {"id": note_id, "own_key": own_key}
+        )
+        detached = result.fetchall()
+        affected.update(row[0] for row in detached)
+        self.stats["detached"] += len(detached)
+
+        # A detached title may still name another note, and dangling
+        # references to this note's title now resolve to it
+        reattach: Dict[str, str] = {}
+        titles = [row[1][len(TITLE_PREFIX):] for row in detached if row[1].startswith(TITLE_PREFIX)]
+        if titles:
+            reattach = await self._lookup(session, note_tenant, titles, [], exclude_id=note_id)
+        if own_key:
+            reattach[own_key] = note_id
+
+        for key, target_id in reattach.items():
+            result = await session.execute(
+                text("""
+                UPDATE note_links SET target_id = :target_id
+                WHERE tenant = :tenant AND target_key = :target_key AND target_id IS NULL
+                RETURNING source_id
+                """),
+                {"tenant": note_tenant, "target_key": key, "target_id": target_id}
+            )
+            sources = [row[0] for row in result.fetchall()]
+            affected.update(sources)
+            self.stats["reattached"] += len(sources)
+
+        changed = await self._refresh_links(session, sorted(affected))
+        logger.debug("Wikilinks synced", note_id=note_id, detached=len(detached), relinked=len(changed))
+        return changed
+
+    # ==================== PRIVATE METHODS ====================
+
+    async def _lookup(
+        self,
+        session: AsyncSession,
+        tenant: str,
+        titles: List[str],
+        note_ids: List[str],
+        own: Optional[Note] = None,
+        exclude_id: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Map edge keys to the notes they name in one tenant
+
+        ``own`` is the note being written: it is matched by its new title
+        rather than the stored row, which may be stale or not exist yet.
+        """
+
+        if not titles and not note_ids:
+            return {}
+
+        exclude_id = own.id if own else exclude_id
+        result = await session.execute(
+            text(f"""
+            SELECT id, lower(btrim(title)), created_at FROM notes
+            WHERE status != 'deleted'
+              AND ({TITLE_KEY_SQL} = ANY(:title_keys)
+                   OR (id = ANY(:note_ids) AND ({TENANT_KEY_SQL}) = :tenant))
+            """),
+            {
+                "title_keys": [f"{tenant}|{title}" for title in titles],
+                "note_ids": note_ids,
+                "tenant": tenant
+            }
+        )
+
+        candidates = [row for row in result.fetchall() if row[0] != exclude_id]
+        if own:
+            candidates.append((own.id, title_key(own.title), own.created_at))
+
+        wanted_titles = set(titles)
+        wanted_ids = set(note_ids)
+        targets: Dict[str, str] = {}
+        for found_id, found_title, _ in sorted(candidates, key=lambda row: (row[2], row[0])):
+            if found_id in wanted_ids:
+                targets[ID_PREFIX + found_id] = found_id
+            if found_title in wanted_titles:
+                targets.setdefault(TITLE_PREFIX + found_title, found_id)
+        return targets
+
+    async def _replace_edges(self, session: AsyncSession, note_id: str, tenant: str, edges: List[LinkEdge]):
+        """Make note_links hold exactly these edges for the note"""
+
+        await session.execute(
+            text("DELETE FROM note_links WHERE source_id = :id AND target_key != ALL(:keys)"),
+            {"id": note_id, "keys": [edge.target_key for edge in edges]}
+        )
+
+        if edges:
+            await session.execute(
+                text("""
+                INSERT INTO note_links (source_id, target_key, tenant, target_id, position)
+                VALUES (:source_id, :target_key, :tenant, :target_id, :position)
+                ON CONFLICT (source_id, target_key) DO UPDATE
+                SET target_id = EXCLUDED.target_id, position = EXCLUDED.position, tenant = EXCLUDED.tenant
+                """),
+                [
+                    {
+                        "source_id": note_id,
+                        "target_key": edge.target_key,
+                        "tenant": tenant,
+                        "target_id": edge.target_id,
+                        "position": edge.position
+                    }
+                    for edge in edges
+                ]
+            )
+
+    async def _refresh_links(self, session: AsyncSession, note_ids: List[str]) -> List[Tuple[str, str]]:
+        """Recompute ``links`` of these notes from note_links, writing only changes
+
+        Rewritten rows get a new updated_at, so incremental backups and shard
+        move catch-up passes pick the change up.
+        """
+
+        if not note_ids:
+            return []
+
+        result = await session.execute(
+            text("""
+            WITH computed AS (
+                SELECT source.id, ARRAY(
+                    SELECT CAST(l.target_id AS TEXT) FROM note_links l
+                    WHERE l.source_id = source.id AND l.target_id IS NOT NULL
+                    GROUP BY l.target_id
+                    ORDER BY MIN(l.position)
+                ) AS links
+                FROM unnest(CAST(:note_ids AS VARCHAR[])) AS source(id)
+            )
+            UPDATE notes n SET links = computed.links, updated_at = LOCALTIMESTAMP
+            FROM computed
+            WHERE n.id = computed.id AND n.status != 'deleted'
+              AND n.links IS DISTINCT FROM computed.links
+            RETURNING n.id, n.user_id
+            """),
+            {"note_ids": note_ids}
+        )
+        changed = [(row[0], row[1]) for row in result.fetchall()]
+        self.stats["notes_relinked"] += len(changed)
+        return changed
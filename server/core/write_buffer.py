@@ -0,0 +1,340 @@
+"""
+📥 WRITE-BEHIND BUFFER
+O5 Elite Level Batched Persistence
+
+This module implements a bounded write-behind buffer for append-only rows:
+- Size- and time-triggered batch flushes
+- Bounded memory with drop or spill-to-disk overflow
+- Automatic replay of spilled rows once the store catches up, streamed
+  in batches from a per-process spill file
+- Full drain on shutdown
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Any, Optional, Callable, Awaitable
+from dataclasses import dataclass
+from enum import Enum
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+class OverflowPolicy(Enum):
+    """What to do with rows once the buffer is full"""
+    DROP = "drop"    # Discard incoming rows
+    SPILL = "spill"  # Append the oldest rows to a local spill file
+
+@dataclass
+class WriteBufferMetrics:
+    """Write buffer counters"""
+    buffered: int = 0
+    flushed: int = 0
+    batches: int = 0
+    flush_failures: int = 0
+    dropped: int = 0
+    spilled: int = 0
+    replayed: int = 0
+    last_flush_time: float = 0.0
+
+class WriteBehindBuffer:
+    """Collects rows in memory and writes them in batches
+
+    ``flush_fn`` receives a list of row dicts and must persist all of them
+    (or raise). Rows are flushed when ``max_batch`` rows are waiting or
+    ``flush_interval_ms`` has passed, whichever comes first.
+
+    Replay can repeat a batch (the offset is saved after it commits), so
+    ``flush_fn`` must be idempotent. Each process spills to its own file;
+    files left by processes that have exited are adopted on start.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+        max_batch: int = 500,
+        flush_interval_ms: int = 1000,
+        max_buffered: int = 50000,
+        overflow_policy: OverflowPolicy = OverflowPolicy.SPILL,
+        spill_dir: Optional[str] = None,
+        flush_timeout: float = 10.0
+    ):
+        self.name = name
+        self.flush_fn = flush_fn
+        self.max_batch = max(1, max_batch)
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_buffered = max(self.max_batch, max_buffered)
+        self.overflow_policy = overflow_policy
+        self.flush_timeout = flush_timeout
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_path = self.spill_dir / f"{name}.{os.getpid()}.jsonl" if spill_dir else None
+
+        self.rows: deque = deque()
+        self.metrics = WriteBufferMetrics()
+
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._retry_delay = 0.0
+
+    def start(self):
+        """Start the background flush loop"""
+
+        if self.spill_path:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self._adopt_orphaned_spills()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    def add(self, row: Dict[str, Any]):
+        """Queue a row for writing (never blocks on the database)"""
+
+        if len(self.rows) >= self.max_buffered:
+            self._handle_overflow(row)
+            return
+
+        self.rows.append(row)
+        self.metrics.buffered = len(self.rows)
+
+        if len(self.rows) >= self.max_batch:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Write out one batch; returns the number of rows written"""
+
+        async with self._flush_lock:
+            if not self.rows:
+                return 0
+
+            batch = [self.rows.popleft() for _ in range(min(self.max_batch, len(self.rows)))]
+            start_time = time.time()
+
+            try:
+                await asyncio.wait_for(self.flush_fn(batch), timeout=self.flush_timeout)
+            except Exception:
+                # Put the batch back at the front, overflowing if necessary
+                self.rows.extendleft(reversed(batch))
+                overflow = len(self.rows) - self.max_buffered
+                if overflow > 0:
+                    excess = [self.rows.popleft() for _ in range(overflow)]
+                    if self.overflow_policy == OverflowPolicy.SPILL:
+                        self._spill(excess)
+                    else:
+                        self.metrics.dropped += overflow
+                self.metrics.flush_failures += 1
+                self.metrics.buffered = len(self.rows)
+                raise
+
+            self.metrics.flushed += len(batch)
+            self.metrics.batches += 1
+            self.metrics.last_flush_time = time.time() - start_time
+            self.metrics.buffered = len(self.rows)
+            return len(batch)
+
+    async def drain(self):
+        """Stop the flush loop and write out everything still buffered"""
+
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            while self.rows:
+                await self.flush()
+            await self._replay_spill()
+        except Exception as e:
+            logger.error("Write buffer drain failed", buffer=self.name, remaining=len(self.rows), error=str(e))
+            if self.overflow_policy == OverflowPolicy.SPILL:
+                self._spill(list(self.rows))
+                self.rows.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffer statistics"""
+
+        return {
+            "buffered": len(self.rows),
+            "max_buffered": self.max_buffered,
+            "flushed": self.metrics.flushed,
+            "batches": self.metrics.batches,
+            "flush_failures": self.metrics.flush_failures,
+            "dropped": self.metrics.dropped,
+            "spilled": self.metrics.spilled,
+            "replayed": self.metrics.replayed,
+            "last_flush_time": self.metrics.last_flush_time,
+            "overflow_policy": self.overflow_policy.value
+        }
+
+    # ==================== PRIVATE METHODS ====================
+
+    async def _flush_loop(self):
+        """Flush on size or interval, backing off while the store is failing"""
+
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval + self._retry_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                while self.rows:
+                    written = await self.flush()
+                    if written < self.max_batch:
+                        break
+
+                if len(self.rows) < self.max_batch:
+                    await self._replay_spill()
+
+                self._retry_delay = 0.0
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._retry_delay = min(30.0, max(1.0, self._retry_delay * 2))
+                logger.warning(
+                    "Write buffer flush failed",
+                    buffer=self.name, buffered=len(self.rows), retry_in=self._retry_delay, error=str(e)
+                )
+
+    def _handle_overflow(self, row: Dict[str, Any]):
+        """Apply the overflow policy to a row that does not fit"""
+
+        if self.overflow_policy == OverflowPolicy.SPILL and self.spill_path:
+            # Spill the oldest batch in one write to make room
+            oldest = [self.rows.popleft() for _ in range(min(self.max_batch, len(self.rows)))]
+            self._spill(oldest)
+            self.rows.append(row)
+            self.metrics.buffered = len(self.rows)
+        else:
+            self.metrics.dropped += 1
+
+    def _spill(self, rows: List[Dict[str, Any]]):
+        """Append rows to the spill file as JSON lines"""
+
+        if not rows or not self.spill_path:
+            self.metrics.dropped += len(rows)
+            return
+
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as spill_file:
+                spill_file.write("".join(json.dumps(row, default=_encode_spill_value) + "\n" for row in rows))
+            self.metrics.spilled += len(rows)
+        except OSError as e:
+            self.metrics.dropped += len(rows)
+            logger.error("Write buffer spill failed", buffer=self.name, rows=len(rows), error=str(e))
+
+    async def _replay_spill(self):
+        """Write previously spilled rows back through flush_fn"""
+
+        if not self.spill_path:
+            return
+
+        if self.spill_path.exists():
+            os.replace(self.spill_path, self._claim_path())
+
+        for replay_path in sorted(self.spill_dir.glob(f"{self.name}.{os.getpid()}.*.replay")):
+            await self._replay_file(replay_path)
+
+    async def _replay_file(self, replay_path: Path):
+        """Replay one spill file in max_batch chunks, resuming from its offset"""
+
+        offset_path = replay_path.with_suffix(".offset")
+
+        # Skip rows already written by an interrupted replay
+        done = int(offset_path.read_text()) if offset_path.exists() else 0
+        position = 0
+        batch: List[Dict[str, Any]] = []
+
+        with open(replay_path, "r", encoding="utf-8") as replay_file:
+            for line in replay_file:
+                if not line.strip():
+                    continue
+                position += 1
+                if position <= done:
+                    continue
+
+                batch.append(json.loads(line, object_hook=_decode_spill_value))
+                if len(batch) >= self.max_batch:
+                    await self._replay_batch(batch, offset_path, position)
+                    batch = []
+
+            if batch:
+                await self._replay_batch(batch, offset_path, position)
+
+        replay_path.unlink(missing_ok=True)
+        offset_path.unlink(missing_ok=True)
+        logger.info("Replayed spilled rows", buffer=self.name, rows=max(0, position - done))
+
+    async def _replay_batch(self, batch: List[Dict[str, Any]], offset_path: Path, position: int):
+        await asyncio.wait_for(self.flush_fn(batch), timeout=self.flush_timeout)
+        self.metrics.replayed += len(batch)
+        offset_path.write_text(str(position))
+
+    def _claim_path(self) -> Path:
+        """A fresh replay file name owned by this process"""
+
+        return self.spill_dir / f"{self.name}.{os.getpid()}.{time.time_ns()}.replay"
+
+    def _adopt_orphaned_spills(self):
+        """Take over spill and replay files of processes that are gone
+
+        The rename is atomic, so when several workers start together only
+        one of them claims each file.
+        """
+
+        for path in sorted(self.spill_dir.glob(f"{self.name}.*")):
+            if path.suffix not in (".jsonl", ".replay"):
+                continue
+
+            # Files named without a pid predate per-process spilling
+            owner = path.name[len(self.name) + 1:].split(".")[0]
+            pid = int(owner) if owner.isdigit() else None
+            if pid is not None and (pid == os.getpid() or _process_alive(pid)):
+                continue
+
+            claimed = self._claim_path()
+            try:
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue
+
+            # Carry a partial replay's progress along; without it the
+            # file is replayed from the start, which flush_fn tolerates
+            offset_path = path.with_suffix(".offset")
+            if path.suffix == ".replay" and offset_path.exists():
+                try:
+                    os.replace(offset_path, claimed.with_suffix(".offset"))
+                except FileNotFoundError:
+                    pass
+            logger.info("Adopted orphaned spill file", buffer=self.name, path=str(path), pid=pid)
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _encode_spill_value(value: Any) -> Any:
+    """JSON encoder for spilled row values"""
+
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    return str(value)
+
+def _decode_spill_value(obj: Dict[str, Any]) -> Any:
+    """JSON decoder for spilled row values"""
+
+    if "__datetime__" in obj and len(obj) == 1:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
@@ -29,8 +29,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import uvicorn
+import orjson
 from contextlib import asynccontextmanager
 import redis.asyncio as redis
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
@@ -42,7 +43,10 @@ from core.ai_orchestrator import LLMOrchestrator, OrchestrationRequest, Orchestr
 from core.security import SecurityManager, EncryptionService, AuthenticationService
 from core.collaboration import CollaborationEngine, RealTimeSync
 from core.analytics import AnalyticsEngine, PerformanceMonitor
-from core.data_manager import EnterpriseDataManager, VectorStore
+from core.storage_backend import StorageBackend, NoteEvent, NoteChange, create_data_manager
+from core.versioning import DiffGranularity
+from core.sharding import ShardMovingError
+from core.pool_telemetry import pool_telemetry
 from core.monitoring import ObservabilityStack, MetricsCollector
 from core.cache import DistributedCacheManager
 from core.rate_limiter import EnterpriseRateLimiter
@@ -76,7 +80,7 @@ orchestrator: Optional[LLMOrchestrator] = None
 security_manager: Optional[SecurityManager] = None
 collaboration_engine: Optional[CollaborationEngine] = None
 analytics_engine: Optional[AnalyticsEngine] = None
-data_manager: Optional[EnterpriseDataManager] = None
+data_manager: Optional[StorageBackend] = None
 observability_stack: Optional[ObservabilityStack] = None
 cache_manager: Optional[DistributedCacheManager] = None
 rate_limiter: Optional[EnterpriseRateLimiter] = None
@@ -134,6 +138,11 @@ app.add_middleware(SecurityMiddleware)
 app.add_middleware(MonitoringMiddleware) 
 app.add_middleware(AuditMiddleware)
 
+@app.exception_handler(ShardMovingError)
+async def shard_moving_handler(request: Request, exc: ShardMovingError):
+    """Writes to a tenant frozen for a shard move are retryable"""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
 # Security components
 security = HTTPBearer(auto_error=False)
 
@@ -161,7 +170,7 @@ async def initialize_enterprise_systems():
         await cache_manager.initialize()
         
         # Initialize enterprise data manager
-        data_manager = EnterpriseDataManager(config)
+        data_manager = create_data_manager(config)
         await data_manager.initialize()
         
         # Initialize rate limiting
@@ -185,6 +194,11 @@ async def initialize_enterprise_systems():
         )
         await collaboration_engine.initialize()
         
+        # Collaborator broadcasts are delivered after the note change commits
+        data_manager.register_note_handler(
+            "broadcast", broadcast_note_change, [NoteEvent.CREATED, NoteEvent.UPDATED]
+        )
+        
         # Initialize analytics engine
         analytics_engine = AnalyticsEngine(
             config=config,
@@ -199,6 +213,13 @@ async def initialize_enterprise_systems():
         logger.error("❌ Failed to initialize enterprise systems", error=str(e))
         raise
 
+async def broadcast_note_change(change: NoteChange):
+    """Broadcast a committed note change to collaborators"""
+    if change.event_type == NoteEvent.CREATED:
+        await collaboration_engine.broadcast_note_created(change.user_id, change.note)
+    else:
+        await collaboration_engine.broadcast_note_updated(change.user_id, change.note)
+
 async def shutdown_enterprise_systems():
     """Gracefully shutdown all enterprise systems"""
     global orchestrator, security_manager, collaboration_engine
@@ -294,6 +315,7 @@ async def system_status(user=Depends(get_current_user)):
         "uptime": await get_system_uptime(),
         "performance_metrics": await analytics_engine.get_real_time_metrics(),
         "active_connections": await collaboration_engine.get_connection_count(),
+        "connection_pools": pool_telemetry.snapshot(),
         "ai_orchestrator_status": await orchestrator.get_status()
     }
 
@@ -370,12 +392,8 @@ async def create_note(note_data: Dict[str, Any], user=Depends(get_current_user))
         enhanced_data = await orchestrator.enhance_note_content(note_data, user)
         note_data.update(enhanced_data)
     
-    note = await data_manager.create_note(note_data, user.id)
-    
-    # Real-time collaboration
-    await collaboration_engine.broadcast_note_created(user.id, note)
-    
-    return note
+    # Collaborators are notified through the note outbox
+    return await data_manager.create_note(note_data, user.id)
 
 @app.get("/api/v1/notes")
 async def get_notes(
@@ -399,6 +417,35 @@ async def get_notes(
     
     return {"notes": notes, "total": len(notes)}
 
+@app.get("/api/v1/notes/autocomplete")
+async def autocomplete_note_titles(
+    q: str,
+    workspace_id: Optional[str] = None,
+    limit: int = 10,
+    user=Depends(get_current_user)
+):
+    """Title suggestions for [[ link insertion (declared before /notes/{note_id})"""
+    
+    suggestions = await data_manager.autocomplete_titles(user.id, q, workspace_id, max(1, min(limit, 50)))
+    return {"suggestions": suggestions}
+
+@app.get("/api/v1/notes/{note_id}")
+async def get_note(note_id: str, user=Depends(get_current_user)):
+    """Get a single note, served straight from the cached payload when possible"""
+    
+    payload = await data_manager.get_note_payload(note_id, user.id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    
+    # Plain notes need no per-request transformation: skip parse/re-serialize
+    if not data_manager.payload_is_encrypted(payload):
+        return Response(content=payload, media_type="application/json")
+    
+    # Decrypt sensitive content
+    note = orjson.loads(payload)
+    note["body"] = await security_manager.decrypt_content(note["body"])
+    return note
+
 @app.put("/api/v1/notes/{note_id}")
 async def update_note(
     note_id: str, 
@@ -411,20 +458,53 @@ async def update_note(
     if not await data_manager.can_edit_note(note_id, user.id):
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    # Version management
-    await data_manager.create_version(note_id, user.id)
-    
     # AI-enhanced updates
     if note_data.get("ai_enhance", True):
         enhanced_data = await orchestrator.enhance_note_update(note_data, user)
         note_data.update(enhanced_data)
     
-    updated_note = await data_manager.update_note(note_id, note_data, user.id)
+    # Collaborators are notified through the note outbox
+    return await data_manager.update_note(note_id, note_data, user.id)
+
+@app.get("/api/v1/notes/{note_id}/versions")
+async def get_note_versions(
+    note_id: str,
+    limit: int = 50,
+    before: Optional[int] = None,
+    user=Depends(get_current_user)
+):
+    """List note version metadata, newest first, with keyset pagination"""
     
-    # Real-time collaboration
-    await collaboration_engine.broadcast_note_updated(user.id, updated_note)
+    limit = max(1, min(limit, 200))
+    return await data_manager.get_note_versions(note_id, user.id, limit, before)
+
+@app.get("/api/v1/notes/{note_id}/versions/{version}")
+async def get_note_version(note_id: str, version: int, user=Depends(get_current_user)):
+    """Get the full content of a single note version"""
+    
+    note_version = await data_manager.get_note_version(note_id, version, user.id)
+    if not note_version:
+        raise HTTPException(status_code=404, detail="Version not found")
+    
+    return note_version
+
+@app.get("/api/v1/notes/{note_id}/diff")
+async def diff_note_versions(
+    note_id: str,
+    from_version: int,
+    to_version: int,
+    granularity: DiffGranularity = DiffGranularity.LINE,
+    user=Depends(get_current_user)
+):
+    """Diff two versions of a note at line or word granularity"""
+    
+    diff = await data_manager.diff_note_versions(
+        note_id, from_version, to_version, user.id, granularity
+    )
+    if not diff:
+        raise HTTPException(status_code=404, detail="Version not found")
     
-    return updated_note
+    return diff
 
 @app.websocket("/api/ws/collaboration/{workspace_id}")
 async def collaboration_websocket(websocket, workspace_id: str):
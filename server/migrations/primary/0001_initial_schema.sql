@@ -0,0 +1,142 @@
+-- Baseline schema. Every statement is idempotent so databases created
+-- before schema_version existed adopt this migration in place.
+
+-- Users table
+CREATE TABLE IF NOT EXISTS users (
+    id VARCHAR(255) PRIMARY KEY,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    username VARCHAR(255) UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    salt VARCHAR(255) NOT NULL,
+    security_level VARCHAR(50) DEFAULT 'restricted',
+    permissions TEXT[],
+    mfa_enabled BOOLEAN DEFAULT FALSE,
+    mfa_secret VARCHAR(255),
+    biometric_enabled BOOLEAN DEFAULT FALSE,
+    failed_login_attempts INTEGER DEFAULT 0,
+    last_login TIMESTAMP,
+    account_locked BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Notes table
+CREATE TABLE IF NOT EXISTS notes (
+    id VARCHAR(255) PRIMARY KEY,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    tags TEXT[],
+    links TEXT[],
+    color VARCHAR(7) DEFAULT '#6B7280',
+    user_id VARCHAR(255) REFERENCES users(id),
+    workspace_id VARCHAR(255),
+    status VARCHAR(50) DEFAULT 'active',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER DEFAULT 1,
+    encrypted BOOLEAN DEFAULT FALSE,
+    archive_key VARCHAR(255)
+);
+
+-- Cold tier stub marker (upgrade for existing installs)
+ALTER TABLE notes ADD COLUMN IF NOT EXISTS archive_key VARCHAR(255);
+
+-- Note versions table
+CREATE TABLE IF NOT EXISTS note_versions (
+    id VARCHAR(255) PRIMARY KEY,
+    note_id VARCHAR(255) REFERENCES notes(id),
+    version INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT,
+    delta TEXT,
+    storage_kind VARCHAR(10) DEFAULT 'snapshot',
+    changed_by VARCHAR(255) REFERENCES users(id),
+    change_type VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Delta-encoded version storage (upgrade for existing installs)
+ALTER TABLE note_versions ALTER COLUMN body DROP NOT NULL;
+ALTER TABLE note_versions ADD COLUMN IF NOT EXISTS delta TEXT;
+ALTER TABLE note_versions ADD COLUMN IF NOT EXISTS storage_kind VARCHAR(10) DEFAULT 'snapshot';
+
+-- Note shard placement (used when POSTGRES_SHARD_DSNS is set)
+CREATE TABLE IF NOT EXISTS shard_directory (
+    shard_key VARCHAR(512) PRIMARY KEY,
+    shard INTEGER NOT NULL,
+    state VARCHAR(20) DEFAULT 'active',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Workspaces table
+CREATE TABLE IF NOT EXISTS workspaces (
+    id VARCHAR(255) PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    description TEXT,
+    owner_id VARCHAR(255) REFERENCES users(id),
+    settings JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Workspace members table
+CREATE TABLE IF NOT EXISTS workspace_members (
+    workspace_id VARCHAR(255) REFERENCES workspaces(id),
+    user_id VARCHAR(255) REFERENCES users(id),
+    role VARCHAR(50) DEFAULT 'member',
+    permissions TEXT[],
+    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (workspace_id, user_id)
+);
+
+-- Analytics events table (range partitioned, see core.partitions)
+CREATE TABLE IF NOT EXISTS analytics_events (
+    id VARCHAR(255) NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    user_id VARCHAR(255) REFERENCES users(id),
+    session_id VARCHAR(255),
+    data JSONB,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Performance metrics table (range partitioned, see core.partitions)
+CREATE TABLE IF NOT EXISTS performance_metrics (
+    id VARCHAR(255) NOT NULL,
+    metric_type VARCHAR(100) NOT NULL,
+    value DOUBLE PRECISION NOT NULL,
+    dimensions JSONB,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Create indexes for performance
+CREATE INDEX IF NOT EXISTS idx_notes_user_id ON notes(user_id);
+CREATE INDEX IF NOT EXISTS idx_notes_workspace_id ON notes(workspace_id);
+CREATE INDEX IF NOT EXISTS idx_notes_tags ON notes USING GIN(tags);
+CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes(created_at);
+CREATE INDEX IF NOT EXISTS idx_notes_updated_at ON notes(updated_at);
+CREATE INDEX IF NOT EXISTS idx_notes_deleted ON notes(id) WHERE status = 'deleted';
+CREATE INDEX IF NOT EXISTS idx_note_versions_note_id ON note_versions(note_id);
+CREATE INDEX IF NOT EXISTS idx_analytics_events_user_id ON analytics_events(user_id);
+CREATE INDEX IF NOT EXISTS idx_analytics_events_timestamp ON analytics_events(timestamp);
+CREATE INDEX IF NOT EXISTS idx_performance_metrics_type ON performance_metrics(metric_type);
+CREATE INDEX IF NOT EXISTS idx_performance_metrics_timestamp ON performance_metrics(timestamp);
+
+-- Transactional outbox for note side effects (see core.outbox)
+CREATE TABLE IF NOT EXISTS note_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    event_type VARCHAR(50) NOT NULL,
+    note_id VARCHAR(255) NOT NULL,
+    user_id VARCHAR(255),
+    workspace_id VARCHAR(255),
+    payload TEXT,
+    attempts INTEGER DEFAULT 0,
+    completed TEXT[] DEFAULT '{}',
+    last_error TEXT,
+    dead BOOLEAN DEFAULT FALSE,
+    available_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_note_outbox_pending ON note_outbox(available_at, id) WHERE NOT dead;
@@ -0,0 +1,14 @@
+-- Bodies above the compression threshold are stored as a zstd frame in
+-- body_zstd, with body left empty (notes) or NULL (note_versions); see
+-- core.body_codec
+ALTER TABLE notes ADD COLUMN body_zstd BYTEA;
+ALTER TABLE note_versions ADD COLUMN body_zstd BYTEA;
+
+-- Trained zstd dictionaries for small bodies, by the id frames record.
+-- Rows are never deleted: existing frames need their dictionary to decode
+CREATE TABLE body_dictionaries (
+    dict_id BIGINT PRIMARY KEY,
+    dictionary BYTEA NOT NULL,
+    samples INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,60 @@
+-- Baseline schema. Every statement is idempotent so databases created
+-- before schema_version existed adopt this migration in place.
+
+-- Notes storage on shards other than the primary. User and workspace rows
+-- live on the primary only, so there are no cross-database foreign keys.
+CREATE TABLE IF NOT EXISTS notes (
+    id VARCHAR(255) PRIMARY KEY,
+    title TEXT NOT NULL,
+    body TEXT,
+    tags TEXT[],
+    links TEXT[],
+    color VARCHAR(7) DEFAULT '#6B7280',
+    user_id VARCHAR(255),
+    workspace_id VARCHAR(255),
+    status VARCHAR(50) DEFAULT 'active',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER DEFAULT 1,
+    encrypted BOOLEAN DEFAULT FALSE,
+    archive_key VARCHAR(255)
+);
+
+CREATE TABLE IF NOT EXISTS note_versions (
+    id VARCHAR(255) PRIMARY KEY,
+    note_id VARCHAR(255) REFERENCES notes(id),
+    version INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT,
+    delta TEXT,
+    storage_kind VARCHAR(10) DEFAULT 'snapshot',
+    changed_by VARCHAR(255),
+    change_type VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_notes_user_id ON notes(user_id);
+CREATE INDEX IF NOT EXISTS idx_notes_workspace_id ON notes(workspace_id);
+CREATE INDEX IF NOT EXISTS idx_notes_tags ON notes USING GIN(tags);
+CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes(created_at);
+CREATE INDEX IF NOT EXISTS idx_notes_updated_at ON notes(updated_at);
+CREATE INDEX IF NOT EXISTS idx_notes_deleted ON notes(id) WHERE status = 'deleted';
+CREATE UNIQUE INDEX IF NOT EXISTS uq_note_versions_note_version ON note_versions(note_id, version);
+
+-- Transactional outbox for note side effects (see core.outbox)
+CREATE TABLE IF NOT EXISTS note_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    event_type VARCHAR(50) NOT NULL,
+    note_id VARCHAR(255) NOT NULL,
+    user_id VARCHAR(255),
+    workspace_id VARCHAR(255),
+    payload TEXT,
+    attempts INTEGER DEFAULT 0,
+    completed TEXT[] DEFAULT '{}',
+    last_error TEXT,
+    dead BOOLEAN DEFAULT FALSE,
+    available_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_note_outbox_pending ON note_outbox(available_at, id) WHERE NOT dead;
@@ -0,0 +1,21 @@
+-- Wikilink edges: one row per distinct [[target]] in a note body, keyed
+-- 'id:<note id>' or 't:<lower(btrim(title))>' (see core.wikilinks)
+CREATE TABLE note_links (
+    source_id VARCHAR(255) NOT NULL,
+    target_key TEXT NOT NULL,
+    tenant VARCHAR(512) NOT NULL,
+    target_id VARCHAR(255),
+    position INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (source_id, target_key)
+);
+
+-- Dangling references by the title that would resolve them
+CREATE INDEX idx_note_links_dangling ON note_links(tenant, target_key) WHERE target_id IS NULL;
+
+-- Backlinks, for detaching references when a target is renamed or deleted
+CREATE INDEX idx_note_links_target ON note_links(target_id) WHERE target_id IS NOT NULL;
+
+-- Title -> note resolution per tenant (core.wikilinks.TITLE_KEY_SQL)
+CREATE INDEX idx_notes_title_key ON notes USING HASH (
+    ((CASE WHEN workspace_id IS NOT NULL THEN 'ws:' || workspace_id ELSE 'user:' || user_id END) || '|' || lower(btrim(title)))
+) WHERE status != 'deleted';
@@ -0,0 +1,3 @@
+-- Compressed bodies (see core.body_codec); dictionaries live on the primary
+ALTER TABLE notes ADD COLUMN body_zstd BYTEA;
+ALTER TABLE note_versions ADD COLUMN body_zstd BYTEA;
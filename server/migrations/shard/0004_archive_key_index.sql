@@ -0,0 +1,2 @@
+-- Archive keys still referenced, checked before deleting a cold storage blob
+CREATE INDEX idx_notes_archive_key ON notes(archive_key) WHERE archive_key IS NOT NULL;
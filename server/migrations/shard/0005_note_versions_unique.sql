@@ -0,0 +1,8 @@
+-- One row per (note_id, version). Full-copy history could hold duplicate
+-- version rows; reconstruction always used the earliest, so keep that one
+DELETE FROM note_versions v
+USING note_versions keep
+WHERE keep.note_id = v.note_id AND keep.version = v.version
+  AND (keep.created_at, keep.id) < (v.created_at, v.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_note_versions_note_version ON note_versions(note_id, version);
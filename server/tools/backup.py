@@ -0,0 +1,61 @@
+"""
+💾 BACKUP AND RESTORE TOOL
+O5 Elite Level Disaster Recovery Drills
+
+This script drives the incremental backup engine outside the API process:
+- Take a full or incremental backup on demand
+- List complete backups and their chains
+- Restore a chain into target databases with per-table timings
+- Put archived note bodies back into the cold object store on restore
+
+Usage (from server/):
+    python -m tools.backup run [--full] [--unthrottled]
+    python -m tools.backup list
+    python -m tools.backup restore [--backup-id <id>] [--target-dsn <dsn> ...]
+"""
+
+import argparse
+import asyncio
+import json
+
+from config.enterprise_config import EnterpriseConfig
+from core.backup import create_backup_engine
+from core.pg_fast_path import asyncpg_dsn
+
+async def main(args: argparse.Namespace):
+    engine = create_backup_engine(EnterpriseConfig())
+    if getattr(args, "unthrottled", False):
+        engine.throttle.rate = 0
+
+    if args.command == "run":
+        result = await engine.run(force_full=args.full)
+    elif args.command == "list":
+        result = [
+            {"id": manifest["id"], "kind": manifest["kind"], "parent": manifest["parent"],
+             "watermark": manifest["watermark"], "duration": manifest["duration"]}
+            for manifest in engine.manifests()
+        ]
+    else:
+        targets = [asyncpg_dsn(dsn) for dsn in args.target_dsn] if args.target_dsn else None
+        result = await engine.restore(args.backup_id, targets)
+
+    print(json.dumps(result, indent=2, default=str))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Take, list and restore note database backups")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Take a backup now")
+    run.add_argument("--full", action="store_true", help="Force a full backup")
+    run.add_argument("--unthrottled", action="store_true", help="Ignore BACKUP_MAX_MB_PER_SEC")
+
+    commands.add_parser("list", help="List complete backups, oldest first")
+
+    restore = commands.add_parser("restore", help="Restore a backup chain (schema must exist)")
+    restore.add_argument("--backup-id", help="Backup to restore (default: latest)")
+    restore.add_argument(
+        "--target-dsn", action="append",
+        help="Target database per backed-up database, in order (default: the configured ones)"
+    )
+
+    asyncio.run(main(parser.parse_args()))
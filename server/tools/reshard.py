@@ -0,0 +1,53 @@
+"""
+🚚 WORKSPACE RESHARDING TOOL
+O5 Elite Level Online Tenant Moves
+
+This script moves one tenant's notes to another shard while the API keeps serving:
+- Bulk and catch-up copies while writes continue on the source
+- Short write freeze (retryable 503s) for the final delta and cutover
+- Source rows removed once every worker routes to the target
+
+Usage (from server/):
+    python -m tools.reshard --workspace <workspace_id> --target 2
+    python -m tools.reshard --user <user_id> --target 1   # personal notes
+"""
+
+import argparse
+import asyncio
+import json
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from config.enterprise_config import EnterpriseConfig
+from core.sharding import ShardRouter, ShardMover, tenant_key
+
+async def main(args: argparse.Namespace):
+    config = EnterpriseConfig()
+    engine = create_async_engine(config.get_database_url(), pool_size=2)
+    router = ShardRouter(
+        engine,
+        async_sessionmaker(engine, expire_on_commit=False),
+        config.DATABASE.POSTGRES_SHARD_DSNS,
+        pool_size=2,
+        max_overflow=0,
+        directory_ttl=config.DATABASE.SHARD_DIRECTORY_TTL_MS / 1000
+    )
+
+    try:
+        await router.initialize()
+        mover = ShardMover(router, batch_size=args.batch_size)
+        result = await mover.move(tenant_key(args.workspace, args.user), args.target)
+        print(json.dumps(result, indent=2, default=str))
+    finally:
+        await router.close()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move a workspace (or a user's personal notes) to another shard")
+    tenant = parser.add_mutually_exclusive_group(required=True)
+    tenant.add_argument("--workspace", help="Workspace id to move")
+    tenant.add_argument("--user", help="User id whose personal (workspace-less) notes to move")
+    parser.add_argument("--target", type=int, required=True, help="Target shard (0 is the primary)")
+    parser.add_argument("--batch-size", type=int, default=500)
+
+    asyncio.run(main(parser.parse_args()))